@@ -18,6 +18,10 @@ from fork_backend.models.activities import Activities
 from fork_backend.models.activity_log import ActivityLog
 from fork_backend.models.activity_entry import ActivityEntry
 from fork_backend.models.system import System
+from fork_backend.models.query_embedding import QueryEmbedding
+from fork_backend.models.daily_nutrition import DailyNutrition
+from fork_backend.models.open_food_facts_product import OpenFoodFactsProduct
+from fork_backend.models.tandoor_recipe import TandoorRecipe
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
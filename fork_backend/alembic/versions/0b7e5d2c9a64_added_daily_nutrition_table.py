@@ -0,0 +1,52 @@
+"""added daily_nutrition table
+
+Revision ID: 0b7e5d2c9a64
+Revises: f28a4b7c6e15
+Create Date: 2026-10-18 16:20:08.731542
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e5d2c9a64'
+down_revision: Union[str, Sequence[str], None] = 'f28a4b7c6e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_nutrition',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('meal_type', postgresql.ENUM('BREAKFAST', 'LUNCH', 'DINNER', 'SNACK',
+                                           name='mealtype', create_type=False), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.Column('calories', sa.Float(), nullable=False),
+    sa.Column('protein', sa.Float(), nullable=False),
+    sa.Column('carbs', sa.Float(), nullable=False),
+    sa.Column('fat', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'date', 'meal_type')
+    )
+    # Backfill from the existing entries, afterwards maintained by DailyNutritionService
+    op.execute("""
+        INSERT INTO daily_nutrition (user_id, date, meal_type, entries, calories, protein, carbs, fat)
+        SELECT l.user_id, l.date, e.meal_type, count(e.id),
+               sum(i.calories_per_100 * e.quantity / 100), sum(i.protein_per_100 * e.quantity / 100),
+               sum(i.carbs_per_100 * e.quantity / 100), sum(i.fat_per_100 * e.quantity / 100)
+        FROM food_entries e
+        JOIN food_logs l ON l.id = e.log_id
+        JOIN food_items i ON i.id = e.food_id
+        GROUP BY l.user_id, l.date, e.meal_type
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_nutrition')
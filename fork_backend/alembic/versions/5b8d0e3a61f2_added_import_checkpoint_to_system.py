@@ -0,0 +1,29 @@
+"""added import checkpoint to System
+
+Revision ID: 5b8d0e3a61f2
+Revises: e6b27d054c91
+Create Date: 2026-10-18 10:41:19.204716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8d0e3a61f2'
+down_revision: Union[str, Sequence[str], None] = 'e6b27d054c91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('system', sa.Column('open_nutrition_data_import_checkpoint', sa.Integer(),
+                                      nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('system', 'open_nutrition_data_import_checkpoint')
@@ -0,0 +1,31 @@
+"""added ingredient_id index to food_item_ingredients
+
+Revision ID: 6a1c93e7b2d0
+Revises: 0b7e5d2c9a64
+Create Date: 2026-10-18 17:48:31.094716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1c93e7b2d0'
+down_revision: Union[str, Sequence[str], None] = '0b7e5d2c9a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Finds the parents of an ingredient to propagate changes of its macros
+    op.create_index(op.f('ix_food_item_ingredients_ingredient_id'), 'food_item_ingredients',
+                    ['ingredient_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_food_item_ingredients_ingredient_id'),
+                  table_name='food_item_ingredients')
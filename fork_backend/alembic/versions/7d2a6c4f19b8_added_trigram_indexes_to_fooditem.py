@@ -0,0 +1,48 @@
+"""added trigram indexes to FoodItem name and brand
+
+Revision ID: 7d2a6c4f19b8
+Revises: 9c4e7f1b2a83
+Create Date: 2026-10-18 12:04:31.902744
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2a6c4f19b8'
+down_revision: Union[str, Sequence[str], None] = '9c4e7f1b2a83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm is a trusted extension since postgres 13, no superuser required
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Serve ILIKE '%q%' and the word similarity operator of the lexical part of the search
+    op.create_index(
+        'ix_food_items_name_trgm',
+        'food_items',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_food_items_brand_trgm',
+        'food_items',
+        ['brand'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'brand': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_food_items_brand_trgm', table_name='food_items')
+    op.drop_index('ix_food_items_name_trgm', table_name='food_items')
+    # The extension is left installed, other objects may depend on it
@@ -0,0 +1,54 @@
+"""added tandoor_recipes table
+
+Revision ID: 8f4d2b6e1c39
+Revises: 3e9b0f5c7a12
+Create Date: 2026-10-18 19:52:08.216934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4d2b6e1c39'
+down_revision: Union[str, Sequence[str], None] = '3e9b0f5c7a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tandoor_recipes',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('synced_at', sa.DateTime(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('serving_size', sa.Float(), nullable=False),
+    sa.Column('serving_unit', sa.String(length=20), nullable=False),
+    sa.Column('calories_per_100', sa.Float(), nullable=False),
+    sa.Column('protein_per_100', sa.Float(), nullable=False),
+    sa.Column('carbs_per_100', sa.Float(), nullable=False),
+    sa.Column('fat_per_100', sa.Float(), nullable=False),
+    sa.Column('external_image_url', sa.Text(), nullable=True),
+    sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(dim=384), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # pg_trgm is created by 7d2a6c4f19b8
+    op.create_index(
+        'ix_tandoor_recipes_name_trgm',
+        'tandoor_recipes',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tandoor_recipes_name_trgm', table_name='tandoor_recipes')
+    op.drop_table('tandoor_recipes')
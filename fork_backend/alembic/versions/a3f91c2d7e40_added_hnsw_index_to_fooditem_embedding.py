@@ -0,0 +1,40 @@
+"""added hnsw index to FoodItem embedding
+
+Revision ID: a3f91c2d7e40
+Revises: c10cf8198f7c
+Create Date: 2026-10-18 09:12:03.418265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f91c2d7e40'
+down_revision: Union[str, Sequence[str], None] = 'c10cf8198f7c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Approximate nearest neighbour index for cosine distance searches (pgvector >= 0.5.0)
+    op.create_index(
+        'ix_food_items_embedding_hnsw',
+        'food_items',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+    )
+    # Used by the exact search over a users personal food items
+    op.create_index(op.f('ix_food_items_user_id'), 'food_items', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_food_items_user_id'), table_name='food_items')
+    op.drop_index('ix_food_items_embedding_hnsw', table_name='food_items')
@@ -0,0 +1,37 @@
+"""added trigram index to Activities name
+
+Revision ID: b41e8f63d5a7
+Revises: 7d2a6c4f19b8
+Create Date: 2026-10-18 12:41:17.265930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e8f63d5a7'
+down_revision: Union[str, Sequence[str], None] = '7d2a6c4f19b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Serves ILIKE '%q%' and the word similarity operator of the activity search
+    op.create_index(
+        'ix_activities_name_trgm',
+        'activities',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_activities_name_trgm', table_name='activities')
@@ -0,0 +1,39 @@
+"""added model and backend to query_embeddings
+
+Revision ID: b81f4e6d29a7
+Revises: d5a8c3e97f04
+Create Date: 2026-10-18 22:41:09.318452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4e6d29a7'
+down_revision: Union[str, Sequence[str], None] = 'd5a8c3e97f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The model of the cached embeddings is unknown, they are encoded again on demand
+    op.execute("DELETE FROM query_embeddings")
+    op.add_column('query_embeddings', sa.Column('model', sa.String(length=255), nullable=False))
+    op.add_column('query_embeddings', sa.Column('backend', sa.String(length=255), nullable=False))
+    op.drop_constraint('query_embeddings_pkey', 'query_embeddings', type_='primary')
+    op.create_primary_key('query_embeddings_pkey', 'query_embeddings',
+                          ['model', 'backend', 'query'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The same query can be cached for several models
+    op.execute("DELETE FROM query_embeddings")
+    op.drop_constraint('query_embeddings_pkey', 'query_embeddings', type_='primary')
+    op.drop_column('query_embeddings', 'backend')
+    op.drop_column('query_embeddings', 'model')
+    op.create_primary_key('query_embeddings_pkey', 'query_embeddings', ['query'])
@@ -0,0 +1,29 @@
+"""added user_id, date index to food_logs
+
+Revision ID: f28a4b7c6e15
+Revises: b41e8f63d5a7
+Create Date: 2026-10-18 15:02:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f28a4b7c6e15'
+down_revision: Union[str, Sequence[str], None] = 'b41e8f63d5a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Serves the lookup of the log of a day and the keyset pagination of the log history
+    op.create_index('ix_food_logs_user_id_date', 'food_logs', ['user_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_food_logs_user_id_date', table_name='food_logs')
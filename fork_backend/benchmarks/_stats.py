@@ -0,0 +1,7 @@
+"""Statistics shared by the benchmarks"""
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
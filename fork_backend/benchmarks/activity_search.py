@@ -0,0 +1,155 @@
+"""Benchmark of the activity search.
+
+Replays the keystrokes of the activity picker for names of the imported exercise dataset, e.g.
+"cyc", "cycl", "cycli", ..., against the previous unranked ILIKE query and the trigram ranked
+ActivityService.search_activities, reports the latency of both and prints the query plans.
+
+Run from the fork_backend directory with the db up and the exercise import done:
+    python -m benchmarks.activity_search
+
+The exercise dataset only has a few hundred rows, the planner may still prefer a sequential
+scan for it. Pass --copies to temporarily multiply the activities to see the behaviour on larger
+tables. The copies are removed again at the end of the run.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import select, insert, literal, String, text
+
+from fork_backend.core.constants import ADMIN_USER_ID
+from fork_backend.core.db import get_async_db
+from fork_backend.core.ranking import set_word_similarity_threshold
+from fork_backend.models.activities import Activities
+from fork_backend.services.activity_service import ActivityService
+
+from benchmarks._stats import percentile
+
+
+def keystroke_queries(names: list[str], n_names: int, seed: int) -> list[str]:
+    """Prefixes of at least 3 characters of the first word of random activity names"""
+    rng = random.Random(seed)
+    queries = []
+    for name in rng.sample(names, min(n_names, len(names))):
+        word = name.split()[0].strip(",")
+        queries.extend(word[:i] for i in range(3, len(word) + 1))
+    return queries
+
+
+def legacy_statement(query: str, limit: int):
+    """The unindexed, unranked query the activity search used before"""
+    return select(Activities).where(Activities.name.ilike(f"%{query}%")).limit(limit)
+
+
+async def time_queries(queries: list[str], limit: int) -> tuple[list[float], list[float]]:
+    """Latency in ms of every query with the legacy statement and the search service"""
+    service = ActivityService()
+    legacy_ms, ranked_ms = [], []
+
+    for query in queries:
+        async with get_async_db() as db:
+            start = time.perf_counter()
+            (await db.execute(legacy_statement(query, limit))).scalars().all()
+            legacy_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await service.search_activities(user_id=ADMIN_USER_ID, query=query, limit=limit)
+        ranked_ms.append((time.perf_counter() - start) * 1000)
+
+    return legacy_ms, ranked_ms
+
+
+async def explain(query: str, limit: int) -> None:
+    """Print the plans of both statements for one query"""
+    async with get_async_db() as db:
+        await set_word_similarity_threshold(db)
+        legacy = legacy_statement(query, limit)
+        ranked = select(Activities.id).where(
+            Activities.name.ilike(f"%{query}%")
+            | literal(query, String).op("<%")(Activities.name)
+        ).limit(limit)
+        for label, stmt in (("legacy", legacy), ("ranked", ranked)):
+            compiled = stmt.compile(dialect=db.get_bind().dialect,
+                                    compile_kwargs={"literal_binds": True})
+            plan = await db.execute(text(f"EXPLAIN ANALYZE {compiled}"))
+            print(f"\n{label} plan for '{query}':")
+            for row in plan:
+                print(f"  {row[0]}")
+
+
+async def multiply_activities(copies: int) -> None:
+    """Insert copies of the imported activities, so the planner sees a larger table"""
+    async with get_async_db() as db:
+        rows = (await db.execute(
+            select(Activities.name, Activities.calories_burned_kg_h)
+            .where(Activities.user_id == ADMIN_USER_ID))).all()
+        for copy in range(copies):
+            await db.execute(insert(Activities), [
+                {"user_id": ADMIN_USER_ID, "name": f"{row.name} [benchmark {copy}]",
+                 "calories_burned_kg_h": row.calories_burned_kg_h}
+                for row in rows
+            ])
+        await db.commit()
+        await db.execute(text("ANALYZE activities"))
+
+
+async def remove_copies() -> None:
+    """Remove the activities inserted by multiply_activities"""
+    async with get_async_db() as db:
+        await db.execute(
+            Activities.__table__.delete().where(Activities.name.like("% [benchmark %]")))
+        await db.commit()
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run the benchmark"""
+    async with get_async_db() as db:
+        names = list((await db.execute(
+            select(Activities.name).where(Activities.user_id == ADMIN_USER_ID))).scalars())
+    if not names:
+        print("No imported activities found. Run the exercise import first.")
+        return 1
+
+    if args.copies:
+        print(f"Inserting {args.copies} copies of {len(names)} activities...")
+        await multiply_activities(args.copies)
+
+    try:
+        queries = keystroke_queries(names, args.names, args.seed)
+        # warm up connections and caches
+        await time_queries(queries[:10], args.limit)
+        legacy_ms, ranked_ms = await time_queries(queries, args.limit)
+
+        print(f"\n{len(queries)} queries, limit {args.limit}")
+        print(f"{'query':<8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for label, values in (("legacy", legacy_ms), ("ranked", ranked_ms)):
+            print(f"{label:<8}{statistics.median(values):>9.2f}"
+                  f"{percentile(values, 95):>9.2f}{percentile(values, 99):>9.2f}")
+
+        await explain(queries[len(queries) // 2], args.limit)
+    finally:
+        if args.copies:
+            await remove_copies()
+
+    return 0
+
+
+def main() -> int:
+    """Parse args and run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--names", type=int, default=50,
+                        help="Number of activity names to replay the keystrokes of")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--copies", type=int, default=0,
+                        help="Temporarily multiply the activities by this factor")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Benchmark of the login CPU cost at different bcrypt cost factors.
+
+Verifies passwords like a login does, in the password hash pool with the given concurrency,
+for every cost factor and reports the latency percentiles and the throughput. Use it to pick
+FORK_BACKEND_BCRYPT_ROUNDS for the hardware the backend runs on. Needs no db or server.
+
+Run from the fork_backend directory, with the FORK_PASSWORD_HASH_WORKERS of the deployment:
+    python -m benchmarks.bcrypt_cost --costs 10 11 12 13 14
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from fork_backend.core.auth import (
+    PASSWORD_HASH_WORKERS, hash_password, verify_password_async)
+
+from benchmarks._stats import percentile
+
+PASSWORD = "benchmark password"
+
+
+async def verify(stored_hash: str, semaphore: asyncio.Semaphore) -> float:
+    """Latency in ms of one verification, including the wait for a free hash worker"""
+    async with semaphore:
+        start = time.perf_counter()
+        if not await verify_password_async(PASSWORD, stored_hash):
+            raise RuntimeError("Password verification failed")
+        return (time.perf_counter() - start) * 1000
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run the benchmark"""
+    print(f"{args.logins} logins per cost, {args.concurrency} concurrent, "
+          f"{PASSWORD_HASH_WORKERS} hash workers")
+    print(f"{'cost':<6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'logins/s':>10}")
+
+    for cost in args.costs:
+        stored_hash = hash_password(PASSWORD, rounds=cost)
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*[verify(stored_hash, semaphore)
+                                           for _ in range(args.logins)])
+        duration_s = time.perf_counter() - start
+
+        print(f"{cost:<6}{statistics.median(latencies):>9.1f}{percentile(latencies, 95):>9.1f}"
+              f"{percentile(latencies, 99):>9.1f}{args.logins / duration_s:>10.1f}")
+    return 0
+
+
+def main() -> int:
+    """Parse args and run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--costs", type=int, nargs="+", default=[10, 11, 12, 13],
+                        help="bcrypt cost factors to compare")
+    parser.add_argument("--logins", type=int, default=50,
+                        help="Number of logins per cost factor")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="Number of logins in flight at the same time")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Parity check and benchmark of the embedding backends.
+
+Encodes the names of food items with the torch and the onnx backend, compares the onnx
+embeddings to the torch embeddings stored in FoodItem.embedding and reports encoding latency
+and peak RSS of each backend. Every backend runs in its own process, so the RSS is not shared.
+
+Run from the fork_backend directory with the db up and the food import done:
+    python -m benchmarks.embedding_backends \
+        --onnx-model data/models/multilingual-e5-small \
+        --onnx-file onnx/model_qint8_avx2.onnx
+
+Exits with 1 if any onnx embedding has a cosine similarity below --min-similarity to its stored
+torch embedding.
+"""
+
+import argparse
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import select, func
+
+from fork_backend.core.db import get_sync_db
+from fork_backend.core.embeddings.model import LazyEmbeddingModel
+from fork_backend.models.food_item import FoodItem
+
+from benchmarks._stats import percentile
+
+
+def load_samples(n_samples: int) -> tuple[list[str], np.ndarray]:
+    """Load random food item names with their stored embeddings"""
+    with get_sync_db() as session:
+        rows = session.execute(
+            select(FoodItem.name, FoodItem.embedding)
+            .where(FoodItem.embedding.isnot(None))
+            .order_by(func.random())
+            .limit(n_samples)
+        ).all()
+    return [row.name for row in rows], np.array([row.embedding for row in rows])
+
+
+def run_backend(backend: str, model_name: str, onnx_file: str | None, names: list[str],
+                batch_size: int) -> dict:
+    """Load a backend, encode all names and measure latency and peak RSS. Run in a subprocess"""
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    model = LazyEmbeddingModel(model_name, backend=backend, onnx_file=onnx_file)
+    model.get()
+    load_s = time.perf_counter() - start
+
+    # warm up
+    model.encode(names[:batch_size])
+
+    single_ms = []
+    for name in names:
+        start = time.perf_counter()
+        model.encode([name])
+        single_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    embeddings = []
+    for i in range(0, len(names), batch_size):
+        embeddings.extend(model.encode(names[i:i + batch_size]))
+    batch_s = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "single_p50_ms": statistics.median(single_ms),
+        "single_p95_ms": percentile(single_ms, 95),
+        "single_p99_ms": percentile(single_ms, 99),
+        "batch_texts_per_s": len(names) / batch_s,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "model_rss_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+        "embeddings": embeddings,
+    }
+
+
+def cosine_similarities(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row wise cosine similarity"""
+    return np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def main() -> int:
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--torch-model", default="intfloat/multilingual-e5-small")
+    parser.add_argument("--onnx-model", default="intfloat/multilingual-e5-small")
+    parser.add_argument("--onnx-file", default=None)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-similarity", type=float, default=0.98)
+    args = parser.parse_args()
+
+    names, stored = load_samples(args.samples)
+    if not names:
+        print("No food items with embeddings found. Run the food import first.")
+        return 1
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for backend, model_name, onnx_file in (("torch", args.torch_model, None),
+                                           ("onnx", args.onnx_model, args.onnx_file)):
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(
+                run_backend, (backend, model_name, onnx_file, names, args.batch_size)))
+
+    print(f"{'backend':<8}{'load s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'texts/s':>10}{'peak RSS MB':>13}{'model MB':>10}")
+    for r in results:
+        print(f"{r['backend']:<8}{r['load_s']:>9.2f}{r['single_p50_ms']:>9.2f}"
+              f"{r['single_p95_ms']:>9.2f}{r['single_p99_ms']:>9.2f}"
+              f"{r['batch_texts_per_s']:>10.1f}{r['peak_rss_mb']:>13.1f}{r['model_rss_mb']:>10.1f}")
+
+    print(f"\nCosine similarity to stored FoodItem.embedding ({len(names)} items)")
+    failed = False
+    for r in results:
+        sims = cosine_similarities(np.array(r["embeddings"]), stored)
+        below = int(np.sum(sims < args.min_similarity))
+        print(f"{r['backend']:<8} mean {sims.mean():.4f}  min {sims.min():.4f}  "
+              f"below {args.min_similarity}: {below}")
+        if r["backend"] == "onnx" and below > 0:
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
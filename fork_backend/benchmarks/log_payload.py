@@ -0,0 +1,119 @@
+"""Benchmark of loading food logs with and without the food item embeddings.
+
+Loads the last logs of a user with the full graph of LogService.get_last_x_logs, once with the
+deferred embedding column as the service does and once with it undeferred as before, and
+reports the latency and the bytes the embeddings add to every load.
+
+Run from the fork_backend directory with the db up:
+    python -m benchmarks.log_payload --logs 30
+
+Uses the user with the most food entries unless --user-id is given.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from sqlalchemy import select, func, cast, Text
+from sqlalchemy.orm import selectinload
+
+from fork_backend.core.db import get_async_db
+from fork_backend.models.food_entry import FoodEntry
+from fork_backend.models.food_item import FoodItem, FoodItemIngredient
+from fork_backend.models.food_log import FoodLog
+# imported to register all mappers
+import fork_backend.api.router  # pylint: disable=unused-import
+
+from benchmarks._stats import percentile
+
+
+def logs_statement(user_id: str, n_logs: int, with_embedding: bool):
+    """The statement of get_last_x_logs, optionally loading the embeddings of all food items"""
+    food_item = selectinload(FoodLog.food_entries).selectinload(FoodEntry.food_item)
+    ingredient = food_item.selectinload(FoodItem.ingredients).selectinload(
+        FoodItemIngredient.ingredient)
+    if with_embedding:
+        food_item = food_item.undefer(FoodItem.embedding)
+        ingredient = ingredient.undefer(FoodItem.embedding)
+
+    return (select(FoodLog).where(FoodLog.user_id == user_id).order_by(FoodLog.date.desc())
+            .options(food_item, ingredient, selectinload(FoodLog.goals)).limit(n_logs))
+
+
+def loaded_food_ids(logs: list[FoodLog]) -> set[str]:
+    """Ids of all food items in the graph of the logs"""
+    ids = set()
+    for food_log in logs:
+        for entry in food_log.food_entries:
+            ids.add(entry.food_item.id)
+            ids.update(ingredient.ingredient_id for ingredient in entry.food_item.ingredients)
+    return ids
+
+
+async def time_loads(user_id: str, n_logs: int, with_embedding: bool,
+                     repeats: int) -> tuple[list[float], list[FoodLog]]:
+    """Latency in ms of loading the logs, in a new session every time"""
+    latencies, logs = [], []
+    for _ in range(repeats):
+        async with get_async_db() as db:
+            start = time.perf_counter()
+            logs = list((await db.execute(
+                logs_statement(user_id, n_logs, with_embedding))).scalars())
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, logs
+
+
+async def embedding_bytes(food_ids: set[str]) -> int:
+    """Size of the embeddings of the food items in the text format they are transferred in"""
+    async with get_async_db() as db:
+        return (await db.execute(
+            select(func.coalesce(func.sum(func.octet_length(cast(FoodItem.embedding, Text))), 0))
+            .where(FoodItem.id.in_(food_ids)))).scalar_one()
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run the benchmark"""
+    user_id = args.user_id
+    if user_id is None:
+        async with get_async_db() as db:
+            user_id = (await db.execute(
+                select(FoodLog.user_id).join(FoodEntry, FoodEntry.log_id == FoodLog.id)
+                .group_by(FoodLog.user_id).order_by(func.count().desc()).limit(1)
+            )).scalar_one_or_none()
+    if user_id is None:
+        print("No food entries found. Log some food first.")
+        return 1
+
+    # warm up connections and caches
+    await time_loads(user_id, args.logs, True, 3)
+    deferred_ms, logs = await time_loads(user_id, args.logs, False, args.repeats)
+    undeferred_ms, _ = await time_loads(user_id, args.logs, True, args.repeats)
+
+    food_ids = loaded_food_ids(logs)
+    saved_bytes = await embedding_bytes(food_ids)
+
+    print(f"\n{len(logs)} logs, {sum(len(log.food_entries) for log in logs)} entries, "
+          f"{len(food_ids)} distinct food items, {args.repeats} loads each")
+    print(f"{'embedding':<12}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for label, values in (("loaded", undeferred_ms), ("deferred", deferred_ms)):
+        print(f"{label:<12}{statistics.median(values):>9.2f}"
+              f"{percentile(values, 95):>9.2f}{percentile(values, 99):>9.2f}")
+    # food items that are logged and also ingredients are loaded twice, hence "at least"
+    print(f"\nEmbedding bytes not transferred per load: at least {saved_bytes / 1024:.1f} KiB")
+    return 0
+
+
+def main() -> int:
+    """Parse args and run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--user-id", default=None)
+    parser.add_argument("--logs", type=int, default=30, help="Number of logs to load")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Benchmark of logins under load.
+
+Fires a burst of concurrent logins at a running server while probing the latency of a cheap
+endpoint. With password hashing on the event loop every login blocks all other requests for the
+duration of one bcrypt round, with hashing in the password hash pool the probe latency should
+stay close to the idle latency.
+
+Run from the fork_backend directory against a running server:
+    python -m benchmarks.login_burst --url http://localhost:8000
+
+Compare runs with different FORK_PASSWORD_HASH_WORKERS settings of the server.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from benchmarks._stats import percentile
+
+
+async def probe(client: httpx.AsyncClient, path: str, interval_s: float,
+                stop: asyncio.Event) -> list[float]:
+    """Latency in ms of requests to path, sent every interval_s until stop is set"""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        (await client.get(path)).raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval_s)
+    return latencies
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str,
+                semaphore: asyncio.Semaphore) -> float:
+    """Latency in ms of one login"""
+    async with semaphore:
+        start = time.perf_counter()
+        response = await client.post("/api/v1/auth/login",
+                                     data={"username": username, "password": password})
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+
+async def measure_probe(client: httpx.AsyncClient, args: argparse.Namespace,
+                        burst=None) -> tuple[list[float], list[float], float]:
+    """Probe latencies, login latencies and duration of a burst, or of an idle period"""
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(client, args.probe_path, args.interval, stop))
+
+    start = time.perf_counter()
+    if burst is None:
+        await asyncio.sleep(args.idle)
+        login_ms = []
+    else:
+        login_ms = await burst
+    duration_s = time.perf_counter() - start
+
+    stop.set()
+    return await probe_task, login_ms, duration_s
+
+
+def print_row(label: str, values: list[float]) -> None:
+    """Print count and percentiles of latencies"""
+    if not values:
+        print(f"{label:<16}{'-':>7}")
+        return
+    print(f"{label:<16}{len(values):>7}{statistics.median(values):>9.2f}"
+          f"{percentile(values, 95):>9.2f}{percentile(values, 99):>9.2f}{max(values):>9.2f}")
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run the benchmark"""
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        # warm up, also fails early on wrong credentials
+        await login(client, args.username, args.password, asyncio.Semaphore(1))
+
+        idle_probe_ms, _, _ = await measure_probe(client, args)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        burst = asyncio.gather(*[login(client, args.username, args.password, semaphore)
+                                 for _ in range(args.logins)])
+        burst_probe_ms, login_ms, duration_s = await measure_probe(client, args, burst)
+
+    print(f"\n{args.logins} logins, {args.concurrency} concurrent, "
+          f"{args.logins / duration_s:.1f} logins/s")
+    print(f"{'':<16}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    print_row("probe idle", idle_probe_ms)
+    print_row("probe in burst", burst_probe_ms)
+    print_row("login", login_ms)
+    return 0
+
+
+def main() -> int:
+    """Parse args and run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20,
+                        help="Number of logins in flight at the same time")
+    parser.add_argument("--probe-path", default="/",
+                        help="Cheap endpoint to measure the responsiveness of the server with")
+    parser.add_argument("--interval", type=float, default=0.01,
+                        help="Seconds between two probe requests")
+    parser.add_argument("--idle", type=float, default=2.0,
+                        help="Seconds to probe the idle server for before the burst")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
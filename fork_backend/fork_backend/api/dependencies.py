@@ -2,9 +2,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from fork_backend.core.constants import ADMIN_USER_ID
+from fork_backend.core.db import get_async_db_fastapi
 from fork_backend.services.user_service import UserService
-from fork_backend.core.auth import SECRET_KEY, ALGORITHM
+from fork_backend.core.auth import SECRET_KEY, ALGORITHM, AuthenticatedUser
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -12,10 +15,13 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme),
+                           db: AsyncSession = Depends(get_async_db_fastapi)
+                           ) -> AuthenticatedUser:
     """
-    Dependency that decodes the token, fetches the user from the DB,
-    and returns the User object.
+    Dependency that decodes the token and returns the AuthenticatedUser it belongs to.
+    The user is cached for a short time, so most requests do not hit the DB. Load the full
+    User with UserService if more than the id is needed.
 
     """
     credentials_exception = HTTPException(
@@ -32,9 +38,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError as e:
         raise credentials_exception from e
     
-    service = UserService()
-    user = await service.get_user_by_id(user_id)
-    if user is None:
-        raise credentials_exception
+    service = UserService(db)
+    try:
+        return await service.get_principal(user_id)
+    except ValueError as e:
+        # user deleted since the token was issued
+        raise credentials_exception from e
+
 
-    return user
\ No newline at end of file
+async def get_current_admin(user: AuthenticatedUser = Depends(get_current_user)
+                            ) -> AuthenticatedUser:
+    """
+    Dependency that only lets the admin user through.
+
+    """
+    if user.id != ADMIN_USER_ID:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unable to access. Admin only.",
+        )
+    return user
@@ -9,8 +9,17 @@ from fork_backend.api.routes.food_endpoint import router as food_router
 from fork_backend.api.routes.food_log_endpoint import router as food_log_router
 from fork_backend.api.routes.activity_endpoint import router as activity_router
 from fork_backend.api.routes.activity_log_endpoint import router as activity_log_router
+from fork_backend.api.routes.metrics_endpoint import router as metrics_router
+from fork_backend.core.auth import PASSWORD_HASH_POOL
+from fork_backend.infrastructure.api_clients.open_food_facts_api_client import (
+    close_open_food_facts_client)
+from fork_backend.infrastructure.api_clients.tandoor_api_client import close_tandoor_client
 from fork_backend.core.init.compute_embeddings import import_food
 from fork_backend.core.init.import_activities import import_exercise_activities
+from fork_backend.services.food_service import (
+    EMBEDDING_MODEL, ENCODER_POOL, QUERY_EMBEDDING_CACHE, FoodService)
+from fork_backend.services.tandoor_recipe_service import (
+    TANDOOR_SYNC_INTERVAL_S, run_tandoor_sync)
 
 
 async def run_import_in_background():
@@ -22,9 +31,24 @@ async def run_import_in_background():
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Start the import process in the background """
-    asyncio.create_task(run_import_in_background())
+    """
+    Load the embedding model and start the import process and the sync of the Tandoor recipes
+    in the background
+    """
+    # Failed loads are retried by the searches that need the model
+    EMBEDDING_MODEL.ensure_loading(ENCODER_POOL)
+    background_tasks = [asyncio.create_task(run_import_in_background())]
+    if TANDOOR_SYNC_INTERVAL_S > 0:
+        background_tasks.append(
+            asyncio.create_task(run_tandoor_sync(FoodService.encode_batch_async)))
     yield
+    EMBEDDING_MODEL.cancel_loading()
+    for task in background_tasks:
+        task.cancel()
+    ENCODER_POOL.shutdown(wait=False, cancel_futures=True)
+    PASSWORD_HASH_POOL.shutdown(wait=False, cancel_futures=True)
+    await close_open_food_facts_client()
+    await close_tandoor_client()
 
 app = FastAPI(title="Fork_backend API", lifespan=lifespan)
 
@@ -35,8 +59,24 @@ app.include_router(food_router, prefix=V1_PREFIX)
 app.include_router(food_log_router, prefix=V1_PREFIX)
 app.include_router(activity_router, prefix=V1_PREFIX)
 app.include_router(activity_log_router, prefix=V1_PREFIX)
+app.include_router(metrics_router, prefix=V1_PREFIX)
 
 @app.get("/")
 def read_root():
     """Base root response."""
     return {"message": "Up."}
+
+
+@app.get("/ready")
+def read_ready():
+    """
+    Readiness of the api. Search falls back to a lexical search while the embedding model is not
+    ready. Searches retry failed loads of the model with backoff, see "retry_in_s".
+    """
+    return {
+        "status": "ready" if EMBEDDING_MODEL.is_ready else "degraded",
+        "embeddings": {
+            **EMBEDDING_MODEL.status(),
+            "query_cache": QUERY_EMBEDDING_CACHE.stats(),
+        },
+    }
@@ -3,20 +3,22 @@
 
 from uuid import uuid4
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import APIRouter, status, Depends, HTTPException
 
 from fork_backend.core.logging import get_logger
+from fork_backend.core.db import get_async_db_fastapi
 from fork_backend.api.dependencies import get_current_user
 from fork_backend.services.activity_service import ActivityService
 from fork_backend.api.schemas.activity_schema import (ActivityDetailed, ActivityCreate, ActivityUpdate, ActivitySearch)
 from fork_backend.models.activities import Activities
-from fork_backend.models.user import User
+from fork_backend.core.auth import AuthenticatedUser
 
 log = get_logger()
 router = APIRouter(prefix="/activity", tags=["Activity"])
 
-def verify_ownership(action: str, user: User, activity: Activities) -> bool:
+def verify_ownership(action: str, user: AuthenticatedUser, activity: Activities) -> bool:
     """
     Verify if the user has the right to access an Activity
 
@@ -41,11 +43,12 @@ def verify_ownership(action: str, user: User, activity: Activities) -> bool:
 # --- Endpoints ---
 
 @router.post("/", response_model=ActivityDetailed, status_code=status.HTTP_201_CREATED)
-async def create_activity(activity_info: ActivityCreate, user: User = Depends(get_current_user)):
+async def create_activity(activity_info: ActivityCreate, user: AuthenticatedUser = Depends(get_current_user),
+                          db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Create a new activity.
     """
-    service = ActivityService()
+    service = ActivityService(db)
 
     try:
         activity = Activities(id=str(uuid4()), user_id=user.id, **activity_info.model_dump())
@@ -75,12 +78,13 @@ async def create_activity(activity_info: ActivityCreate, user: User = Depends(ge
 
 @router.patch("/{activity_id}", response_model=ActivityDetailed, status_code=status.HTTP_200_OK)
 async def update_activity(activity_id: str, activity_info: ActivityUpdate,
-                          current_user: User = Depends(get_current_user)) -> ActivityDetailed:
+                          current_user: AuthenticatedUser = Depends(get_current_user),
+                          db: AsyncSession = Depends(get_async_db_fastapi)) -> ActivityDetailed:
     """
     Update a specific activity by ID.
     """
     try:
-        service = ActivityService()
+        service = ActivityService(db)
 
         activity_to_update = await service.get_activity_by_id(activity_id)
 
@@ -119,12 +123,13 @@ async def update_activity(activity_id: str, activity_info: ActivityUpdate,
 
 
 @router.get("/{activity_id}", response_model=ActivityDetailed, status_code=status.HTTP_200_OK)
-async def get_activity(activity_id: str, current_user: User = Depends(get_current_user)) -> ActivityDetailed:
+async def get_activity(activity_id: str, current_user: AuthenticatedUser = Depends(get_current_user),
+                       db: AsyncSession = Depends(get_async_db_fastapi)) -> ActivityDetailed:
     """
     Get a specific activity by ID.
     """
     try:
-        service = ActivityService()
+        service = ActivityService(db)
         activity = await service.get_activity_by_id(activity_id)
 
         if not activity:
@@ -147,11 +152,12 @@ async def get_activity(activity_id: str, current_user: User = Depends(get_curren
         ) from e
 
 @router.post("/search", response_model=list[ActivityDetailed], status_code=status.HTTP_200_OK)
-async def search_activities(query: ActivitySearch, user: User = Depends(get_current_user)):
+async def search_activities(query: ActivitySearch, user: AuthenticatedUser = Depends(get_current_user),
+                            db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Search for activities.
     """
-    service = ActivityService()
+    service = ActivityService(db)
 
     try:
         activities: list[Activities] = await service.search_activities(
@@ -176,12 +182,13 @@ async def search_activities(query: ActivitySearch, user: User = Depends(get_curr
 
 
 @router.delete("/{activity_id}", status_code=status.HTTP_200_OK)
-async def delete_activity(activity_id: str, current_user: User = Depends(get_current_user)):
+async def delete_activity(activity_id: str, current_user: AuthenticatedUser = Depends(get_current_user),
+                          db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Delete a specific activity by ID.
     """
     try:
-        service = ActivityService()
+        service = ActivityService(db)
         activity = await service.get_activity_by_id(activity_id)
 
         if not activity:
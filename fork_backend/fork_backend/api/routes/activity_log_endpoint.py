@@ -3,15 +3,17 @@
 
 from datetime import date as date_class
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import APIRouter, status, Depends, HTTPException, Path, Body, Query
 
 from fork_backend.core.logging import get_logger
+from fork_backend.core.db import get_async_db_fastapi
 from fork_backend.api.dependencies import get_current_user
 from fork_backend.api.schemas.activity_schema import (
     ActivityLogInDB, ActivityEntryInDB, ActivityEntryCreate, ActivityEntryUpdate)
 from fork_backend.models.activity_log import ActivityLog
-from fork_backend.models.user import User
+from fork_backend.core.auth import AuthenticatedUser
 from fork_backend.models.activity_entry import ActivityEntry
 from fork_backend.services.activity_log_service import ActivityLogService
 
@@ -19,11 +21,12 @@ log = get_logger()
 router = APIRouter(prefix="/log", tags=["Activity Log"])
 
 @router.get("/day/{date}/activity", response_model=ActivityLogInDB, status_code=status.HTTP_200_OK)
-async def get_or_create_activity_log(date: date_class = Path(...), user: User = Depends(get_current_user)):
+async def get_or_create_activity_log(date: date_class = Path(...), user: AuthenticatedUser = Depends(get_current_user),
+                                     db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Get the activity log for a specific day. Creates a new log, if that day has no log yet.
     """
-    service = ActivityLogService()
+    service = ActivityLogService(db)
 
     try:
         existing_log: ActivityLog = await service.get_log_by_date(user_id=user.id, log_date=date)
@@ -50,7 +53,8 @@ async def get_or_create_activity_log(date: date_class = Path(...), user: User =
 async def add_activity_to_log(
     date: date_class = Path(...),
     activity_entry_data: ActivityEntryCreate = Body(...),
-    user: User = Depends(get_current_user)
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_fastapi)
 ):
     """
     Add an activity entry to a log for a specific date.
@@ -61,7 +65,7 @@ async def add_activity_to_log(
     
     :return: The created activity entry.
     """
-    service = ActivityLogService()
+    service = ActivityLogService(db)
     
     try:
         activity_entry = ActivityEntry(
@@ -102,7 +106,8 @@ async def add_activity_to_log(
 async def remove_activity_entry(
     date: date_class = Path(...),
     activity_entry_id: str = Path(...),
-    user: User = Depends(get_current_user)
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_fastapi)
 ):
     """
     Remove an activity entry from a log for a specific date.
@@ -113,7 +118,7 @@ async def remove_activity_entry(
     
     :return: 204 No Content on successful deletion.
     """
-    service = ActivityLogService()
+    service = ActivityLogService(db)
     
     try:
         await service.remove_activity_entry(
@@ -148,7 +153,8 @@ async def update_activity_entry(
     date: date_class = Path(...),
     activity_entry_id: str = Path(...),
     activity_entry_data: ActivityEntryUpdate = Body(...),
-    user: User = Depends(get_current_user)
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_fastapi)
 ):
     """
     Update an activity entry in a log for a specific date.
@@ -161,7 +167,7 @@ async def update_activity_entry(
     
     :return: The updated activity entry.
     """
-    service = ActivityLogService()
+    service = ActivityLogService(db)
     
     try:
         updated_entry = await service.update_activity_entry(
@@ -195,7 +201,8 @@ async def update_activity_entry(
         )
 
 @router.get("/last/activity", response_model=list[ActivityLogInDB], status_code=status.HTTP_200_OK)
-async def get_x_logs(n_logs: int = Query(1), user: User = Depends(get_current_user)):
+async def get_x_logs(n_logs: int = Query(1), user: AuthenticatedUser = Depends(get_current_user),
+                     db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Get the last x logs. Might be less if fewer are available
     :param n_logs: n_logs: How many logs to get. Starting with the latest available based on "date".
@@ -206,7 +213,7 @@ async def get_x_logs(n_logs: int = Query(1), user: User = Depends(get_current_us
         (might be shorter if less entries are available)
 
     """
-    service = ActivityLogService()
+    service = ActivityLogService(db)
 
     try:
         last_logs: list[ActivityLog] = await service.get_last_x_logs(user_id=user.id, n_logs=n_logs)
@@ -1,13 +1,16 @@
 """food management endpoints"""
 # pylint: disable=raise-missing-from
 from uuid import uuid4
+import httpx
 
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import APIRouter, status, Depends, HTTPException, Query, UploadFile, File
 from fastapi.responses import FileResponse
 
 from fork_backend.core.logging import get_logger
+from fork_backend.core.db import get_async_db_fastapi
 from fork_backend.api.dependencies import get_current_user
 from fork_backend.services.food_service import FoodService
 from fork_backend.services.image_service import ImageService
@@ -15,15 +18,15 @@ from fork_backend.api.schemas.food_schema import (
     FoodDetailed, FoodCreate, FoodUpdate, FoodSearch)
 from fork_backend.api.schemas.image_schema import RequestImage, ImageUrl
 from fork_backend.models.food_item import FoodItem, FoodItemIngredient
-from fork_backend.models.user import User
+from fork_backend.core.auth import AuthenticatedUser
 from fork_backend.models.image_sizes import ImageSize
 
 log = get_logger()
 router = APIRouter(prefix="/food", tags=["Food"])
 
 
-def verify_ownership(action: str, user: User, food_item: FoodItem, allow_edit_public: bool = True,
-                     allow_delete_public: bool = False) -> bool:
+def verify_ownership(action: str, user: AuthenticatedUser, food_item: FoodItem,
+                     allow_edit_public: bool = True, allow_delete_public: bool = False) -> bool:
     """
     Verify if the user has the right to access a FoodItem
 
@@ -55,11 +58,12 @@ def verify_ownership(action: str, user: User, food_item: FoodItem, allow_edit_pu
 
 
 @router.post("/item/", response_model=FoodDetailed, status_code=status.HTTP_201_CREATED)
-async def create_food(food_info: FoodCreate, user: User = Depends(get_current_user)):
+async def create_food(food_info: FoodCreate, user: AuthenticatedUser = Depends(get_current_user),
+                      db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Create a new food item.
     """
-    service = FoodService()
+    service = FoodService(db)
 
     try:
         food_item = FoodItem(id=str(uuid4()), user_id=user.id,
@@ -95,13 +99,14 @@ async def create_food(food_info: FoodCreate, user: User = Depends(get_current_us
 
 @router.patch("/item/{food_id}", response_model=FoodDetailed, status_code=status.HTTP_200_OK)
 async def update_food(food_id: str, food_info: FoodUpdate,
-                      current_user: User = Depends(get_current_user)) -> FoodDetailed:
+                      current_user: AuthenticatedUser = Depends(get_current_user),
+                      db: AsyncSession = Depends(get_async_db_fastapi)) -> FoodDetailed:
     """
     Update a specific user by ID.
     """
 
     try:
-        service = FoodService()
+        service = FoodService(db)
 
         food_to_update = await service.get_food_item_by_id(food_id)
 
@@ -116,7 +121,6 @@ async def update_food(food_id: str, food_info: FoodUpdate,
         new_food_item: FoodItem = FoodItem(
             id=food_id,
             user_id=food_to_update.user_id,
-            embedding=food_to_update.embedding,
             ingredients=[FoodItemIngredient(
                 parent_id=food_id,
                 ingredient_id=ingredient.ingredient_id,
@@ -128,6 +132,12 @@ async def update_food(food_id: str, food_info: FoodUpdate,
 
         log.debug("Updated info for food with id '%s'", food_id)
         return FoodDetailed.model_validate(updated_food_item)
+    except ValueError as ve:
+        log.error("Failed to update FoodItem with id '%s': %s", food_id, str(ve))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to update FoodItem. {str(ve)}",
+        )
     except IntegrityError as ie:
         log.error(
             "Failed to update FoodItem  id '%s'. IntegrityError raised: %s", food_id, str(ie))
@@ -152,12 +162,13 @@ async def update_food(food_id: str, food_info: FoodUpdate,
 
 @router.get("/item/{food_id}", response_model=FoodDetailed, status_code=status.HTTP_200_OK)
 async def get_food_item(
-        food_id: str, current_user: User = Depends(get_current_user)) -> FoodDetailed:
+        food_id: str, current_user: AuthenticatedUser = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db_fastapi)) -> FoodDetailed:
     """
     Get a specific food item by ID.
     """
     try:
-        service = FoodService()
+        service = FoodService(db)
         food_item = await service.get_food_item_by_id(food_id)
 
     except SQLAlchemyError as sae:
@@ -195,11 +206,12 @@ async def get_food_item(
 
 
 @router.post("/search", response_model=list[FoodDetailed], status_code=status.HTTP_200_OK)
-async def search_food(query: FoodSearch, user: User = Depends(get_current_user)):
+async def search_food(query: FoodSearch, user: AuthenticatedUser = Depends(get_current_user),
+                      db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Create a new food item.
     """
-    service = FoodService()
+    service = FoodService(db)
 
     try:
         food_items: list[FoodItem] = await service.search_food_items(
@@ -207,9 +219,22 @@ async def search_food(query: FoodSearch, user: User = Depends(get_current_user))
             code=query.code,
             source=query.source,
             limit=query.limit,
+            ef_search=query.ef_search,
             user_id=user.id
         )
         return [FoodDetailed.model_validate(food_item) for food_item in food_items]
+    except httpx.TimeoutException as te:
+        log.error("Unable to search for food item. External source timed out: %s", str(te))
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"Unable to search for food item. {query.source.value} did not respond in time.",
+        )
+    except httpx.HTTPError as he:
+        log.error("Unable to search for food item. External source failed: %s", str(he))
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Unable to search for food item. Request to {query.source.value} failed.",
+        )
     except SQLAlchemyError as sae:
         log.error(
             "Unable to search for food item. Unexpected SQLAlchemyError raised: %s", str(sae))
@@ -226,12 +251,13 @@ async def search_food(query: FoodSearch, user: User = Depends(get_current_user))
 
 
 @router.delete("/item/{food_id}", status_code=status.HTTP_200_OK)
-async def delete_food(food_id: str, current_user: User = Depends(get_current_user)):
+async def delete_food(food_id: str, current_user: AuthenticatedUser = Depends(get_current_user),
+                      db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Delete a specific food item by ID.
     """
     try:
-        service = FoodService()
+        service = FoodService(db)
         food_item = await service.get_food_item_by_id(food_id)
 
         if not food_item:
@@ -276,7 +302,8 @@ async def delete_food(food_id: str, current_user: User = Depends(get_current_use
 
 @router.get("/last_logged", response_model=list[FoodDetailed], status_code=status.HTTP_200_OK)
 async def get_last_logged(n_items: int = Query(...),
-                          current_user: User = Depends(get_current_user)):
+                          current_user: AuthenticatedUser = Depends(get_current_user),
+                          db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Get the last logged food items
 
@@ -286,7 +313,7 @@ async def get_last_logged(n_items: int = Query(...),
     :rtype: List[FoodDetailed]
     """
     try:
-        service = FoodService()
+        service = FoodService(db)
         food_items = await service.get_last_logged(
             n_items=n_items,
             user_id=current_user.id)
@@ -310,7 +337,8 @@ async def get_last_logged(n_items: int = Query(...),
 
 @router.put("/item/{food_id}/image", response_model=RequestImage, status_code=status.HTTP_200_OK)
 async def update_food_image(food_id: str, file: UploadFile = File(...),
-                            current_user: User = Depends(get_current_user)):
+                            current_user: AuthenticatedUser = Depends(get_current_user),
+                            db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Update the image for a specific food item.
 
@@ -322,7 +350,7 @@ async def update_food_image(food_id: str, file: UploadFile = File(...),
     :rtype: FoodDetailed
     """
     try:
-        food_service = FoodService()
+        food_service = FoodService(db)
         image_service = ImageService()
 
         # Get the food item to verify ownership
@@ -389,7 +417,8 @@ async def update_food_image(food_id: str, file: UploadFile = File(...),
 @router.put("/item/{food_id}/image_from_url", response_model=RequestImage,
             status_code=status.HTTP_200_OK)
 async def update_food_image_from_url(food_id: str, image_url: ImageUrl,
-                                     current_user: User = Depends(get_current_user)):
+                                     current_user: AuthenticatedUser = Depends(get_current_user),
+                                     db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Update the image for a specific food item from a URL.
 
@@ -401,7 +430,7 @@ async def update_food_image_from_url(food_id: str, image_url: ImageUrl,
     :rtype: RequestImage
     """
     try:
-        food_service = FoodService()
+        food_service = FoodService(db)
         image_service = ImageService()
 
         # Get the food item to verify ownership
@@ -467,7 +496,8 @@ async def update_food_image_from_url(food_id: str, image_url: ImageUrl,
 
 @router.get("/item/{food_id}/image", response_class=FileResponse, status_code=status.HTTP_200_OK)
 async def get_food_image(food_id: str, size: ImageSize = Query(ImageSize.THUMBNAIL),
-                         current_user: User = Depends(get_current_user)):
+                         current_user: AuthenticatedUser = Depends(get_current_user),
+                         db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Get the image for a food item
 
@@ -479,7 +509,7 @@ async def get_food_image(food_id: str, size: ImageSize = Query(ImageSize.THUMBNA
     :rtype: FileResponse
     """
     try:
-        food_service = FoodService()
+        food_service = FoodService(db)
         image_service = ImageService()
 
         # Get the food item
@@ -534,7 +564,8 @@ async def get_food_image(food_id: str, size: ImageSize = Query(ImageSize.THUMBNA
         )
 
 @router.delete("/item/{food_id}/image", status_code=status.HTTP_200_OK)
-async def delete_food_image(food_id: str, current_user: User = Depends(get_current_user)):
+async def delete_food_image(food_id: str, current_user: AuthenticatedUser = Depends(get_current_user),
+                            db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Delete the image for a food item
 
@@ -542,7 +573,7 @@ async def delete_food_image(food_id: str, current_user: User = Depends(get_curre
     :type food_id: str
     """
     try:
-        food_service = FoodService()
+        food_service = FoodService(db)
         image_service = ImageService()
 
         # Get the food item
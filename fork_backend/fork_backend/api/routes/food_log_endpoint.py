@@ -2,29 +2,39 @@
 # pylint: disable=raise-missing-from
 
 from datetime import date as date_class
+from typing import Optional
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import APIRouter, status, Depends, HTTPException, Path, Body, Query
 
 from fork_backend.core.logging import get_logger
+from fork_backend.core.db import get_async_db_fastapi
 from fork_backend.api.dependencies import get_current_user
 from fork_backend.api.schemas.log_schema import (
-    LogInDB, FoodEntryInDB, FoodEntryCreate, FoodEntryUpdate)
+    LogInDB, FoodEntryInDB, FoodEntryCreate, FoodEntryUpdate, DaySummary, DayTotals, LogHistory,
+    NutritionRollup)
 from fork_backend.models.food_log import FoodLog
-from fork_backend.models.user import User
+from fork_backend.core.auth import AuthenticatedUser
+from fork_backend.core.pagination import encode_cursor, decode_cursor
 from fork_backend.models.food_entry import FoodEntry
 from fork_backend.services.food_log_service import LogService
+from fork_backend.services.daily_nutrition_service import DailyNutritionService
 
 log = get_logger()
 router = APIRouter(prefix="/log", tags=["Food Log"])
 
+# Maximum number of days per page of the log history
+MAX_HISTORY_PAGE_SIZE = 100
+
 
 @router.get("/day/{date}/food", response_model=LogInDB, status_code=status.HTTP_200_OK)
-async def get_or_create_log(date: date_class = Path(...), user: User = Depends(get_current_user)):
+async def get_or_create_log(date: date_class = Path(...), user: AuthenticatedUser = Depends(get_current_user),
+                            db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Get the log for a specific day. Creates a new log, if that day has no log yet.
     """
-    service = LogService()
+    service = LogService(db)
 
     try:
         existing_log: FoodLog = await service.get_log_by_date(user_id=user.id, log_date=date)
@@ -47,11 +57,45 @@ async def get_or_create_log(date: date_class = Path(...), user: User = Depends(g
             detail=f"Failed to get or create food log. Unexpected {str(type(e).__name__)} error raised",
         )
 
+@router.get("/day/{date}/summary", response_model=DaySummary, status_code=status.HTTP_200_OK)
+async def get_day_summary(date: date_class = Path(...),
+                          user: AuthenticatedUser = Depends(get_current_user),
+                          db: AsyncSession = Depends(get_async_db_fastapi)):
+    """
+    Get the nutrition totals per meal type and overall, the calories burned and the goals of a
+    specific day. Does not create a log for the day.
+    """
+    service = LogService(db)
+
+    try:
+        summary = await service.get_day_summary(user_id=user.id, log_date=date)
+    except SQLAlchemyError as sae:
+        log.error(
+            "Failed to get summary for date '%s'. Unexpected SQLAlchemyError raised: %s", date, str(sae))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get day summary. Unexpected SQLAlchemyError raised",
+        )
+    except Exception as e:
+        log.error("Failed to get summary for date '%s': %s", date, str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get day summary. Unexpected {str(type(e).__name__)} error raised",
+        )
+
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No goals found for user",
+        )
+    return DaySummary.model_validate(summary)
+
 @router.post("/day/{date}/food", response_model=FoodEntryInDB, status_code=status.HTTP_201_CREATED)
 async def add_food_to_log(
     date: date_class = Path(...),
     food_entry_data: FoodEntryCreate = Body(...),
-    user: User = Depends(get_current_user)
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_fastapi)
 ):
     """
     Add a food entry to a log for a specific date.
@@ -62,7 +106,7 @@ async def add_food_to_log(
 
     :return: The created food entry.
     """
-    service = LogService()
+    service = LogService(db)
 
     try:
         food_entry = FoodEntry(
@@ -104,7 +148,8 @@ async def add_food_to_log(
 async def remove_food_entry(
     date: date_class = Path(...),
     food_entry_id: str = Path(...),
-    user: User = Depends(get_current_user)
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_fastapi)
 ):
     """
     Remove a food entry from a log for a specific date.
@@ -115,7 +160,7 @@ async def remove_food_entry(
 
     :return: 204 No Content on successful deletion.
     """
-    service = LogService()
+    service = LogService(db)
 
     try:
         await service.remove_food_entry(
@@ -151,7 +196,8 @@ async def update_food_entry(
     date: date_class = Path(...),
     food_entry_id: str = Path(...),
     food_entry_data: FoodEntryUpdate = Body(...),
-    user: User = Depends(get_current_user)
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_fastapi)
 ):
     """
     Update a food entry in a log for a specific date.
@@ -164,7 +210,7 @@ async def update_food_entry(
 
     :return: The updated food entry.
     """
-    service = LogService()
+    service = LogService(db)
 
     try:
         updated_entry = await service.update_food_entry(
@@ -198,7 +244,8 @@ async def update_food_entry(
         )
 
 @router.get("/last/food", response_model=list[LogInDB], status_code=status.HTTP_200_OK)
-async def get_x_logs(n_logs: int = Query(1), user: User = Depends(get_current_user)):
+async def get_x_logs(n_logs: int = Query(1), user: AuthenticatedUser = Depends(get_current_user),
+                     db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Get the last x logs. Might be less if fewer are available
     :param n_logs: n_logs: How many logs to get. Starting with the latest available based on "date".
@@ -209,7 +256,7 @@ async def get_x_logs(n_logs: int = Query(1), user: User = Depends(get_current_us
         (might be shorter if less entries are available)
 
     """
-    service = LogService()
+    service = LogService(db)
 
     try:
         last_logs: list[FoodLog] = await service.get_last_x_logs(user_id=user.id, n_logs=n_logs)
@@ -227,3 +274,107 @@ async def get_x_logs(n_logs: int = Query(1), user: User = Depends(get_current_us
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get food logs. Unexpected {str(type(e).__name__)} error raised",
         )
+
+
+@router.get("/logs/food", response_model=LogHistory, status_code=status.HTTP_200_OK)
+async def get_log_history(
+    from_date: Optional[date_class] = Query(None, alias="from",
+                                            description="First date to include"),
+    to_date: Optional[date_class] = Query(None, alias="to", description="Last date to include"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(30, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    totals_only: bool = Query(False, description="Only return the nutrition totals per day"),
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_fastapi)
+):
+    """
+    Get the food logs of a date range page by page, newest first.
+
+    :param from_date: The first date to include (optional).
+    :param to_date: The last date to include (optional).
+    :param cursor: The next_cursor of the previous page. Omit for the first page.
+    :param limit: Maximum number of days per page.
+    :param totals_only: Return the nutrition totals per day instead of the logs.
+    :param user: The currently logged in user.
+
+    :return: The logs or totals of the page and the cursor of the next page.
+    """
+    service = LogService(db)
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+
+    try:
+        if totals_only:
+            totals, next_key = await service.get_log_history_totals(
+                user_id=user.id, from_date=from_date, to_date=to_date, after=after, limit=limit)
+            page = LogHistory(totals=[DayTotals.model_validate(day) for day in totals])
+        else:
+            logs, next_key = await service.get_log_history(
+                user_id=user.id, from_date=from_date, to_date=to_date, after=after, limit=limit)
+            page = LogHistory(logs=[LogInDB.model_validate(food_log) for food_log in logs])
+    except SQLAlchemyError as sae:
+        log.error(
+            "Failed to get food log history for user '%s'. Unexpected SQLAlchemyError raised: %s", user.id, str(sae))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get food log history. Unexpected SQLAlchemyError raised",
+        )
+    except Exception as e:
+        log.error("Failed to get food log history for user '%s': %s", user.id, str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get food log history. Unexpected {str(type(e).__name__)} error raised",
+        )
+
+    page.next_cursor = encode_cursor(*next_key) if next_key else None
+    return page
+
+
+@router.get("/nutrition", response_model=list[NutritionRollup], status_code=status.HTTP_200_OK)
+async def get_nutrition_range(
+    from_date: date_class = Query(..., alias="from", description="First date to include"),
+    to_date: date_class = Query(..., alias="to", description="Last date to include"),
+    per_meal: bool = Query(False, description="Return the totals of every meal type"),
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db_fastapi)
+):
+    """
+    Get the nutrition totals of every day with entries in a date range, oldest first. Read from
+    the daily nutrition rollups, so long ranges e.g. for charts do not load any entries.
+
+    :param from_date: The first date to include.
+    :param to_date: The last date to include.
+    :param per_meal: Return the totals of every meal type of a day instead of the day.
+    :param user: The currently logged in user.
+
+    :return: List of the totals.
+    """
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'",
+        )
+
+    service = DailyNutritionService(db)
+
+    try:
+        rollups = await service.get_range(
+            user_id=user.id, from_date=from_date, to_date=to_date, per_meal=per_meal)
+        return [NutritionRollup.model_validate(rollup) for rollup in rollups]
+    except SQLAlchemyError as sae:
+        log.error(
+            "Failed to get nutrition of user '%s' from '%s' to '%s'. Unexpected SQLAlchemyError raised: %s", user.id, from_date, to_date, str(sae))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get nutrition. Unexpected SQLAlchemyError raised",
+        )
+    except Exception as e:
+        log.error("Failed to get nutrition of user '%s' from '%s' to '%s': %s", user.id,
+                  from_date, to_date, str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get nutrition. Unexpected {str(type(e).__name__)} error raised",
+        )
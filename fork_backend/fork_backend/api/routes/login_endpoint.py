@@ -3,22 +3,34 @@
 
 from datetime import timedelta
 from sqlalchemy.exc import SQLAlchemyError
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from fork_backend.core.auth import create_access_token, verify_password
+from fork_backend.core.auth import create_access_token, needs_rehash, verify_password_async
 from fork_backend.core.logging import get_logger
 from fork_backend.services.user_service import UserService
 
 log = get_logger()
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+
+async def rehash_password(user_id: str, plain_text_password: str, current_hash: str) -> None:
+    """Replace a password hash with a different cost factor, without failing the login."""
+    try:
+        if await UserService().rehash_password(user_id, plain_text_password, current_hash):
+            log.info("Rehashed password of user '%s' with the configured cost factor", user_id)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        log.warning("Failed to rehash password of user '%s': %s", user_id, str(e))
+
+
 @router.post("/login")
 async def login_for_access_token(
+    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Endpoint to exchange username/password for an access token.
     Uses OAuth2PasswordRequestForm (application/x-www-form-urlencoded).
+    Passwords hashed with a different bcrypt cost factor are rehashed after the response.
     """
     service = UserService()
     
@@ -38,13 +50,17 @@ async def login_for_access_token(
             detail=f"Failed to authenticate user. Unexpected {str(type(e).__name__)} error raised",
         )
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    if needs_rehash(user.hashed_password):
+        background_tasks.add_task(
+            rehash_password, user.id, form_data.password, user.hashed_password)
+
     try:
         access_token_expires = timedelta(days=7)
         access_token = create_access_token(
@@ -0,0 +1,34 @@
+"""Runtime metrics endpoints"""
+
+from fastapi import APIRouter, status, Depends
+
+from fork_backend.core.db import get_pool_status
+from fork_backend.api.dependencies import get_current_admin
+from fork_backend.core.auth import AuthenticatedUser
+from fork_backend.services.food_service import (
+    EMBEDDING_MODEL, QUERY_EMBEDDING_CACHE, OPEN_FOOD_FACTS_SEARCH_CACHE, OPEN_FOOD_FACTS_SEARCHES)
+from fork_backend.services.user_service import PRINCIPAL_CACHE
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def get_metrics(_admin: AuthenticatedUser = Depends(get_current_admin)):
+    """
+    Get the state of the db connection pools, the caches and the embedding model. Admin only.
+
+    Checkout and wait times are histograms in ms with cumulative bucket counts. Checkouts that
+    wait, or time out, mean the pool is too small for the load.
+    """
+    return {
+        "db_pools": get_pool_status(),
+        "user_cache": PRINCIPAL_CACHE.stats(),
+        "embeddings": {
+            **EMBEDDING_MODEL.status(),
+            "query_cache": QUERY_EMBEDDING_CACHE.stats(),
+        },
+        "open_food_facts_search_cache": {
+            **OPEN_FOOD_FACTS_SEARCH_CACHE.stats(),
+            **OPEN_FOOD_FACTS_SEARCHES.stats(),
+        },
+    }
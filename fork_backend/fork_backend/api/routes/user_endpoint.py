@@ -5,12 +5,15 @@ import os
 from datetime import date
 from typing import Optional
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import APIRouter, status, Depends, HTTPException, Query
 
 from fork_backend.core.logging import get_logger
+from fork_backend.core.db import get_async_db_fastapi
 from fork_backend.api.dependencies import get_current_user
 from fork_backend.models.user import User
+from fork_backend.core.auth import AuthenticatedUser
 from fork_backend.models.goals import Goals
 from fork_backend.services.user_service import UserService
 from fork_backend.api.schemas.user_schema import (
@@ -20,7 +23,7 @@ log = get_logger()
 router = APIRouter(prefix="/user", tags=["User"])
 
 
-def verify_user_id(user: User, user_id_to_access: str) -> bool:
+def verify_user_id(user: AuthenticatedUser, user_id_to_access: str) -> bool:
     """
     Verify if the user id of the logged in user is the same as the id they are trying to access.
 
@@ -49,7 +52,7 @@ def str_to_bool(val: str) -> bool:
     return val.lower() in ("true")
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-async def create_user(user_info: UserCreate):
+async def create_user(user_info: UserCreate, db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Create a new user.
     """
@@ -63,7 +66,7 @@ async def create_user(user_info: UserCreate):
                     "Please contact the server admin."),
         )
 
-    service = UserService()
+    service = UserService(db)
 
     try:
         new_user: User = await service.create_user(
@@ -126,14 +129,15 @@ async def update_user(user_id: str, user_info: UserUpdate,
                           description=("Date on which the 'weight' should be logged." +
                                        " Defaults to today, but should optimally always be set" +
                                        " to avoid timezone problems. YYYY-MM-DD.")),
-                      current_user: User = Depends(get_current_user)) -> UserInDB:
+                      current_user: AuthenticatedUser = Depends(get_current_user),
+                      db: AsyncSession = Depends(get_async_db_fastapi)) -> UserInDB:
     """
     Update a specific user by ID.
     """
     if not verify_user_id(current_user, user_id):
         return None
 
-    service = UserService()
+    service = UserService(db)
 
     try:
         if weight_date_overwrite:
@@ -175,14 +179,15 @@ async def update_user(user_id: str, user_info: UserUpdate,
 
 
 @router.get("/{user_id}", response_model=UserInDB, status_code=status.HTTP_200_OK)
-async def get_user(user_id: str, current_user: User = Depends(get_current_user)) -> UserInDB:
+async def get_user(user_id: str, current_user: AuthenticatedUser = Depends(get_current_user),
+                   db: AsyncSession = Depends(get_async_db_fastapi)) -> UserInDB:
     """
     Get a specific user by ID.
     """
     if not verify_user_id(current_user, user_id):
         return None
 
-    service = UserService()
+    service = UserService(db)
 
     try:
         user = await service.get_user_by_id(user_id)
@@ -214,7 +219,8 @@ async def get_user(user_id: str, current_user: User = Depends(get_current_user))
 @router.put("/{user_id}/weight-history", response_model=list[WeigthHistory], status_code=status.HTTP_200_OK)
 async def update_weight_history(user_id: str,
                                 weight_history_list: list[WeigthHistory],
-                                current_user: User = Depends(get_current_user)):
+                                current_user: AuthenticatedUser = Depends(get_current_user),
+                                db: AsyncSession = Depends(get_async_db_fastapi)):
     """
     Update the weight history for a specific user.
     This endpoint accepts a list of weight history objects and updates them based on ID.
@@ -226,7 +232,7 @@ async def update_weight_history(user_id: str,
             detail="Unable to access. Wrong user.",
         )
 
-    service = UserService()
+    service = UserService(db)
 
     try:
         updated_weight_history = await service.update_weight_history_list(
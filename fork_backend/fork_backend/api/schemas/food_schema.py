@@ -105,7 +105,9 @@ class FoodSearch(ForkBaseSchema):
     code: Optional[str] = Field(None, examples=["3017620422003"])
     source: Optional[Sources] = Field(
         Sources.LOCAL, examples=[Sources.LOCAL, Sources.OPENFOODFACTS])
-    limit: Optional[int] = Field(20, examples=[20])
+    limit: Optional[int] = Field(20, ge=1, le=100, examples=[20])
+    ef_search: Optional[int] = Field(None, ge=1, le=1000, examples=[40],
+                                     description="HNSW candidate list size for local searches")
 
 
 FoodIngredientBase.model_rebuild()
@@ -48,3 +48,36 @@ class FoodEntryCreate(ForkBaseSchema):
     quantity: float = Field(..., description="How much of the food was eaten in g.",
                             examples=["100"])
     meal_type: MealType = Field(..., description="What type of meal this was.")
+
+
+class NutritionTotals(ForkBaseSchema):
+    """Summed nutrition of food entries"""
+    entries: int = Field(0, ge=0, description="Number of food entries")
+    calories: float = Field(0, examples=[650.5])
+    protein: float = Field(0, description="Protein in g", examples=[32.1])
+    carbs: float = Field(0, description="Carbs in g", examples=[80.4])
+    fat: float = Field(0, description="Fat in g", examples=[21.0])
+
+class DaySummary(ForkBaseSchema):
+    """Nutrition totals, calories burned and goals of a day"""
+    date: date_class = Field(..., examples=["2025-01-29"])
+    meals: dict[MealType, NutritionTotals] = Field(..., description="Totals per meal type")
+    total: NutritionTotals = Field(..., description="Totals of the entire day")
+    calories_burned: float = Field(0, description="Calories burned by all activities of the day")
+    goals: GoalsBase = Field(default_factory=GoalsBase, description="the users goals on this day")
+
+class DayTotals(NutritionTotals):
+    """Nutrition totals of one day of the log history"""
+    date: date_class = Field(..., examples=["2025-01-29"])
+
+class LogHistory(ForkBaseSchema):
+    """A page of the log history, newest first"""
+    logs: list[LogInDB] = Field([], description="The logs of the page. Empty for totals_only")
+    totals: list[DayTotals] = Field([], description="The totals per day. Only for totals_only")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, None if this "
+                                       "is the last page")
+
+class NutritionRollup(DayTotals):
+    """Nutrition totals of a day, or of one meal type of a day"""
+    meal_type: Optional[MealType] = Field(None, description="The meal type, None for the totals "
+                                          "of the entire day")
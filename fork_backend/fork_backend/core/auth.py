@@ -1,5 +1,8 @@
 """auth functions"""
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from os import environ
@@ -13,12 +16,34 @@ SECRET_KEY = environ.get("FORK_BACKEND_SECRET_KEY",
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# bcrypt cost factor of new hashes. Every increment doubles the CPU time of a login. Hashes with a
+# different cost are replaced on the next login of their user, see needs_rehash.
+BCRYPT_ROUNDS = int(environ.get("FORK_BACKEND_BCRYPT_ROUNDS", default="12"))
 
-def hash_password(plain_text_password: str) -> str:
+# bcrypt releases the GIL, so hashing in threads keeps the event loop responsive. The number of
+# workers caps how many CPU cores a burst of logins can occupy, further hashes are queued.
+PASSWORD_HASH_WORKERS = int(environ.get("FORK_PASSWORD_HASH_WORKERS", default="2"))
+PASSWORD_HASH_POOL = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS,
+                                        thread_name_prefix="password-hash")
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    The user an access token belongs to. Only holds what is needed to authorize a request, load
+    the full User with UserService if more is needed. Immutable, as it is shared between requests
+    by the principal cache of UserService.
+    """
+    id: str
+    username: str
+
+
+def hash_password(plain_text_password: str, rounds: int = BCRYPT_ROUNDS) -> str:
     """
     Hashes a plain text password using bcrypt.
 
     :param: plain_text_password: The password to hash.
+    :param: rounds: The bcrypt cost factor, between 4 and 31.
     :return: The salted and hashed password as a string.
     """
     if not plain_text_password:
@@ -27,7 +52,7 @@ def hash_password(plain_text_password: str) -> str:
     # bcrypt requires bytes, so we encode the string to utf-8
     password_bytes = plain_text_password.encode('utf-8')
 
-    salt = bcrypt.gensalt(rounds=12)
+    salt = bcrypt.gensalt(rounds=rounds)
 
     hashed_bytes = bcrypt.hashpw(password_bytes, salt)
 
@@ -52,6 +77,46 @@ def verify_password(plain_text_password: str, stored_hash: str) -> bool:
     return bcrypt.checkpw(password_bytes, hash_bytes)
 
 
+def needs_rehash(stored_hash: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    """
+    Checks if a stored bcrypt hash was created with a different cost factor.
+
+    :param: stored_hash: The hash stored in the database, e.g. "$2b$12$<salt and hash>".
+    :param: rounds: The expected bcrypt cost factor.
+
+    :return: bool: True if the hash should be replaced, False if it uses the expected cost or
+        is no bcrypt hash.
+    """
+    parts = stored_hash.split("$")
+    if len(parts) != 4 or not parts[2].isdigit():
+        return False
+    return int(parts[2]) != rounds
+
+
+async def hash_password_async(plain_text_password: str) -> str:
+    """
+    Hashes a plain text password in the password hash pool without blocking the event loop.
+
+    :param: plain_text_password: The password to hash.
+    :return: The salted and hashed password as a string.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        PASSWORD_HASH_POOL, hash_password, plain_text_password)
+
+
+async def verify_password_async(plain_text_password: str, stored_hash: str) -> bool:
+    """
+    Verifies a password in the password hash pool without blocking the event loop.
+
+    :param: plain_text_password: The password to check.
+    :param: stored_hash: The hash stored in the database.
+
+    :return: bool: True if the password matches, False otherwise.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        PASSWORD_HASH_POOL, verify_password, plain_text_password, stored_hash)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Creates a JWT access token.
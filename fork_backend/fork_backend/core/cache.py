@@ -0,0 +1,269 @@
+"""In-process caches"""
+
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class LRUCache:
+    """Size-bounded least recently used cache that keeps track of hits, misses and evictions."""
+
+    def __init__(self, max_size: int) -> None:
+        """
+        :param max_size: Maximum number of entries. The least recently used entry is evicted
+            once the cache grows beyond it. 0 disables the cache.
+        """
+        self.max_size = max(0, max_size)
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value and mark it as most recently used.
+
+        :param key: The key of the value.
+        :param default: Returned if the key is not cached.
+        :return: The cached value or default.
+        """
+        if key not in self._entries:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Add or replace a value, evicting the least recently used entries if necessary.
+
+        :param key: The key of the value.
+        :param value: The value to cache.
+        """
+        if self.max_size == 0:
+            return
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._evict_oldest()
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a key from the cache, if it is cached."""
+        self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry. Every removal goes through here."""
+        self._entries.pop(key, None)
+
+    def _evict_oldest(self) -> None:
+        """Evict the least recently used entry"""
+        self._remove(next(iter(self._entries)))
+        self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries. Does not reset the statistics."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Get the statistics of the cache.
+
+        :return: Dict with size, max_size, hits, misses, evictions and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TTLCache(LRUCache):
+    """Size-bounded least recently used cache whose entries expire after a fixed time."""
+
+    _MISSING = object()
+
+    def __init__(self, max_size: int, ttl_s: float) -> None:
+        """
+        :param max_size: Maximum number of entries. 0 disables the cache.
+        :param ttl_s: Seconds after which an entry expires. 0 disables the cache.
+        """
+        super().__init__(max_size if ttl_s > 0 else 0)
+        self.ttl_s = ttl_s
+        self.expirations = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value that has not expired yet and mark it as most recently used.
+
+        :param key: The key of the value.
+        :param default: Returned if the key is not cached or expired.
+        :return: The cached value or default.
+        """
+        expires_at, value = super().get(key, (0.0, self._MISSING))
+        if value is self._MISSING:
+            return default
+
+        if expires_at <= time.monotonic():
+            # counted as hit by LRUCache.get
+            self.hits -= 1
+            self.misses += 1
+            self.expirations += 1
+            self._remove(key)
+            return default
+
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Add or replace a value, which expires after ttl_s seconds.
+
+        :param key: The key of the value.
+        :param value: The value to cache.
+        """
+        super().set(key, (time.monotonic() + self.ttl_s, value))
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Get the statistics of the cache.
+
+        :return: Dict with size, max_size, ttl_s, hits, misses, evictions, expirations and
+            hit_rate.
+        """
+        return {**super().stats(), "ttl_s": self.ttl_s, "expirations": self.expirations}
+
+
+def approximate_size(value: Any) -> int:
+    """
+    Approximate memory used by a value in bytes, following containers. Shared objects are counted
+    every time they are referenced.
+
+    :param value: The value, e.g. a list of dicts of str and numbers.
+    :return: The size in bytes.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class SizedTTLCache(TTLCache):
+    """
+    TTL cache that is bounded by the approximate memory of its values as well as by the number
+    of entries. Evicts the least recently used entries until both bounds hold.
+    """
+
+    def __init__(self, max_size: int, max_bytes: int, ttl_s: float,
+                 size_of: Callable[[Any], int] = approximate_size) -> None:
+        """
+        :param max_size: Maximum number of entries. 0 disables the cache.
+        :param max_bytes: Maximum approximate memory of all values in bytes. Values larger than
+            this are not cached.
+        :param ttl_s: Seconds after which an entry expires. 0 disables the cache.
+        :param size_of: Function approximating the memory of a value in bytes.
+        """
+        super().__init__(max_size, ttl_s)
+        self.max_bytes = max(0, max_bytes)
+        self.size_of = size_of
+        self.bytes = 0
+        self._sizes: dict[Hashable, int] = {}
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Add or replace a value, which expires after ttl_s seconds.
+
+        :param key: The key of the value.
+        :param value: The value to cache.
+        """
+        self._remove(key)
+        size = self.size_of(value)
+        if self.max_size == 0 or size > self.max_bytes:
+            return
+
+        super().set(key, value)
+        self._sizes[key] = size
+        self.bytes += size
+
+        while self.bytes > self.max_bytes:
+            self._evict_oldest()
+
+    def _remove(self, key: Hashable) -> None:
+        super()._remove(key)
+        self.bytes -= self._sizes.pop(key, 0)
+
+    def clear(self) -> None:
+        """Remove all entries. Does not reset the statistics."""
+        super().clear()
+        self._sizes.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Get the statistics of the cache.
+
+        :return: Dict with size, max_size, bytes, max_bytes, ttl_s, hits, misses, evictions,
+            expirations and hit_rate.
+        """
+        return {**super().stats(), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls of the same key. While a call is in flight, further callers of
+    its key wait for it and get its result or exception instead of calling again.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a call, unless a call of the key is in flight already.
+
+        :param key: The key identifying identical calls.
+        :param call: Coroutine function to run if no call of the key is in flight.
+        :return: The result of the call.
+        """
+        future = self._calls.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(call())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.deduplicated += 1
+
+        # Shielded, so a cancelled caller does not cancel the call the others wait for
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the statistics of the deduplication.
+
+        :return: Dict with in_flight, calls and deduplicated.
+        """
+        return {"in_flight": len(self._calls), "calls": self.calls,
+                "deduplicated": self.deduplicated}
@@ -5,3 +5,6 @@ VERSION = "0.9.1"
 OPENFOODFACTS_USER_AGENT = "Fork/" + VERSION
 
 FOOD_ID_PLACEHOLDER = "PLACEHOLDER_ID_ITEM_NOT_IN_LOCAL_DB"
+
+# Id of the admin user, which owns the imported food items and activities shared by all users
+ADMIN_USER_ID = "admin"
@@ -2,13 +2,16 @@
 
 import os
 from contextlib import contextmanager, asynccontextmanager
-from typing import Generator, AsyncGenerator
+from typing import Any, Generator, AsyncGenerator, Optional
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from alembic.config import Config
 from alembic import command
 
+from fork_backend.core.constants import ADMIN_USER_ID
+from fork_backend.core.metrics import (
+    MeteredQueuePool, MeteredAsyncAdaptedQueuePool, get_pool_metrics)
 from fork_backend.core.auth import hash_password
 from fork_backend.models.system import System
 from fork_backend.models.user import User
@@ -20,10 +23,32 @@ PG_PW = os.environ.get("FORK_POSTGRES_PASSWORD", default="fork_password")
 PG_URL = os.environ.get("FORK_POSTGRES_URL", default="localhost:5432")
 PG_DB = os.environ.get("FORK_POSTGRES_DB_NAME", default="fork_db")
 
+# --- Connection pool settings, shared by the sync and async engine ---
+DB_POOL_SIZE = int(os.environ.get("FORK_DB_POOL_SIZE", default="5"))
+DB_MAX_OVERFLOW = int(os.environ.get("FORK_DB_MAX_OVERFLOW", default="10"))
+DB_POOL_TIMEOUT = float(os.environ.get("FORK_DB_POOL_TIMEOUT", default="30"))
+# Seconds after which connections are replaced, -1 to keep them forever
+DB_POOL_RECYCLE = int(os.environ.get("FORK_DB_POOL_RECYCLE", default="-1"))
+# Test connections with a round trip on checkout, to survive db restarts
+DB_POOL_PRE_PING = os.environ.get("FORK_DB_POOL_PRE_PING", default="false").lower() == "true"
+# Number of prepared statements cached per asyncpg connection, 0 to disable
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("FORK_DB_STATEMENT_CACHE_SIZE", default="100"))
+
+POOL_SETTINGS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
 SQLALCHEMY_DATABASE_URL = f"postgresql://{PG_USER}:{PG_PW}@{PG_URL}/{PG_DB}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
+    poolclass=MeteredQueuePool,
+    pool_logging_name="sync",
+    **POOL_SETTINGS,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
@@ -34,6 +59,10 @@ ASYNC_SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{PG_USER}:{PG_PW}@{PG_URL
 async_engine = create_async_engine(
     ASYNC_SQLALCHEMY_DATABASE_URL,
     echo=False,
+    poolclass=MeteredAsyncAdaptedQueuePool,
+    pool_logging_name="async",
+    connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+    **POOL_SETTINGS,
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -83,6 +112,8 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
 async def get_async_db_fastapi() -> AsyncGenerator[AsyncSession, None]:
     """
     FastAPI dependency without contextmanager decorator.
+    Yields one session per request, which is shared by all dependencies and services of the
+    request that depend on it.
     """
     session = AsyncSessionLocal()
     try:
@@ -90,6 +121,59 @@ async def get_async_db_fastapi() -> AsyncGenerator[AsyncSession, None]:
     finally:
         await session.close()
 
+
+@asynccontextmanager
+async def use_async_db(session: Optional[AsyncSession] = None
+                       ) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async context manager that yields the given session, e.g. the request scoped session of
+    get_async_db_fastapi, or a new session if none is given.
+    Only a new session is closed when the context block exits, a given session stays open for
+    the next operation of the request. It is rolled back on errors to keep it usable.
+    """
+    if session is None:
+        async with get_async_db() as new_session:
+            yield new_session
+        return
+
+    try:
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+
+
+async def release_connection(session: Optional[AsyncSession]) -> None:
+    """
+    End the transaction of a given session before waiting for something else, e.g. a remote
+    api, so its connection goes back to the pool instead of idling in the transaction. The
+    session starts a new transaction on its next use. Only for sessions without pending
+    changes, as it commits them.
+    """
+    if session is not None and session.in_transaction():
+        await session.commit()
+
+def get_pool_status() -> dict[str, Any]:
+    """
+    Get the state and checkout metrics of the connection pools.
+
+    :return: Dict with the size, checked out and overflow connections and the checkout metrics
+        of the async and the sync pool.
+    """
+    status = {}
+    for name, pool in (("async", async_engine.pool), ("sync", engine.pool)):
+        status[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # negative while the pool has not opened pool_size connections yet
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": DB_MAX_OVERFLOW,
+            **get_pool_metrics(name).snapshot(),
+        }
+    return status
+
+
 def create_admin_user() -> None:
     """Create admin user if it doesn't exist"""
     # Get admin credentials from environment or use defaults
@@ -105,7 +189,7 @@ def create_admin_user() -> None:
         if not existing_admin:
             hashed_password = hash_password(admin_password)
             admin_user = User(
-                id="admin",
+                id=ADMIN_USER_ID,
                 username=admin_username,
                 email=admin_email,
                 hashed_password=hashed_password,
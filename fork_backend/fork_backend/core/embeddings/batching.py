@@ -0,0 +1,102 @@
+"""Micro-batching of embedding requests"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Optional
+
+from fork_backend.core.logging import get_logger
+
+log = get_logger()
+
+
+class BatchingEncoder:
+    """
+    Collects texts that are submitted for encoding within a short time window and encodes them
+    with a single call to the model, resolving each awaiting coroutine with its own embedding.
+    """
+
+    def __init__(self, encode_batch: Callable[[list[str]], list[list[float]]],
+                 executor: Executor, max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 max_concurrent_batches: int = 1) -> None:
+        """
+        :param encode_batch: Blocking function that encodes a list of texts. Run in executor.
+        :param executor: Executor in which encode_batch is run.
+        :param max_batch_size: Maximum number of texts to encode with one call.
+        :param max_wait_ms: How long to wait for more texts after the first one arrived.
+        :param max_concurrent_batches: How many batches may be encoded at the same time.
+            Should not exceed the number of workers of the executor.
+        """
+        self._encode_batch = encode_batch
+        self._executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Keeps references to the running batches, so they are not garbage collected
+        self._batches: set[asyncio.Task] = set()
+
+    async def encode(self, text: str) -> list[float]:
+        """
+        Encode a single text. Waits until the batch containing the text has been encoded.
+
+        :param text: The text to encode.
+        :return: The embedding of the text.
+        """
+        self._ensure_dispatcher()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    def _ensure_dispatcher(self) -> None:
+        """Start the dispatcher task for the running event loop, if it is not running yet."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._dispatcher and not self._dispatcher.done():
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """Form batches from the queued texts and hand them to the executor."""
+        while True:
+            # Only start collecting once a slot is free, so texts keep piling up in the queue
+            # while all slots are busy and the next batch gets bigger.
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+
+            if self.max_wait > 0 and self._queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_wait)
+
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            task = self._loop.create_task(self._encode(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _encode(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        """Encode a batch and resolve the futures waiting for it."""
+        try:
+            # Identical texts only need to be encoded once
+            unique_texts = list(dict.fromkeys(text for text, _ in batch))
+            embeddings = await self._loop.run_in_executor(
+                self._executor, self._encode_batch, unique_texts)
+            by_text = dict(zip(unique_texts, embeddings))
+
+            log.debug("Encoded batch of %d texts (%d unique)", len(batch), len(unique_texts))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+        except Exception as e:
+            log.error("Failed to encode batch of %d texts: %s", len(batch), e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
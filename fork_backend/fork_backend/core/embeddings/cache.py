@@ -0,0 +1,130 @@
+"""Cache for the embeddings of search queries"""
+
+import re
+from typing import Awaitable, Callable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from fork_backend.core.cache import LRUCache
+from fork_backend.core.db import get_async_db
+from fork_backend.core.logging import get_logger
+from fork_backend.models.query_embedding import QueryEmbedding
+
+log = get_logger()
+
+# Longer queries are still cached in memory, but not persisted.
+MAX_PERSISTED_QUERY_LENGTH = 255
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a search query, so that trivially different queries share one embedding.
+
+    :param text: The raw query.
+    :return: The query, case folded and with collapsed whitespace.
+    """
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class EmbeddingCache:
+    """
+    LRU cache of query embeddings keyed on the normalized query text. Optionally backed by the
+    query_embeddings table, so that the cache survives restarts. The persisted embeddings are
+    keyed on the model and backend as well, so a changed model does not answer with embeddings
+    of the previous one.
+    """
+
+    def __init__(self, max_size: int, persistent: bool = False, model: str = "",
+                 backend: str = "") -> None:
+        """
+        :param max_size: Maximum number of embeddings kept in memory.
+        :param persistent: Whether to also store embeddings in the db.
+        :param model: Name of the model computing the embeddings.
+        :param backend: Backend of the model, with the onnx file if one is set.
+        """
+        self.memory = LRUCache(max_size)
+        self.persistent = persistent
+        self.model = model
+        self.backend = backend
+        self.persistent_hits = 0
+
+    async def get_or_encode(self, text: str, encode: Callable[[str], Awaitable[list]]) -> list:
+        """
+        Get the embedding of a query from the cache or encode it.
+
+        :param text: The query to get the embedding for.
+        :param encode: Coroutine function used to encode the query on a miss.
+        :return: The embedding of the query, or of a query with the same normalized form.
+        """
+        key = normalize_query(text)
+
+        embedding = self.memory.get(key)
+        if embedding is not None:
+            return embedding
+
+        if self.persistent:
+            embedding = await self._load(key)
+            if embedding is not None:
+                self.persistent_hits += 1
+                self.memory.set(key, embedding)
+                return embedding
+
+        # The normalized query is only the key, the model distinguishes cases
+        embedding = await encode(text)
+        self.memory.set(key, embedding)
+
+        if self.persistent:
+            await self._store(key, embedding)
+
+        log.debug("Query embedding cache miss for '%s'. Stats: %s", key, self.stats())
+        return embedding
+
+    def stats(self) -> dict[str, int | float | bool]:
+        """
+        Get the statistics of the cache.
+
+        :return: Dict with the in memory statistics and the number of hits in the db.
+        """
+        return {
+            **self.memory.stats(),
+            "persistent": self.persistent,
+            "persistent_hits": self.persistent_hits,
+        }
+
+    async def _load(self, key: str) -> list | None:
+        """Load a persisted embedding. Returns None if it is not persisted."""
+        if len(key) > MAX_PERSISTED_QUERY_LENGTH:
+            return None
+
+        try:
+            async with get_async_db() as db:
+                result = await db.execute(
+                    select(QueryEmbedding.embedding).where(
+                        QueryEmbedding.model == self.model,
+                        QueryEmbedding.backend == self.backend,
+                        QueryEmbedding.query == key))
+                embedding = result.scalar_one_or_none()
+                return embedding.tolist() if embedding is not None else None
+        except Exception as e:
+            log.error("Failed to load persisted embedding for query '%s': %s", key, e)
+            return None
+
+    async def _store(self, key: str, embedding: list) -> None:
+        """Persist an embedding. Failures are logged, but not raised."""
+        if len(key) > MAX_PERSISTED_QUERY_LENGTH:
+            return
+
+        try:
+            async with get_async_db() as db:
+                await db.execute(
+                    insert(QueryEmbedding)
+                    .values(model=self.model, backend=self.backend, query=key,
+                            embedding=embedding)
+                    .on_conflict_do_nothing(index_elements=[
+                        QueryEmbedding.model, QueryEmbedding.backend, QueryEmbedding.query]))
+                await db.commit()
+        except Exception as e:
+            log.error("Failed to persist embedding for query '%s': %s", key, e)
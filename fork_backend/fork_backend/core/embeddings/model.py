@@ -0,0 +1,177 @@
+"""Lazy loading of the embedding model"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor
+from os import environ
+from typing import Any, Optional
+
+from fork_backend.core.logging import get_logger
+
+log = get_logger()
+
+SUPPORTED_BACKENDS = ("torch", "onnx")
+
+# Wait before retrying a failed background load, doubled after every further failure
+LOAD_RETRY_S = float(environ.get("FORK_EMBEDDING_LOAD_RETRY_S", default="5"))
+LOAD_RETRY_MAX_S = 300.0
+
+
+class BackgroundLoadRetries:
+    """
+    Retries failed background loads of an embedding model with exponential backoff. Classes
+    using it implement is_ready and load_in_background, and call _init_retries in __init__.
+    """
+
+    def _init_retries(self) -> None:
+        self.failed_loads = 0
+        self._retry_at = 0.0
+        self._load_task: Optional[asyncio.Task] = None
+
+    def ensure_loading(self, executor: Optional[Executor] = None) -> Optional[asyncio.Task]:
+        """
+        Start a background load, unless the model is ready, a load is running or the backoff
+        after the last failed load has not passed yet. Call whenever the model is needed but
+        not ready, so a failed load does not disable it until a restart.
+
+        :param executor: The executor to load the model in.
+        :return: The running load, None if the model is ready or the backoff has not passed.
+        """
+        if self._load_task is not None and not self._load_task.done():
+            return self._load_task
+        if self.is_ready or time.monotonic() < self._retry_at:
+            return None
+
+        self._load_task = asyncio.get_running_loop().create_task(
+            self._load_with_backoff(executor))
+        return self._load_task
+
+    def cancel_loading(self) -> None:
+        """Cancel the running background load, e.g. on shutdown"""
+        if self._load_task is not None:
+            self._load_task.cancel()
+
+    async def _load_with_backoff(self, executor: Optional[Executor]) -> None:
+        """Load in the background and schedule the earliest next attempt if it failed"""
+        await self.load_in_background(executor)
+        if self.is_ready:
+            self.failed_loads = 0
+            self._retry_at = 0.0
+            return
+
+        self.failed_loads += 1
+        backoff_s = min(LOAD_RETRY_MAX_S, LOAD_RETRY_S * 2 ** (self.failed_loads - 1))
+        self._retry_at = time.monotonic() + backoff_s
+        log.warning("Embedding model not loaded after %d attempts, retrying in %.0f s at the "
+                    "earliest", self.failed_loads, backoff_s)
+
+    def _retry_status(self) -> dict[str, Any]:
+        """The number of failed loads, whether a load is running and when the next may start"""
+        return {
+            "loading": self._load_task is not None and not self._load_task.done(),
+            "failed_loads": self.failed_loads,
+            "retry_in_s": max(0.0, round(self._retry_at - time.monotonic(), 1)),
+        }
+
+
+class LazyEmbeddingModel(BackgroundLoadRetries):
+    """
+    SentenceTransformer model that is only loaded on first use or by an explicit background
+    load, so importing the application does not block on loading the model.
+    """
+
+    def __init__(self, model_name: str, backend: str = "torch",
+                 onnx_file: Optional[str] = None) -> None:
+        """
+        :param model_name: Name or local path of the SentenceTransformer model to load.
+        :param backend: Inference backend of the model. "torch" or "onnx". The onnx backend
+            requires the optional "sentence-transformers[onnx]" dependencies.
+        :param onnx_file: Path of the onnx file to use, relative to the model directory. E.g. the
+            int8 quantized model created by core.init.export_onnx_model.
+        """
+        if backend not in SUPPORTED_BACKENDS:
+            raise ValueError(f"Unsupported embedding backend '{backend}'. "
+                             f"Supported: {', '.join(SUPPORTED_BACKENDS)}")
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.error: Optional[Exception] = None
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self._init_retries()
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the model has been loaded and can encode without blocking on the load."""
+        return self._model is not None
+
+    def get(self) -> Any:
+        """
+        Get the model, loading it if necessary. Blocks until the model is loaded.
+
+        :return: The SentenceTransformer model.
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    def _load(self) -> Any:
+        """Load the model. Imported here, as importing sentence_transformers alone takes seconds"""
+        # pylint: disable=import-outside-toplevel
+        from sentence_transformers import SentenceTransformer
+
+        kwargs: dict[str, Any] = {"backend": self.backend}
+        if self.backend == "onnx" and self.onnx_file:
+            kwargs["model_kwargs"] = {"file_name": self.onnx_file}
+
+        log.info("Loading embedding model '%s' with %s backend...", self.model_name, self.backend)
+        try:
+            model = SentenceTransformer(self.model_name, **kwargs)
+        except Exception as e:
+            self.error = e
+            log.error("Failed to load embedding model '%s': %s", self.model_name, e)
+            raise
+        self.error = None
+        log.info("Embedding model '%s' loaded", self.model_name)
+        return model
+
+    async def load_in_background(self, executor: Executor) -> None:
+        """
+        Load the model in an executor without blocking the event loop. Errors are logged, the
+        model is loaded again by the next encode or ensure_loading.
+
+        :param executor: The executor to load the model in.
+        """
+        try:
+            await asyncio.get_running_loop().run_in_executor(executor, self.get)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # already logged in _load
+            pass
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        """
+        Encode texts, loading the model if necessary. Blocking.
+
+        :param texts: The texts to encode.
+        :return: One embedding per text.
+        """
+        return self.get().encode(texts).tolist()
+
+    def status(self) -> dict[str, Any]:
+        """
+        Get the loading status of the model.
+
+        :return: Dict with the model name, backend, if it is ready, the last loading error and
+            the state of the retries.
+        """
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "onnx_file": self.onnx_file,
+            "ready": self.is_ready,
+            "error": str(self.error) if self.error else None,
+            **self._retry_status(),
+        }
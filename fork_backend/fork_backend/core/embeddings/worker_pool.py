@@ -0,0 +1,175 @@
+"""Embedding model running in dedicated worker processes"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional
+
+from fork_backend.core.embeddings.model import BackgroundLoadRetries, LazyEmbeddingModel
+from fork_backend.core.logging import get_logger
+
+log = get_logger()
+
+# The model of the current worker process. Set by _init_worker.
+_WORKER_STATE: dict[str, LazyEmbeddingModel] = {}
+
+
+def _init_worker(model_name: str, backend: str, onnx_file: Optional[str],
+                 threads_per_worker: int) -> None:
+    """
+    Load one copy of the model in the worker process. Must not raise, an exception in the
+    initializer breaks the entire pool.
+    """
+    model = LazyEmbeddingModel(model_name, backend=backend, onnx_file=onnx_file)
+    _WORKER_STATE["model"] = model
+
+    try:
+        if threads_per_worker > 0 and backend == "torch":
+            # pylint: disable=import-outside-toplevel
+            import torch
+            torch.set_num_threads(threads_per_worker)
+
+        model.get()
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        # retried on first encode
+        log.error("Failed to initialize embedding worker: %s", e)
+
+
+def encode_in_worker(texts: list[str]) -> list[list[float]]:
+    """
+    Encode texts with the model of the current worker process. Must be run in the executor of
+    a ProcessEmbeddingModel.
+
+    :param texts: The texts to encode.
+    :return: One embedding per text.
+    """
+    return _WORKER_STATE["model"].encode(texts)
+
+
+class RestartableProcessPool(Executor):
+    """
+    ProcessPoolExecutor that can be replaced by a new one once it is broken, e.g. by a crashed
+    worker, while the references to it stay valid.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        """
+        :param kwargs: Arguments of the ProcessPoolExecutor.
+        """
+        self._kwargs = kwargs
+        self._pool = ProcessPoolExecutor(**kwargs)
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def restart(self) -> None:
+        """Replace the pool by a new one with new worker processes"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = ProcessPoolExecutor(**self._kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class ProcessEmbeddingModel(BackgroundLoadRetries):
+    """
+    Runs the embedding model in a pool of dedicated worker processes, each holding one copy of
+    the model, so encoding does not compete with the event loop for the GIL.
+
+    Offers the same interface as LazyEmbeddingModel. encode must be run in self.executor.
+    """
+
+    encode = staticmethod(encode_in_worker)
+
+    def __init__(self, model_name: str, backend: str = "torch", onnx_file: Optional[str] = None,
+                 n_workers: int = 2, threads_per_worker: int = 1) -> None:
+        """
+        :param model_name: Name or local path of the SentenceTransformer model to load.
+        :param backend: Inference backend of the model. "torch" or "onnx".
+        :param onnx_file: Path of the onnx file to use, relative to the model directory.
+        :param n_workers: Number of worker processes.
+        :param threads_per_worker: Number of torch threads per worker. 0 to use the torch
+            default, which oversubscribes the CPU with more than one worker.
+        """
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.n_workers = max(1, n_workers)
+        self.error: Optional[Exception] = None
+        self._ready = False
+        self._init_retries()
+
+        self.executor = RestartableProcessPool(
+            max_workers=self.n_workers,
+            # fork would copy the state of the running event loop and db connections
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, backend, onnx_file, threads_per_worker),
+        )
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the workers have been started and loaded the model."""
+        return self._ready
+
+    async def load_in_background(self, executor: Optional[Executor] = None) -> None:
+        """
+        Start the worker processes and wait for them to load the model. A failed warmup is
+        logged and kept in self.error, ensure_loading runs it again with backoff. Workers that
+        failed to load the model in their initializer load it again on the warmup, a broken
+        pool is replaced by new workers.
+
+        :param executor: Ignored, the workers always run in self.executor.
+        """
+        del executor
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*[
+                loop.run_in_executor(self.executor, encode_in_worker, ["warmup"])
+                for _ in range(self.n_workers)
+            ])
+            self.error = None
+            self._ready = True
+            log.info("%d embedding worker processes ready", self.n_workers)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.error = e
+            log.error("Failed to start embedding worker processes: %s", e)
+            if isinstance(e, BrokenProcessPool):
+                # A broken pool fails every further call, the next attempt needs new workers
+                self.executor.restart()
+
+    def handle_broken_pool(self, error: BrokenProcessPool) -> None:
+        """
+        Recover from a broken pool on the encode path, e.g. after a worker crashed once the
+        workers were ready. A broken pool fails every further call: the model is marked as not
+        ready, so searches use the lexical search, and the pool is replaced by new workers that
+        load the model in the background. Encodes that failed on the same broken pool only
+        recover it once.
+
+        :param error: The error of the failed encode.
+        """
+        if not self._ready:
+            return
+        self._ready = False
+        self.error = error
+        log.error("Embedding worker pool broken, restarting the workers: %s", error)
+        self.executor.restart()
+        self.ensure_loading()
+
+    def status(self) -> dict[str, Any]:
+        """
+        Get the loading status of the workers.
+
+        :return: Dict with the model name, backend, number of workers, if they are ready, the
+            last loading error and the state of the retries.
+        """
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "onnx_file": self.onnx_file,
+            "workers": self.n_workers,
+            "ready": self.is_ready,
+            "error": f"{type(self.error).__name__}: {self.error}" if self.error else None,
+            **self._retry_status(),
+        }
@@ -0,0 +1,34 @@
+"""Script to rebuild the daily nutrition rollups from the food entries.
+
+The rollups are filled by their migration and maintained on every change afterwards. Only needed
+if entries were changed without the services, e.g. by hand in the db.
+
+Usage:
+    python -m fork_backend.core.init.backfill_daily_nutrition [--user-id <id>]
+"""
+
+import argparse
+import asyncio
+
+from fork_backend.services.daily_nutrition_service import DailyNutritionService
+# imported to register the mappers of all relationships
+from fork_backend.models.user import User  # pylint: disable=unused-import
+from fork_backend.models.goals import Goals  # pylint: disable=unused-import
+from fork_backend.models.activities import Activities  # pylint: disable=unused-import
+from fork_backend.models.activity_log import ActivityLog  # pylint: disable=unused-import
+from fork_backend.models.activity_entry import ActivityEntry  # pylint: disable=unused-import
+
+
+def main():
+    """Parse args and rebuild the rollups"""
+    parser = argparse.ArgumentParser(description="Rebuild the daily nutrition rollups")
+    parser.add_argument("--user-id", default=None,
+                        help="Only rebuild the rollups of this user, all users if omitted")
+    args = parser.parse_args()
+
+    n_rows = asyncio.run(DailyNutritionService().backfill(user_id=args.user_id))
+    print(f"Wrote {n_rows} daily nutrition rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,14 @@
 
 import csv
 import json
-import asyncio
+from uuid import uuid4
 
+from sqlalchemy import insert, update
+
+from fork_backend.core.constants import ADMIN_USER_ID
 from fork_backend.models.system import System
 from fork_backend.models.food_item import FoodItem
-from fork_backend.core.db import get_sync_db
+from fork_backend.core.db import get_sync_db, get_async_db
 from fork_backend.services.food_service import FoodService
 
 TYPES_TO_KEEP = ["everyday"]
@@ -86,62 +89,130 @@ def parse_alternate_names(alternate_names_str: str) -> str | None:
         return None
 
 
-async def import_tsv(tsv_file: str, batch_size: int = 100):
-    """Import TSV into existing FoodItem model"""
+def parse_food_row(row: dict[str, str]) -> dict | None:
+    """
+    Parse a row of the TSV into the column values of a FoodItem.
 
-    service = FoodService()
-    imported_count = 0
-    skipped_count = 0
+    :param row: The row as read by csv.DictReader.
+    :return: The column values, or None if the row should not be imported.
+    """
+    food_type = row.get('type', 'na')
+    if food_type not in TYPES_TO_KEEP:
+        return None
+    nutrition = parse_nutrition_100g(row.get('nutrition_100g', ''))
 
-    with open(tsv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter='\t')
+    serving_size, serving_unit = parse_serving_size(row.get('serving', ''))
 
-        for i, row in enumerate(reader):
-            try:
-                food_type = row.get('type', 'na')
-                if food_type not in TYPES_TO_KEEP:
-                    continue
-                nutrition = parse_nutrition_100g(row.get('nutrition_100g', ''))
+    #alternate_names = parse_alternate_names(row.get('alternate_names', ''))
 
-                serving_size, serving_unit = parse_serving_size(row.get('serving', ''))
+    description = ""
+    if row.get('description'):
+        description = row['description']
 
-                #alternate_names = parse_alternate_names(row.get('alternate_names', ''))
+    return {
+        'id': str(uuid4()),
+        'user_id': ADMIN_USER_ID,
+        'private': False,
+        'hidden': False,
+        'name': row['name'],
+        'brand': 'OpenNutrition Foods',
+        'description': description,
 
-                description = ""
-                if row.get('description'):
-                    description = row['description']
+        # Serving information
+        'serving_size': serving_size,
+        'serving_unit': "Serving",
 
-                food_data = {
-                    'user_id': "admin",
-                    'private': False,
-                    'name': row['name'],
-                    'brand': 'OpenNutrition Foods',
-                    'description': description,
+        # Nutrition per 100g
+        **nutrition
+    }
 
-                    # Serving information
-                    'serving_size': serving_size,
-                    'serving_unit': "Serving",
 
-                    # Nutrition per 100g
-                    **nutrition
-                }
+async def insert_chunk(food_data: list[dict], checkpoint: int) -> int:
+    """
+    Encode the names of a chunk of food items in one batch and insert them with a single
+    multi-row INSERT. The import checkpoint is advanced in the same transaction, so an
+    interrupted import resumes after the last inserted chunk.
 
-                food_item = FoodItem(**food_data)
-                await service.add_food_item(food_item)
-                imported_count += 1
+    If the chunk can not be inserted as a whole, the items are inserted one by one and the
+    failing ones skipped, still in a single transaction with the checkpoint.
 
-                # Yield control back to the event loop periodically
-                if imported_count % 100 == 0:
-                    await asyncio.sleep(0)
+    :param food_data: Column values of the food items to insert.
+    :param checkpoint: Number of TSV rows processed after this chunk.
+    :return: Number of skipped items.
+    """
+    embeddings = await FoodService.encode_batch_async([item['name'] for item in food_data])
+    for item, embedding in zip(food_data, embeddings):
+        item['embedding'] = embedding
 
-                if imported_count % batch_size == 0:
-                    print(f"Imported {imported_count} items... (skipped {skipped_count})")
+    update_checkpoint = update(System).values(open_nutrition_data_import_checkpoint=checkpoint)
 
+    try:
+        async with get_async_db() as db:
+            await db.execute(insert(FoodItem), food_data)
+            await db.execute(update_checkpoint)
+            await db.commit()
+        return 0
+    except Exception as e:
+        print(f"Failed to insert chunk ending at row {checkpoint}, retrying row by row - {str(e)}")
+
+    # One transaction with a savepoint per item, so the inserted items and the checkpoint are
+    # committed together and an interrupted retry does not insert items twice on resume
+    skipped_count = 0
+    async with get_async_db() as db:
+        for item in food_data:
+            try:
+                async with db.begin_nested():
+                    await db.execute(insert(FoodItem), [item])
+            except Exception as e:
+                print(f"Error importing: {item.get('name', 'unknown')} - {str(e)}")
+                skipped_count += 1
+        await db.execute(update_checkpoint)
+        await db.commit()
+    return skipped_count
+
+
+async def import_tsv(tsv_file: str, batch_size: int = 100, start_row: int = 0):
+    """
+    Import TSV into existing FoodItem model. The file is streamed in chunks of batch_size
+    items, each chunk is encoded and inserted at once.
+
+    :param tsv_file: Path to the openNutrition TSV.
+    :param batch_size: Number of food items per chunk.
+    :param start_row: Number of TSV rows to skip, i.e. the checkpoint of a previous import.
+    """
+
+    imported_count = 0
+    skipped_count = 0
+    chunk: list[dict] = []
+
+    with open(tsv_file, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f, delimiter='\t')
+
+        for i, row in enumerate(reader):
+            if i < start_row:
+                continue
+
+            try:
+                food_data = parse_food_row(row)
+                if food_data:
+                    chunk.append(food_data)
             except Exception as e:
                 print(f"Error importing row {i}: {row.get('name', 'unknown')} - {str(e)}")
                 skipped_count += 1
                 continue
 
+            if len(chunk) >= batch_size:
+                chunk_skipped = await insert_chunk(chunk, checkpoint=i + 1)
+                imported_count += len(chunk) - chunk_skipped
+                skipped_count += chunk_skipped
+                chunk = []
+                print(f"Imported {imported_count} items... (skipped {skipped_count})")
+
+        if chunk:
+            chunk_skipped = await insert_chunk(chunk, checkpoint=i + 1)
+            imported_count += len(chunk) - chunk_skipped
+            skipped_count += chunk_skipped
+
     print(f"\n{'='*60}")
     print("Import complete!")
     print(f"Successfully imported: {imported_count}")
@@ -157,12 +228,16 @@ async def import_food():
             print("Import of openNutrition data already done. Skipping")
             return
 
-        print("Starting import of openNutrition data")
+        start_row = system.open_nutrition_data_import_checkpoint
+        if system.open_nutrition_data_import_started and start_row > 0:
+            print(f"Resuming import of openNutrition data after row {start_row}")
+        else:
+            print("Starting import of openNutrition data")
         system.open_nutrition_data_import_started = True
         session.commit()
-    
-    await import_tsv('data/opennutrition_foods.tsv', batch_size=1000)
-    
+
+    await import_tsv('data/opennutrition_foods.tsv', batch_size=1000, start_row=start_row)
+
     with get_sync_db() as session:
         system = session.query(System).first()
         system.open_nutrition_data_import_finished = True
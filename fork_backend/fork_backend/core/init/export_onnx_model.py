@@ -0,0 +1,62 @@
+"""Script to export the embedding model to an int8 quantized onnx model.
+
+Requires the optional onnx dependencies: pip install "sentence-transformers[onnx]"
+
+Usage:
+    python -m fork_backend.core.init.export_onnx_model --output data/models/multilingual-e5-small
+
+Then start the backend with:
+    FORK_EMBEDDING_BACKEND=onnx
+    FORK_EMBEDDING_MODEL=data/models/multilingual-e5-small
+    FORK_EMBEDDING_ONNX_FILE=onnx/model_qint8_avx2.onnx
+"""
+
+import argparse
+
+QUANTIZATION_CONFIGS = ["arm64", "avx2", "avx512", "avx512_vnni"]
+
+
+def export_quantized_onnx_model(model_name: str, output_dir: str,
+                                quantization_config: str = "avx2") -> str:
+    """
+    Export a SentenceTransformer model to onnx and quantize it dynamically to int8.
+
+    :param model_name: Name or path of the SentenceTransformer model.
+    :param output_dir: Directory to save the exported model to.
+    :param quantization_config: Target instruction set of the quantization. Pick the one
+        supported by the CPU of the host, avx2 works on any recent x86 CPU.
+    :return: Path of the quantized onnx file relative to output_dir.
+    """
+    # pylint: disable=import-outside-toplevel
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    # Exports the model to onnx if the model repository does not contain an onnx file already
+    model = SentenceTransformer(model_name, backend="onnx")
+    model.save_pretrained(output_dir)
+
+    export_dynamic_quantized_onnx_model(
+        model,
+        quantization_config=quantization_config,
+        model_name_or_path=output_dir,
+    )
+    return f"onnx/model_qint8_{quantization_config}.onnx"
+
+
+def main():
+    """Parse args and export the model"""
+    parser = argparse.ArgumentParser(description="Export an int8 quantized onnx embedding model")
+    parser.add_argument("--model", default="intfloat/multilingual-e5-small",
+                        help="Name or path of the SentenceTransformer model")
+    parser.add_argument("--output", required=True, help="Directory to save the model to")
+    parser.add_argument("--quantization", default="avx2", choices=QUANTIZATION_CONFIGS,
+                        help="Target instruction set of the quantization")
+    args = parser.parse_args()
+
+    onnx_file = export_quantized_onnx_model(args.model, args.output, args.quantization)
+    print(f"Exported quantized model to '{args.output}'")
+    print(f"Use FORK_EMBEDDING_BACKEND=onnx FORK_EMBEDDING_MODEL={args.output} "
+          f"FORK_EMBEDDING_ONNX_FILE={onnx_file}")
+
+
+if __name__ == "__main__":
+    main()
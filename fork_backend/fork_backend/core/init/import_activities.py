@@ -1,78 +1,124 @@
 """Script to import exercise activities from CSV file"""
 
 import csv
-import asyncio
+import hashlib
 
+from sqlalchemy import select, insert, update
+
+from fork_backend.core.constants import ADMIN_USER_ID
 from fork_backend.models.system import System
 from fork_backend.models.activities import Activities
-from fork_backend.core.db import get_sync_db
-from fork_backend.services.activity_service import ActivityService
-
-async def import_activities_from_csv(csv_file: str, batch_size: int = 100):
-    """Import activities from CSV file into the database"""
-    
-    service = ActivityService()
-    imported_count = 0
+from fork_backend.core.db import get_sync_db, get_async_db
+
+
+def compute_file_hash(file_path: str) -> str:
+    """
+    Compute the sha256 of a file.
+
+    :param file_path: Path to the file.
+    :return: The hex digest of the file content.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def parse_activities_csv(csv_file: str) -> tuple[dict[str, float], int]:
+    """
+    Parse the exercise dataset.
+
+    :param csv_file: Path to the CSV file.
+    :return: Calories burned per kg and hour by metric activity name, and the number of
+        skipped rows.
+    """
+    activities: dict[str, float] = {}
     skipped_count = 0
-    
+
     with open(csv_file, 'r', encoding='utf-8') as f:
         reader = csv.reader(f)
-        header = next(reader)
-        
+        next(reader)
+
         for i, row in enumerate(reader):
             try:
-                activity_name_imperial = row[0]
                 activity_name_metric = row[6]
                 # The "Calories per kg" has seemingly gone through multiple round of unintelligible
                 # conversions. To get the actual value we need to convert from kg to pound twice.
                 calories_per_kg = float(row[5]) * 2.20462 * 2.20462
-                
-                # Create activity object with admin user
-                activity_data = {
-                    'user_id': "admin",
-                    'name': activity_name_metric,
-                    'calories_burned_kg_h': calories_per_kg
-                }
-                
-                activity = Activities(**activity_data)
-                await service.add_activity(activity)
-                imported_count += 1
-                
-                # Yield control back to the event loop periodically
-                if imported_count % 100 == 0:
-                    await asyncio.sleep(0)
-                
-                if imported_count % batch_size == 0:
-                    print(f"Imported {imported_count} activities... (skipped {skipped_count})")
-                    
+
+                activities[activity_name_metric] = calories_per_kg
+
             except Exception as e:
                 print(f"Error importing row {i}: {row[0] if row else 'unknown'} - {str(e)}")
                 skipped_count += 1
                 continue
-    
+
+    return activities, skipped_count
+
+
+async def import_activities_from_csv(csv_file: str, content_hash: str):
+    """
+    Import activities from CSV file into the database in a single transaction.
+
+    Activities are matched to the already imported ones by name, so the import can be rerun
+    without creating duplicates. New activities are inserted with one executemany, changed ones
+    updated with another. The import is marked as finished together with the content hash in the
+    same transaction.
+
+    :param csv_file: Path to the CSV file.
+    :param content_hash: sha256 of the CSV file.
+    """
+    activities, skipped_count = parse_activities_csv(csv_file)
+
+    async with get_async_db() as db:
+        result = await db.execute(
+            select(Activities.id, Activities.name, Activities.calories_burned_kg_h)
+            .where(Activities.user_id == ADMIN_USER_ID))
+        existing = {row.name: row for row in result.all()}
+
+        new_activities = [
+            {'user_id': ADMIN_USER_ID, 'name': name, 'calories_burned_kg_h': calories_per_kg}
+            for name, calories_per_kg in activities.items() if name not in existing
+        ]
+        changed_activities = [
+            {'id': existing[name].id, 'calories_burned_kg_h': calories_per_kg}
+            for name, calories_per_kg in activities.items()
+            if name in existing and existing[name].calories_burned_kg_h != calories_per_kg
+        ]
+
+        if new_activities:
+            await db.execute(insert(Activities), new_activities)
+        if changed_activities:
+            await db.execute(update(Activities), changed_activities)
+
+        await db.execute(update(System).values(
+            exercise_import_finished=True,
+            exercise_import_hash=content_hash))
+        await db.commit()
+
     print(f"\n{'='*60}")
     print("Import complete!")
-    print(f"Successfully imported: {imported_count}")
+    print(f"Successfully imported: {len(new_activities)}")
+    print(f"Updated: {len(changed_activities)}")
     print(f"Skipped (errors): {skipped_count}")
     print(f"{'='*60}")
 
 
 async def import_exercise_activities():
     """Import exercise activities in an async context"""
+    csv_file = 'data/exercise_dataset_metric.csv'
+    content_hash = compute_file_hash(csv_file)
+
     with get_sync_db() as session:
         system = session.query(System).first()
-        if system.exercise_import_finished:
+        if system.exercise_import_finished and system.exercise_import_hash == content_hash:
             print("Import of exercise activities already done. Skipping")
             return
-        
+
         print("Starting import of exercise activities")
         system.exercise_import_started = True
         session.commit()
-    
-    await import_activities_from_csv('data/exercise_dataset_metric.csv', batch_size=1000)
-    
-    with get_sync_db() as session:
-        system = session.query(System).first()
-        system.exercise_import_finished = True
-        session.commit()
-        print("Import finished")
+
+    await import_activities_from_csv(csv_file, content_hash)
+    print("Import finished")
@@ -0,0 +1,128 @@
+"""In-process metrics"""
+
+import threading
+import time
+from typing import Any, Sequence
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds in ms of the buckets of latency histograms
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Histogram with fixed buckets, counting every observation in the first bucket it fits."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> None:
+        """
+        :param buckets: Ascending upper bounds of the buckets. Larger values are counted in an
+            additional overflow bucket.
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Record one observation.
+
+        :param value: The observed value, in the unit of the buckets.
+        """
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound),
+                     len(self.buckets))
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Get the current state of the histogram.
+
+        :return: Dict with the number, sum, mean and max of the observations and the cumulative
+            count per bucket upper bound.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count, maximum = self._sum, sum(counts), self._max
+
+        cumulative: dict[str, int] = {}
+        running = 0
+        for bound, bucket_count in zip([*map(str, self.buckets), "inf"], counts):
+            running += bucket_count
+            cumulative[bound] = running
+
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "max": maximum,
+            "buckets": cumulative,
+        }
+
+
+class PoolMetrics:
+    """Checkout metrics of a connection pool."""
+
+    def __init__(self) -> None:
+        # Time to check out a connection, including waits, new connections and pre pings
+        self.checkout_ms = Histogram()
+        # Time of the checkouts that had to wait for a connection to be returned
+        self.wait_ms = Histogram()
+        self.timeouts = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        :return: Dict with the checkout and wait histograms and the number of timeouts.
+        """
+        return {
+            "checkout_ms": self.checkout_ms.snapshot(),
+            "wait_ms": self.wait_ms.snapshot(),
+            "timeouts": self.timeouts,
+        }
+
+
+# Metrics by pool logging name. Kept outside the pools, which are replaced by engine.dispose()
+_POOL_METRICS: dict[str, PoolMetrics] = {}
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    """
+    Get the metrics of a pool, creating them on first use.
+
+    :param name: The pool_logging_name of the engine.
+    """
+    return _POOL_METRICS.setdefault(name, PoolMetrics())
+
+
+class _MeteredPoolMixin:
+    """Times every connection checkout of a QueuePool."""
+
+    def connect(self):
+        """Check out a connection, recording the time it took."""
+        metrics = get_pool_metrics(self._orig_logging_name or "default")
+        # No idle connection and no overflow left, the checkout waits for a returned connection
+        waits = self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            metrics.checkout_ms.observe(elapsed_ms)
+            if waits:
+                metrics.wait_ms.observe(elapsed_ms)
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    """QueuePool of the sync engine with checkout metrics."""
+
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool of the async engine with checkout metrics."""
@@ -0,0 +1,30 @@
+"""Cursors of keyset paginated endpoints"""
+
+import base64
+from datetime import date
+
+
+def encode_cursor(log_date: date, row_id: str) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor.
+
+    :param log_date: The date of the last row.
+    :param row_id: The id of the last row, breaks ties between rows of the same date.
+    :return: Url safe cursor to get the next page with.
+    """
+    return base64.urlsafe_b64encode(f"{log_date.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[date, str]:
+    """
+    Decode a cursor created by encode_cursor.
+
+    :param cursor: The cursor.
+    :return: Date and id of the last row of the previous page.
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        log_date, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return date.fromisoformat(log_date), row_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
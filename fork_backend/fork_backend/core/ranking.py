@@ -0,0 +1,44 @@
+"""Ranking of search results"""
+
+from os import environ
+from typing import Hashable, Sequence, TypeVar
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T", bound=Hashable)
+
+# Minimum trigram word similarity of the "<%" operator for a lexical match
+TRGM_WORD_SIMILARITY_THRESHOLD = float(
+    environ.get("FORK_TRGM_WORD_SIMILARITY_THRESHOLD", default="0.5"))
+
+
+async def set_word_similarity_threshold(db: AsyncSession,
+                                        threshold: float = TRGM_WORD_SIMILARITY_THRESHOLD) -> None:
+    """
+    Set the threshold of the pg_trgm word similarity operator "<%" for the current transaction.
+
+    :param db: The session whose transaction to configure.
+    :param threshold: Minimum word similarity between 0 and 1.
+    """
+    await db.execute(select(func.set_config(
+        "pg_trgm.word_similarity_threshold", str(threshold), True)))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[T]], k: int = 60) -> list[T]:
+    """
+    Merge rankings with reciprocal rank fusion. Every item scores 1 / (k + rank) per ranking it
+    appears in, so items ranked high by several rankings win over items only one ranking likes.
+    Does not need the scores of the rankings, which are not comparable between e.g. trigram
+    similarity and cosine similarity.
+
+    :param rankings: Rankings of items, best first.
+    :param k: Dampens the influence of the top ranks. 60 is the value of the original paper.
+    :return: All items of the rankings, best first. Ties keep the order of first appearance.
+    """
+    scores: dict[T, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+
+    return sorted(scores, key=lambda item: scores[item], reverse=True)
@@ -0,0 +1,147 @@
+"""Async OpenFoodFacts API client for barcode and text search"""
+
+import asyncio
+from os import environ
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+import httpx
+
+from fork_backend.core.constants import OPENFOODFACTS_USER_AGENT
+from fork_backend.core.logging import get_logger
+
+log = get_logger()
+
+# Point to a local stub server for development and tests
+OPENFOODFACTS_URL = environ.get("FORK_OPENFOODFACTS_URL",
+                                default="https://world.openfoodfacts.org")
+OPENFOODFACTS_TIMEOUT_S = float(environ.get("FORK_OPENFOODFACTS_TIMEOUT_S", default="10"))
+# The text search of OpenFoodFacts is a lot slower than the product lookup
+OPENFOODFACTS_SEARCH_TIMEOUT_S = float(
+    environ.get("FORK_OPENFOODFACTS_SEARCH_TIMEOUT_S", default="30"))
+# OpenFoodFacts rate limits per IP, more requests in flight only get rejected
+OPENFOODFACTS_MAX_CONCURRENCY = int(
+    environ.get("FORK_OPENFOODFACTS_MAX_CONCURRENCY", default="4"))
+
+
+class OpenFoodFactsAPIClient:
+    """
+    Client for the OpenFoodFacts API. Keeps its connections alive between requests and caps
+    the number of requests in flight, further requests wait for a free slot.
+    """
+
+    def __init__(self, base_url: str = OPENFOODFACTS_URL,
+                 timeout_s: float = OPENFOODFACTS_TIMEOUT_S,
+                 search_timeout_s: float = OPENFOODFACTS_SEARCH_TIMEOUT_S,
+                 max_concurrency: int = OPENFOODFACTS_MAX_CONCURRENCY,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize the OpenFoodFacts API client.
+
+        :param base_url: Base URL of the OpenFoodFacts instance.
+        :param timeout_s: Default timeout of product lookups in seconds.
+        :param search_timeout_s: Default timeout of text searches in seconds.
+        :param max_concurrency: Maximum number of requests in flight.
+        :param transport: Transport of the http client, e.g. a httpx.MockTransport in tests.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout_s = timeout_s
+        self.search_timeout_s = search_timeout_s
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"User-Agent": OPENFOODFACTS_USER_AGENT},
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=max_concurrency,
+                                max_keepalive_connections=max_concurrency),
+            transport=transport,
+        )
+
+    async def _get(self, url: str, params: Optional[Dict[str, Any]], timeout_s: float
+                   ) -> httpx.Response:
+        """Send a GET request once a slot is free"""
+        async with self._semaphore:
+            return await self.client.get(url, params=params, timeout=timeout_s)
+
+    async def get_product(self, code: str, timeout_s: Optional[float] = None
+                          ) -> Optional[Dict[str, Any]]:
+        """
+        Get a product by its barcode.
+
+        :param code: Barcode of the product.
+        :param timeout_s: Timeout of this request in seconds, defaults to the client timeout.
+        :return: The product, None if there is no product with this barcode.
+        """
+        if not code:
+            raise ValueError("code must be a non-empty string")
+
+        try:
+            response = await self._get(f"/api/v2/product/{quote(code, safe='')}", params=None,
+                                       timeout_s=timeout_s or self.timeout_s)
+            if response.status_code == httpx.codes.NOT_FOUND:
+                return None
+            response.raise_for_status()
+            data = response.json()
+
+            # status 0: unknown or invalid barcode
+            if not data or data.get("status") == 0:
+                return None
+            return data.get("product")
+
+        except httpx.HTTPStatusError as e:
+            log.error("HTTP error occurred while getting product '%s': %s", code, str(e))
+            raise
+        except httpx.RequestError as e:
+            log.error("Request error occurred while getting product '%s': %s", code, str(e))
+            raise
+
+    async def text_search(self, query: str, page: int = 1, page_size: int = 20,
+                          timeout_s: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Search products by text.
+
+        :param query: Search query string.
+        :param page: Page of the results, starting at 1.
+        :param page_size: Number of products per page.
+        :param timeout_s: Timeout of this request in seconds, defaults to the search timeout.
+        :return: The search response, with the found products in "products".
+        """
+        try:
+            response = await self._get(
+                "/cgi/search.pl",
+                params={"search_terms": query, "page": page, "page_size": page_size,
+                        "json": "1"},
+                timeout_s=timeout_s or self.search_timeout_s)
+            response.raise_for_status()
+            return response.json() or {}
+
+        except httpx.HTTPStatusError as e:
+            log.error("HTTP error occurred while searching products: %s", str(e))
+            raise
+        except httpx.RequestError as e:
+            log.error("Request error occurred while searching products: %s", str(e))
+            raise
+
+    async def close(self):
+        """Close the HTTP client connections"""
+        await self.client.aclose()
+
+
+# Shared by all requests, so connections are reused. Created on first use, closed on shutdown.
+_OPEN_FOOD_FACTS_CLIENT: Optional[OpenFoodFactsAPIClient] = None
+
+
+def get_open_food_facts_client() -> OpenFoodFactsAPIClient:
+    """Get the OpenFoodFacts client of this process, creating it on first use."""
+    global _OPEN_FOOD_FACTS_CLIENT  # pylint: disable=global-statement
+    if _OPEN_FOOD_FACTS_CLIENT is None:
+        _OPEN_FOOD_FACTS_CLIENT = OpenFoodFactsAPIClient()
+    return _OPEN_FOOD_FACTS_CLIENT
+
+
+async def close_open_food_facts_client() -> None:
+    """Close the OpenFoodFacts client of this process, if it was created."""
+    global _OPEN_FOOD_FACTS_CLIENT  # pylint: disable=global-statement
+    if _OPEN_FOOD_FACTS_CLIENT is not None:
+        await _OPEN_FOOD_FACTS_CLIENT.close()
+        _OPEN_FOOD_FACTS_CLIENT = None
@@ -1,5 +1,6 @@
 """Tandoor API client for food and recipe search functionality"""
 
+import asyncio
 import os
 from typing import List, Dict, Any, Optional
 import httpx
@@ -7,16 +8,26 @@ from fork_backend.core.logging import get_logger
 
 log = get_logger()
 
+# Requests to Tandoor in flight at the same time, e.g. the recipe details of a search
+TANDOOR_MAX_CONCURRENCY = int(os.getenv("FORK_TANDOOR_MAX_CONCURRENCY", default="8"))
 
-class TandoorAPIClient:
-    """Client for interacting with the Tandoor API"""
 
-    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None):
+class TandoorAPIClient:
+    """
+    Client for interacting with the Tandoor API. Keeps its connections alive between requests
+    and caps the number of requests in flight, further requests wait for a free slot.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 max_concurrency: int = TANDOOR_MAX_CONCURRENCY,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
         """
         Initialize the Tandoor API client.
 
         :param base_url: Base URL for the Tandoor API (e.g., https://tandoor.example.com)
         :param api_key: API key for authentication
+        :param max_concurrency: Maximum number of requests in flight
+        :param transport: Transport of the http client, e.g. a httpx.MockTransport in tests
         """
         self.base_url = base_url or os.getenv("TANDOOR_API_URL")
         self.api_key = api_key or os.getenv("TANDOOR_API_KEY")
@@ -33,8 +44,17 @@ class TandoorAPIClient:
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json"
             },
-            timeout=30.0
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=max_concurrency,
+                                max_keepalive_connections=max_concurrency),
+            transport=transport,
         )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """Send a GET request once a slot is free"""
+        async with self._semaphore:
+            return await self.client.get(url, params=params)
 
     async def search_recipes(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
@@ -45,7 +65,7 @@ class TandoorAPIClient:
         :return: List of recipes matching the query
         """
         try:
-            response = await self.client.get(
+            response = await self._get(
                 "/api/recipe/",
                 params={
                     "query": query,
@@ -75,6 +95,33 @@ class TandoorAPIClient:
                 "Unexpected error occurred while searching recipes: %s", str(e))
             raise
 
+    async def list_recipes(self, page: int = 1, page_size: int = 100) -> Dict[str, Any]:
+        """
+        List a page of all recipes in Tandoor.
+
+        :param page: Page to get, starting at 1
+        :param page_size: Number of recipes per page
+        :return: Paginated response, with the recipes in "results" and the url of the next page
+            in "next", which is None on the last page
+        """
+        try:
+            response = await self._get(
+                "/api/recipe/",
+                params={
+                    "page": page,
+                    "page_size": page_size
+                }
+            )
+            response.raise_for_status()
+            return response.json()
+
+        except httpx.HTTPStatusError as e:
+            log.error("HTTP error occurred while listing recipes: %s", str(e))
+            raise
+        except httpx.RequestError as e:
+            log.error("Request error occurred while listing recipes: %s", str(e))
+            raise
+
     async def get_recipe_details(self, recipie_id: int) -> Dict[str, Any]:
         """
         Search for recipes in Tandoor.
@@ -83,7 +130,7 @@ class TandoorAPIClient:
         :return: Dict with detailed info about the recipie
         """
         try:
-            response = await self.client.get(
+            response = await self._get(
                 f"/api/recipe/{recipie_id}/")
             response.raise_for_status()
             data = response.json()
@@ -104,3 +151,27 @@ class TandoorAPIClient:
     async def close(self):
         """Close the HTTP client connection"""
         await self.client.aclose()
+
+
+# Shared by all requests, so connections are reused. Created on first use, closed on shutdown.
+_TANDOOR_CLIENT: Optional[TandoorAPIClient] = None
+
+
+def get_tandoor_client() -> TandoorAPIClient:
+    """
+    Get the Tandoor client of this process, creating it on first use.
+
+    :raises ValueError: If TANDOOR_API_URL or TANDOOR_API_KEY is not set.
+    """
+    global _TANDOOR_CLIENT  # pylint: disable=global-statement
+    if _TANDOOR_CLIENT is None:
+        _TANDOOR_CLIENT = TandoorAPIClient()
+    return _TANDOOR_CLIENT
+
+
+async def close_tandoor_client() -> None:
+    """Close the Tandoor client of this process, if it was created."""
+    global _TANDOOR_CLIENT  # pylint: disable=global-statement
+    if _TANDOOR_CLIENT is not None:
+        await _TANDOOR_CLIENT.close()
+        _TANDOOR_CLIENT = None
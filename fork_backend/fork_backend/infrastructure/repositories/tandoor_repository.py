@@ -1,25 +1,37 @@
 """Repository for interacting with Tandoor food and recipe data"""
 
-from typing import List, Dict, Any
+import asyncio
+from datetime import datetime
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 
 from fork_backend.core.constants import FOOD_ID_PLACEHOLDER
 from fork_backend.core.logging import get_logger
 from fork_backend.infrastructure.api_clients.tandoor_api_client import TandoorAPIClient
 from fork_backend.models.food_item import FoodItem
 
+if TYPE_CHECKING:
+    from fork_backend.services.tandoor_recipe_service import TandoorRecipeService
+
 log = get_logger()
 
+# Recipes per page when listing all recipes
+LIST_PAGE_SIZE = 100
+
 
 class TandoorRepository:
     """Repository for Tandoor food and recipe data operations"""
 
-    def __init__(self, api_client: TandoorAPIClient):
+    def __init__(self, api_client: TandoorAPIClient,
+                 recipe_cache: Optional["TandoorRecipeService"] = None):
         """
         Initialize the Tandoor repository.
 
         :param api_client: Instance of TandoorAPIClient
+        :param recipe_cache: Cache of the computed nutrition of recipes (optional). Recipes
+            that did not change since they were cached are not fetched again.
         """
         self.api_client = api_client
+        self.recipe_cache = recipe_cache
 
     async def search_recipes(self, query: str, user_id: str, limit: int = 20) -> List[FoodItem]:
         """
@@ -32,32 +44,66 @@ class TandoorRepository:
         """
         try:
             results = await self.api_client.search_recipes(query, limit)
-            recipe_items = []
-
-            for item in results:
-                recipe_item = await self._recipe_item_from_tandoor_response(item, user_id)
-                recipe_items.append(recipe_item)
-
-            log.debug("Found {len(recipe_items)} recipes for query: %s", query)
+            recipes = [self.recipe_from_tandoor_response(item) for item in results]
+
+            cached = {}
+            if self.recipe_cache is not None:
+                cached = await self.recipe_cache.get_nutrition(recipes)
+            missing = [recipe for recipe in recipes if recipe["id"] not in cached]
+
+            # The details of all recipes are fetched concurrently, bounded by the api client
+            nutrition = await asyncio.gather(
+                *[self.get_recipe_nutrition(recipe["id"]) for recipe in missing])
+            for recipe, recipe_nutrition in zip(missing, nutrition):
+                recipe.update(recipe_nutrition)
+            for recipe in recipes:
+                recipe.update(cached.get(recipe["id"], {}))
+
+            if self.recipe_cache is not None and missing:
+                await self.recipe_cache.store(missing)
+
+            recipe_items = [self.food_item_from_recipe(recipe, user_id) for recipe in recipes]
+            log.debug("Found %d recipes for query: %s, %d of them cached", len(recipe_items),
+                      query, len(cached))
             return recipe_items
         except Exception as e:
             log.error("Error searching recipes in Tandoor repository: %s", str(e))
             raise
 
-    async def _recipe_item_from_tandoor_response(self, response: Dict[str, Any], user_id: str
-                                                 ) -> FoodItem:
+    async def list_recipes(self) -> List[Dict[str, Any]]:
+        """
+        List all recipes in Tandoor, without their nutrition.
+
+        :return: List of recipe dicts, see recipe_from_tandoor_response
+        """
+        try:
+            recipes = []
+            page = 1
+            while True:
+                data = await self.api_client.list_recipes(page=page, page_size=LIST_PAGE_SIZE)
+                recipes.extend(self.recipe_from_tandoor_response(item)
+                               for item in data.get("results", []))
+                if not data.get("next"):
+                    return recipes
+                page += 1
+        except Exception as e:
+            log.error("Error listing recipes in Tandoor repository: %s", str(e))
+            raise
+
+    def recipe_from_tandoor_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Convert a Tandoor API response for a recipe to a FoodItem model.
+        Convert a Tandoor API response for a recipe to the fields of a FoodItem, without the
+        nutrition.
 
         :param response: Tandoor API response for a recipe
-        :param user_id: ID of the user performing the search
-        :return: FoodItem object representing the recipe
+        :return: Dict with the Tandoor id, updated_at, name, description, serving_size,
+            serving_unit and external_image_url
         """
         # basic information
         tandoor_id = int(response.get("id"))
         name = str(response.get("name", ""))
         description = str(response.get("description", "")) or ""
-        servings = str(response.get("servings", ""))
+        servings = response.get("servings", 0)
         servings_text = str(response.get("servings_text", ""))[:19]
 
         working_time = response.get("working_time", 0)
@@ -78,41 +124,56 @@ class TandoorRepository:
 
             description += f", Source: {self.api_client.base_url}recipe/{str(tandoor_id)}"
 
+        updated_at = response.get("updated_at")
+
+        return {
+            "id": tandoor_id,
+            "updated_at": datetime.fromisoformat(updated_at) if updated_at else None,
+            "name": name,
+            "description": description,
+            "serving_size": servings,
+            "serving_unit": servings_text,
+            # Set external image URL if available
+            "external_image_url": response.get("image") or None,
+        }
+
+    @staticmethod
+    def food_item_from_recipe(recipe: Dict[str, Any], user_id: str) -> FoodItem:
+        """
+        Convert a recipe dict with its nutrition to a FoodItem model.
+
+        :param recipe: Recipe dict of recipe_from_tandoor_response, updated with the dict of
+            get_recipe_nutrition
+        :param user_id: ID of the user performing the search
+        :return: FoodItem object representing the recipe
+        """
         new_recipe_item = FoodItem(
             id=FOOD_ID_PLACEHOLDER,
             user_id=user_id,
             private=False,
             hidden=False,
-            name=name,
+            name=recipe["name"],
             brand="Tandoor Recipes",
-            description=description,
+            description=recipe["description"],
             barcode=None,
-            serving_size=servings,
-            serving_unit=servings_text,
-            calories_per_100=0,
-            protein_per_100=0,
-            carbs_per_100=0,
-            fat_per_100=0,
+            serving_size=recipe["serving_size"],
+            serving_unit=recipe["serving_unit"],
+            calories_per_100=recipe.get("calories_per_100", 0),
+            protein_per_100=recipe.get("protein_per_100", 0),
+            carbs_per_100=recipe.get("carbs_per_100", 0),
+            fat_per_100=recipe.get("fat_per_100", 0),
         )
 
-        # Set external image URL if available
-        image_url = None
-        if 'image' in response and response['image']:
-            image_url = response['image']
-
-        if image_url:
-            new_recipe_item.external_image_url = image_url
-
-        await self._get_recipe_nutrition(recipie_id=tandoor_id, food_item=new_recipe_item)
+        if recipe.get("external_image_url"):
+            new_recipe_item.external_image_url = recipe["external_image_url"]
         return new_recipe_item
 
-    async def _get_recipe_nutrition(self, recipie_id: int, food_item: FoodItem) -> FoodItem:
+    async def get_recipe_nutrition(self, recipie_id: int) -> Dict[str, float]:
         """
-        Get detailed information about a specific recipie
+        Get the nutrition of a specific recipie from its details
 
         :param recipie_id: Tandoor id of the recipie
-        :param food_item: The FoodItem model to update with the nutrition info
-        :return: Updated FoodItem Model including nutrition information.
+        :return: Dict with the calories, carbs, fat and protein per 100 g and the serving size.
         """
         try:
             result = await self.api_client.get_recipe_details(recipie_id)
@@ -153,17 +214,16 @@ class TandoorRepository:
                             if conversion.get("unit", "") == "g":
                                 total_weight += conversion.get("amount", 0)
 
-            food_item.calories_per_100 = round(total_calories/total_weight * 100, 2)
-            food_item.carbs_per_100 = round(total_carbs/total_weight * 100, 2)
-            food_item.fat_per_100 = round(total_fat/total_weight * 100, 2)
-            food_item.protein_per_100 = round(total_protein/total_weight * 100, 2)
-
-            food_item.serving_size = round(total_weight/servings, 0)
-
-            return food_item
+            return {
+                "calories_per_100": round(total_calories/total_weight * 100, 2),
+                "carbs_per_100": round(total_carbs/total_weight * 100, 2),
+                "fat_per_100": round(total_fat/total_weight * 100, 2),
+                "protein_per_100": round(total_protein/total_weight * 100, 2),
+                "serving_size": round(total_weight/servings, 0),
+            }
         except Exception as e:
             log.error(
-                "Error updating recipe nutrition info in Tandoor repository: %s", str(e))
+                "Error getting recipe nutrition info in Tandoor repository: %s", str(e))
             raise e
 
     async def close(self):
@@ -1,6 +1,6 @@
 """Data model for base activities"""
 from uuid import uuid4
-from sqlalchemy import String, ForeignKey, Date, Float
+from sqlalchemy import String, ForeignKey, Date, Float, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from fork_backend.models.base import Base
@@ -9,6 +9,15 @@ from fork_backend.models.base import Base
 class Activities(Base):
     """The log of all activities that are known"""
     __tablename__ = "activities"
+    __table_args__ = (
+        # Trigram index for the activity search (requires pg_trgm)
+        Index(
+            "ix_activities_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid4()))
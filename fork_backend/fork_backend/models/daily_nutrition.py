@@ -0,0 +1,28 @@
+"""Model for the nutrition totals of every day and meal type"""
+
+from datetime import date
+from sqlalchemy import String, Integer, Float, ForeignKey, Date, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fork_backend.models.base import Base
+from fork_backend.models.meal_type import MealType
+
+
+class DailyNutrition(Base):
+    """
+    Rollup of the food entries of one meal type of one day. Maintained by
+    DailyNutritionService on every change of the entries or of the macros of their food items,
+    so charts over long ranges read a few rows per day instead of every entry.
+    """
+    __tablename__ = "daily_nutrition"
+
+    # Primary key order serves range reads of a user
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), primary_key=True)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+    meal_type: Mapped[MealType] = mapped_column(SQLEnum(MealType), primary_key=True)
+
+    entries: Mapped[int] = mapped_column(Integer, nullable=False)
+    calories: Mapped[float] = mapped_column(Float, nullable=False)
+    protein: Mapped[float] = mapped_column(Float, nullable=False)
+    carbs: Mapped[float] = mapped_column(Float, nullable=False)
+    fat: Mapped[float] = mapped_column(Float, nullable=False)
@@ -1,7 +1,7 @@
 """Model for individual food items e.g. banana, apple, ..."""
 
 from uuid import uuid4
-from sqlalchemy import String, Float, ForeignKey, Boolean
+from sqlalchemy import String, Float, ForeignKey, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from pgvector.sqlalchemy import Vector
 
@@ -11,11 +11,34 @@ from fork_backend.models.base import Base
 class FoodItem(Base):
     """Singular food item"""
     __tablename__ = "food_items"
+    __table_args__ = (
+        # HNSW index for approximate cosine distance searches on the embedding
+        Index(
+            "ix_food_items_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+        # Trigram indexes for the lexical part of the search (requires pg_trgm)
+        Index(
+            "ix_food_items_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_food_items_brand_trgm",
+            "brand",
+            postgresql_using="gin",
+            postgresql_ops={"brand": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid4()))
     user_id: Mapped[str] = mapped_column(
-        ForeignKey("users.id"), nullable=False)
+        ForeignKey("users.id"), nullable=False, index=True)
     private: Mapped[bool] = mapped_column(
         Boolean, nullable=False, default=False)
     hidden: Mapped[bool] = mapped_column(
@@ -37,9 +60,11 @@ class FoodItem(Base):
     carbs_per_100: Mapped[float] = mapped_column(Float, nullable=False)
     fat_per_100: Mapped[float] = mapped_column(Float, nullable=False)
 
-    # Using 384 dimensions for multilingual-e5-small
+    # Using 384 dimensions for multilingual-e5-small.
+    # Deferred, as it is only needed inside of search queries and is the bulk of every row. Raises
+    # on access instead of lazy loading, use undefer(FoodItem.embedding) to load it.
     embedding: Mapped[Vector | None] = mapped_column(
-        Vector(384), nullable=True)
+        Vector(384), nullable=True, deferred=True, deferred_raiseload=True)
 
     # Relationships
     food_entries: Mapped[list["FoodEntry"]] = relationship(
@@ -69,8 +94,9 @@ class FoodItemIngredient(Base):
     parent_id: Mapped[str] = mapped_column(
         ForeignKey("food_items.id", ondelete="CASCADE"), primary_key=True
     )
+    # Indexed to find the parents of an ingredient when its macros change
     ingredient_id: Mapped[str] = mapped_column(
-        ForeignKey("food_items.id", ondelete="CASCADE"), primary_key=True
+        ForeignKey("food_items.id", ondelete="CASCADE"), primary_key=True, index=True
     )
 
     quantity: Mapped[float] = mapped_column(Float, nullable=False)
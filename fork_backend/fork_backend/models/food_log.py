@@ -1,6 +1,6 @@
 """Data model to log all days where food is consumed"""
 from uuid import uuid4
-from sqlalchemy import String, ForeignKey, Date
+from sqlalchemy import String, ForeignKey, Date, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from fork_backend.models.base import Base
@@ -9,6 +9,10 @@ from fork_backend.models.base import Base
 class FoodLog(Base):
     """The log of all date where food is consumed"""
     __tablename__ = "food_logs"
+    __table_args__ = (
+        # Lookup of the log of a day and keyset pagination of the log history
+        Index("ix_food_logs_user_id_date", "user_id", "date"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid4()))
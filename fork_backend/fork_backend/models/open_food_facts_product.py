@@ -0,0 +1,34 @@
+"""Model for cached OpenFoodFacts barcode lookups"""
+
+from datetime import datetime
+from sqlalchemy import String, Text, Boolean, Float, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fork_backend.models.base import Base
+
+
+class OpenFoodFactsProduct(Base):
+    """
+    Result of an OpenFoodFacts barcode lookup, holding the fields a FoodItem is built from.
+    Unknown barcodes are cached too, with found set to False and no fields. Maintained by
+    BarcodeCacheService.
+    """
+    __tablename__ = "open_food_facts_products"
+
+    # The barcode as it was looked up
+    code: Mapped[str] = mapped_column(String(50), primary_key=True)
+    found: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow,
+                                                 nullable=False)
+
+    # Not limited like the FoodItem columns, they are stored as OpenFoodFacts returns them
+    name: Mapped[str | None] = mapped_column(Text, nullable=True)
+    brand: Mapped[str | None] = mapped_column(Text, nullable=True)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    barcode: Mapped[str | None] = mapped_column(Text, nullable=True)
+    serving_size: Mapped[float | None] = mapped_column(Float, nullable=True)
+    calories_per_100: Mapped[float | None] = mapped_column(Float, nullable=True)
+    protein_per_100: Mapped[float | None] = mapped_column(Float, nullable=True)
+    carbs_per_100: Mapped[float | None] = mapped_column(Float, nullable=True)
+    fat_per_100: Mapped[float | None] = mapped_column(Float, nullable=True)
+    external_image_url: Mapped[str | None] = mapped_column(Text, nullable=True)
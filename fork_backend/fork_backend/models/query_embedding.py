@@ -0,0 +1,26 @@
+"""Model for persisted embeddings of search queries"""
+
+from datetime import datetime
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from pgvector.sqlalchemy import Vector
+
+from fork_backend.models.base import Base
+
+
+class QueryEmbedding(Base):
+    """
+    Embedding of a normalized search query. Lets the query embedding cache survive restarts.
+    Keyed on the model and backend as well, as the embeddings of another model or backend are
+    not comparable.
+    """
+    __tablename__ = "query_embeddings"
+
+    model: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # The backend, with the onnx file if one is set
+    backend: Mapped[str] = mapped_column(String(255), primary_key=True)
+    query: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # Using 384 dimensions for multilingual-e5-small
+    embedding: Mapped[Vector] = mapped_column(Vector(384), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow,
+                                                 nullable=False)
@@ -1,6 +1,7 @@
 """goal model"""
 
-from sqlalchemy import Boolean, String
+from datetime import datetime
+from sqlalchemy import Boolean, Integer, String, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 
 from fork_backend.models.base import Base
@@ -11,5 +12,12 @@ class System(Base):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default="system")
     open_nutrition_data_import_started: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     open_nutrition_data_import_finished: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Number of rows of the openNutrition TSV that have been processed. Used to resume the import
+    open_nutrition_data_import_checkpoint: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     exercise_import_started: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     exercise_import_finished: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # sha256 of the imported exercise dataset. Used to skip reruns of an unchanged dataset
+    exercise_import_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, default=None)
+    # End of the last complete sync of the Tandoor recipes. Tandoor searches use the local copy
+    # only once it is set
+    tandoor_recipes_synced_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, default=None)
@@ -0,0 +1,49 @@
+"""Model for the local copy of Tandoor recipes and their nutrition"""
+
+from datetime import datetime
+from sqlalchemy import Integer, String, Text, Float, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from pgvector.sqlalchemy import Vector
+
+from fork_backend.models.base import Base
+
+
+class TandoorRecipe(Base):
+    """
+    Recipe of the configured Tandoor instance with the nutrition computed from its details.
+    Valid as long as updated_at matches the recipe in Tandoor. Maintained by
+    TandoorRecipeService, which also searches it instead of Tandoor once it is synced.
+    """
+    __tablename__ = "tandoor_recipes"
+    __table_args__ = (
+        # Trigram index for the lexical part of the search (requires pg_trgm). There is no HNSW
+        # index on the embedding, the recipes of one instance are few enough for an exact search.
+        Index(
+            "ix_tandoor_recipes_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
+    # The id of the recipe in Tandoor
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    # The last change of the recipe in Tandoor
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    synced_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow,
+                                                nullable=False)
+
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    serving_size: Mapped[float] = mapped_column(Float, nullable=False)
+    serving_unit: Mapped[str] = mapped_column(String(20), nullable=False)
+    calories_per_100: Mapped[float] = mapped_column(Float, nullable=False)
+    protein_per_100: Mapped[float] = mapped_column(Float, nullable=False)
+    carbs_per_100: Mapped[float] = mapped_column(Float, nullable=False)
+    fat_per_100: Mapped[float] = mapped_column(Float, nullable=False)
+    external_image_url: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Embedding of the name, computed by the sync. Null for recipes cached by a search until the
+    # next sync. Deferred like FoodItem.embedding.
+    embedding: Mapped[Vector | None] = mapped_column(
+        Vector(384), nullable=True, deferred=True, deferred_raiseload=True)
@@ -3,9 +3,10 @@
 from datetime import date
 from typing import Optional
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from fork_backend.core.db import get_async_db
+from fork_backend.core.db import use_async_db
 from fork_backend.core.logging import get_logger
 from fork_backend.models.activity_log import ActivityLog
 from fork_backend.models.goals import Goals
@@ -17,8 +18,12 @@ logger = get_logger()
 class ActivityLogService:
     """Service to handle activity log management"""
 
-    def __init__(self) -> None:
-        """"""
+    def __init__(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        :param db: Session to run all operations in, e.g. the request scoped session of
+            get_async_db_fastapi. Every operation opens its own session if not given.
+        """
+        self.db = db
 
     async def create_log(self, user_id: str, log_date: date) -> ActivityLog:
         """
@@ -30,7 +35,7 @@ class ActivityLogService:
         :return: The new ActivityLog object.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 # Get the user's most recent goals
                 goals_result = await db.execute(
                     select(Goals)
@@ -67,9 +72,11 @@ class ActivityLogService:
         :return: The ActivityLog object if found, None otherwise.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(ActivityLog)
+                    # reload objects already loaded by an earlier operation of the session
+                    .execution_options(populate_existing=True)
                     .where(ActivityLog.id == log_id)
                     .options(
                         selectinload(ActivityLog.activity_entries).selectinload(
@@ -93,9 +100,11 @@ class ActivityLogService:
         :return: The ActivityLog object if found, None otherwise.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(ActivityLog)
+                    # reload objects already loaded by an earlier operation of the session
+                    .execution_options(populate_existing=True)
                     .where(ActivityLog.user_id == user_id, ActivityLog.date == log_date)
                     .options(
                         selectinload(ActivityLog.activity_entries).selectinload(
@@ -122,7 +131,7 @@ class ActivityLogService:
             (might be shorter if less entries are available)
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 stmt = select(
                     ActivityLog).where(ActivityLog.user_id == user_id).order_by(
                         ActivityLog.date.desc()).options(
@@ -152,7 +161,7 @@ class ActivityLogService:
         :return: The ActivityEntry object with eagerly loaded activity.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 # Get or create the log for the specified date
                 activity_log = await self.get_log_by_date(user_id, log_date)
                 if not activity_log:
@@ -188,7 +197,7 @@ class ActivityLogService:
         :return: True if the activity entry was successfully removed, False otherwise.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 activity_log = await self.get_log_by_date(user_id, log_date)
                 if not activity_log:
                     raise ValueError(
@@ -230,7 +239,7 @@ class ActivityLogService:
         :return: The updated ActivityEntry object with eagerly loaded activity.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 activity_log = await self.get_log_by_date(user_id, log_date)
                 if not activity_log:
                     raise ValueError(
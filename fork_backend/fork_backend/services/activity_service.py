@@ -1,10 +1,13 @@
 """Service class to manipulate activities"""
 
 from typing import Optional, List
-from sqlalchemy import select, and_
+from sqlalchemy import select, or_, func, literal, String
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from fork_backend.core.db import get_async_db
+from fork_backend.core.constants import ADMIN_USER_ID
+from fork_backend.core.db import use_async_db
 from fork_backend.core.logging import get_logger
+from fork_backend.core.ranking import set_word_similarity_threshold
 from fork_backend.models.activities import Activities
 
 log = get_logger()
@@ -14,8 +17,12 @@ class ActivityService:
     """Service class for management of Activities.
     Other than with food, we only use simpler search logic without embeddings for now."""
 
-    def __init__(self) -> None:
-        """"""
+    def __init__(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        :param db: Session to run all operations in, e.g. the request scoped session of
+            get_async_db_fastapi. Every operation opens its own session if not given.
+        """
+        self.db = db
 
     async def add_activity(self, activity: Activities) -> Activities:
         """
@@ -25,7 +32,7 @@ class ActivityService:
         :return: The created Activities object.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 db.add(activity)
                 await db.commit()
                 log.debug("New activity added: %s", activity.name)
@@ -44,7 +51,7 @@ class ActivityService:
         :return: The updated Activities object.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 # Get original to check if it exists
                 result = await db.execute(
                     select(Activities).filter(Activities.id == activity.id)
@@ -74,7 +81,7 @@ class ActivityService:
         :return: An instance of the Activities.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(Activities).filter(Activities.id == activity_id)
                 )
@@ -94,7 +101,7 @@ class ActivityService:
         :return: A list of Activities.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 stmt = select(Activities).where(
                     Activities.user_id == user_id
                 )
@@ -114,22 +121,35 @@ class ActivityService:
         limit: int = 20,
     ) -> List[Activities]:
         """
-        Search for activities by name.
+        Search for activities by name. Finds the activities of the user and the imported
+        activities shared by all users whose name contains the query or a word similar to it,
+        ranked by trigram word similarity. Both conditions are served by the trigram index on
+        the name.
 
         :param user_id: The id of the user.
         :param query: The search query.
         :param limit: Maximum number of results to return.
-        :return: A list of Activities matching the query.
+        :return: A list of Activities matching the query, best match first.
         """
         try:
             if not query:
                 return await self.get_activities_by_user(user_id)
 
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
+                await set_word_similarity_threshold(db)
+
                 stmt = select(Activities).where(
-                    and_(
-                        Activities.name.ilike(f"%{query}%")
+                    or_(
+                        Activities.user_id == user_id,
+                        Activities.user_id == ADMIN_USER_ID
+                    ),
+                    or_(
+                        Activities.name.ilike(f"%{query}%"),
+                        literal(query, String).op("<%")(Activities.name)
                     )
+                ).order_by(
+                    func.word_similarity(query, Activities.name).desc(),
+                    func.length(Activities.name)
                 )
 
                 stmt = stmt.limit(limit)
@@ -151,7 +171,7 @@ class ActivityService:
         :return: True if deletion was successful, False if item was not found.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(Activities).filter(Activities.id == activity_id)
                 )
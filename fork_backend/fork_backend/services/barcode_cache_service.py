@@ -0,0 +1,171 @@
+"""Service class to cache OpenFoodFacts barcode lookups in the db"""
+
+import asyncio
+from datetime import datetime, timedelta
+import time
+from os import environ
+from typing import Any, Awaitable, Callable, Optional
+from sqlalchemy import select, delete, and_, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fork_backend.core.db import get_async_db, release_connection, use_async_db
+from fork_backend.core.logging import get_logger
+from fork_backend.models.open_food_facts_product import OpenFoodFactsProduct
+
+log = get_logger()
+
+# How long a found product is answered from the cache without asking OpenFoodFacts
+BARCODE_CACHE_TTL_S = int(environ.get("FORK_BARCODE_CACHE_TTL_S", default="604800"))
+# How long an unknown barcode is answered from the cache, products are added all the time
+BARCODE_CACHE_NEGATIVE_TTL_S = int(
+    environ.get("FORK_BARCODE_CACHE_NEGATIVE_TTL_S", default="86400"))
+# How long after expiry an entry is still answered while it is refreshed in the background
+BARCODE_CACHE_STALE_S = int(environ.get("FORK_BARCODE_CACHE_STALE_S", default="2592000"))
+# Seconds between two deletions of the entries that are too old to be answered
+PURGE_INTERVAL_S = 3600
+
+PRODUCT_FIELDS = ("name", "brand", "description", "barcode", "serving_size",
+                  "calories_per_100", "protein_per_100", "carbs_per_100", "fat_per_100",
+                  "external_image_url")
+
+# Barcodes refreshed in the background right now, so a burst of scans refreshes them once
+_REFRESHING: set[str] = set()
+# Keeps references to the background refreshes, so they are not garbage collected
+_REFRESH_TASKS: set[asyncio.Task] = set()
+# time.monotonic of the last deletion of old entries
+_LAST_PURGE_AT = float("-inf")
+
+
+class BarcodeCacheService:
+    """
+    Read through cache of OpenFoodFacts barcode lookups, backed by the open_food_facts_products
+    table. Fresh entries are answered from the db. Expired entries are answered as well while
+    they are refreshed in the background, unless they expired too long ago. Unknown barcodes are
+    cached with a shorter TTL. Entries that expired too long ago are deleted when new entries
+    are stored, at most every PURGE_INTERVAL_S.
+    """
+
+    def __init__(self, db: Optional[AsyncSession] = None,
+                 ttl_s: int = BARCODE_CACHE_TTL_S,
+                 negative_ttl_s: int = BARCODE_CACHE_NEGATIVE_TTL_S,
+                 stale_s: int = BARCODE_CACHE_STALE_S) -> None:
+        """
+        :param db: Session to read the cache with. Its transaction is ended before a fetch.
+            Writes use their own session and commit.
+        :param ttl_s: Seconds a found product is fresh.
+        :param negative_ttl_s: Seconds an unknown barcode is fresh.
+        :param stale_s: Seconds an expired entry is still answered while it is refreshed.
+        """
+        self.db = db
+        self.ttl = timedelta(seconds=ttl_s)
+        self.negative_ttl = timedelta(seconds=negative_ttl_s)
+        self.stale = timedelta(seconds=stale_s)
+
+    async def get_or_fetch(self, code: str,
+                           fetch: Callable[[str], Awaitable[Optional[dict[str, Any]]]]
+                           ) -> Optional[dict[str, Any]]:
+        """
+        Get the product fields of a barcode from the cache or fetch them.
+
+        :param code: The barcode.
+        :param fetch: Coroutine function fetching the product fields of a barcode. Returns None
+            for unknown barcodes and raises if the lookup failed.
+        :return: Dict with the PRODUCT_FIELDS, None if the barcode is unknown.
+        """
+        cached = await self._load(code)
+        if cached is not None:
+            ttl = self.ttl if cached.found else self.negative_ttl
+            age = datetime.utcnow() - cached.fetched_at
+            if age <= ttl:
+                return self._fields(cached)
+            if age <= ttl + self.stale:
+                self._refresh_in_background(code, fetch)
+                return self._fields(cached)
+
+        await release_connection(self.db)
+        try:
+            fields = await fetch(code)
+        except Exception as e:
+            if cached is None:
+                raise e
+            # Better outdated than nothing
+            log.warning("Failed to refresh barcode '%s', answering from the cache: %s", code,
+                        str(e))
+            return self._fields(cached)
+
+        await self._store(code, fields)
+        return fields
+
+    async def _load(self, code: str) -> Optional[OpenFoodFactsProduct]:
+        """Load a cache entry. Returns None if there is none or it can not be read."""
+        try:
+            async with use_async_db(self.db) as db:
+                result = await db.execute(
+                    select(OpenFoodFactsProduct).where(OpenFoodFactsProduct.code == code))
+                return result.scalar_one_or_none()
+        except Exception as e:
+            log.error("Failed to load cached barcode '%s': %s", code, str(e))
+            return None
+
+    async def _store(self, code: str, fields: Optional[dict[str, Any]]) -> None:
+        """
+        Insert or replace a cache entry and delete the old entries if they are due. Failures
+        are logged, but not raised.
+        """
+        values = {name: None for name in PRODUCT_FIELDS}
+        values.update(fields or {})
+        values.update(code=code, found=fields is not None, fetched_at=datetime.utcnow())
+
+        try:
+            async with get_async_db() as db:
+                stmt = insert(OpenFoodFactsProduct).values(**values)
+                await db.execute(stmt.on_conflict_do_update(
+                    index_elements=[OpenFoodFactsProduct.code],
+                    set_={name: stmt.excluded[name] for name in values if name != "code"}))
+                if time.monotonic() - _LAST_PURGE_AT >= PURGE_INTERVAL_S:
+                    await self._purge(db)
+                await db.commit()
+        except Exception as e:
+            log.error("Failed to cache barcode '%s': %s", code, str(e))
+
+    async def _purge(self, db: AsyncSession) -> None:
+        """Delete the entries that expired too long ago to be answered. Not committed."""
+        global _LAST_PURGE_AT  # pylint: disable=global-statement
+        _LAST_PURGE_AT = time.monotonic()
+        now = datetime.utcnow()
+        result = await db.execute(delete(OpenFoodFactsProduct).where(or_(
+            and_(OpenFoodFactsProduct.found.is_(True),
+                 OpenFoodFactsProduct.fetched_at < now - self.ttl - self.stale),
+            and_(OpenFoodFactsProduct.found.is_(False),
+                 OpenFoodFactsProduct.fetched_at < now - self.negative_ttl - self.stale),
+        )))
+        log.debug("Deleted %d expired barcode cache entries", result.rowcount)
+
+    @staticmethod
+    def _fields(cached: OpenFoodFactsProduct) -> Optional[dict[str, Any]]:
+        """The product fields of a cache entry, None if the barcode is unknown"""
+        if not cached.found:
+            return None
+        return {name: getattr(cached, name) for name in PRODUCT_FIELDS}
+
+    def _refresh_in_background(self, code: str,
+                               fetch: Callable[[str], Awaitable[Optional[dict[str, Any]]]]
+                               ) -> None:
+        """Fetch and store a barcode without waiting for it, unless it is refreshed already"""
+        if code in _REFRESHING:
+            return
+        _REFRESHING.add(code)
+
+        async def refresh() -> None:
+            try:
+                await self._store(code, await fetch(code))
+            except Exception as e:
+                # The stale entry is kept and refreshed again on the next scan
+                log.warning("Failed to refresh barcode '%s' in the background: %s", code, str(e))
+            finally:
+                _REFRESHING.discard(code)
+
+        task = asyncio.create_task(refresh())
+        _REFRESH_TASKS.add(task)
+        task.add_done_callback(_REFRESH_TASKS.discard)
@@ -0,0 +1,169 @@
+"""Service class to maintain and read the daily nutrition rollups"""
+
+from datetime import date
+from typing import Any, Optional
+from sqlalchemy import select, delete, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fork_backend.core.db import use_async_db
+from fork_backend.core.logging import get_logger
+from fork_backend.models.daily_nutrition import DailyNutrition
+from fork_backend.models.food_entry import FoodEntry
+from fork_backend.models.food_item import FoodItem
+from fork_backend.models.food_log import FoodLog
+
+log = get_logger()
+
+NUTRIENTS = ("calories", "protein", "carbs", "fat")
+
+
+def nutrition_totals() -> list:
+    """
+    Aggregates of the number of food entries and their calories, protein, carbs and fat. For
+    statements joining FoodItem to FoodEntry. Sums are null if there are no entries.
+    """
+    return [
+        func.count(FoodEntry.id).label("entries"),
+        *[func.sum(column * FoodEntry.quantity / 100).label(name)
+          for name, column in (("calories", FoodItem.calories_per_100),
+                               ("protein", FoodItem.protein_per_100),
+                               ("carbs", FoodItem.carbs_per_100),
+                               ("fat", FoodItem.fat_per_100))],
+    ]
+
+
+class DailyNutritionService:
+    """
+    Service to maintain the DailyNutrition rollups. The refresh methods run in the transaction of
+    the session the service was created with and do not commit, so a rollup is committed
+    together with the change of the entries it sums.
+    """
+
+    def __init__(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        :param db: Session to run all operations in. Required for the refresh methods, which are
+            part of the transaction of the change that made the refresh necessary.
+        """
+        self.db = db
+
+    @staticmethod
+    def _upsert(*conditions):
+        """Insert or update the rollups of all (user, date, meal type) of the matching entries"""
+        aggregate = (
+            select(FoodLog.user_id, FoodLog.date, FoodEntry.meal_type, *nutrition_totals())
+            .select_from(FoodEntry)
+            .join(FoodLog, FoodLog.id == FoodEntry.log_id)
+            .join(FoodItem, FoodItem.id == FoodEntry.food_id)
+            .where(*conditions)
+            .group_by(FoodLog.user_id, FoodLog.date, FoodEntry.meal_type))
+
+        columns = ["user_id", "date", "meal_type", "entries", *NUTRIENTS]
+        stmt = insert(DailyNutrition).from_select(columns, aggregate)
+        return stmt.on_conflict_do_update(
+            index_elements=["user_id", "date", "meal_type"],
+            set_={name: stmt.excluded[name] for name in ["entries", *NUTRIENTS]})
+
+    async def refresh_day(self, user_id: str, log_date: date) -> None:
+        """
+        Recompute the rollups of all meal types of one day of a user from its entries. Call
+        after adding, changing or removing entries of the day, before the commit.
+
+        :param user_id: The ID of the user.
+        :param log_date: The date of the changed entries.
+        """
+        try:
+            async with use_async_db(self.db) as db:
+                await db.flush()
+                # Serializes refreshes of the same day. Otherwise a refresh not yet seeing the
+                # uncommitted entry of a concurrent one could overwrite its rollup.
+                await db.execute(select(func.pg_advisory_xact_lock(
+                    func.hashtext(f"daily_nutrition:{user_id}:{log_date.isoformat()}"))))
+                await db.execute(delete(DailyNutrition).where(
+                    DailyNutrition.user_id == user_id, DailyNutrition.date == log_date))
+                await db.execute(self._upsert(
+                    FoodLog.user_id == user_id, FoodLog.date == log_date))
+        except Exception as e:
+            log.error("Failed to refresh daily nutrition of user '%s' for '%s': %s", user_id,
+                      log_date, str(e))
+            raise e
+
+    async def refresh_food_item(self, food_item_id: str) -> None:
+        """
+        Recompute the rollups of every day with entries of a food item. Call after changing the
+        macros of the food item, before the commit.
+
+        :param food_item_id: The ID of the changed food item.
+        """
+        try:
+            async with use_async_db(self.db) as db:
+                await db.flush()
+                affected = (
+                    select(FoodLog.user_id, FoodLog.date, FoodEntry.meal_type)
+                    .select_from(FoodEntry)
+                    .join(FoodLog, FoodLog.id == FoodEntry.log_id)
+                    .where(FoodEntry.food_id == food_item_id)
+                    .distinct())
+                await db.execute(self._upsert(
+                    tuple_(FoodLog.user_id, FoodLog.date, FoodEntry.meal_type).in_(affected)))
+        except Exception as e:
+            log.error("Failed to refresh daily nutrition of food item '%s': %s", food_item_id,
+                      str(e))
+            raise e
+
+    async def backfill(self, user_id: Optional[str] = None) -> int:
+        """
+        Rebuild the rollups from all entries and commit them.
+
+        :param user_id: Only rebuild the rollups of this user (optional).
+        :return: The number of rollup rows written.
+        """
+        try:
+            async with use_async_db(self.db) as db:
+                user_filter = [] if user_id is None else [DailyNutrition.user_id == user_id]
+                await db.execute(delete(DailyNutrition).where(*user_filter))
+                result = await db.execute(self._upsert(
+                    *([] if user_id is None else [FoodLog.user_id == user_id])))
+                await db.commit()
+                return result.rowcount
+        except Exception as e:
+            log.error("Failed to backfill daily nutrition: %s", str(e))
+            raise e
+
+    async def get_range(self, user_id: str, from_date: date, to_date: date,
+                        per_meal: bool = False) -> list[dict[str, Any]]:
+        """
+        Get the nutrition totals of the days of a date range. Days without entries are left out.
+
+        :param user_id: The ID of the user.
+        :param from_date: The first date to include.
+        :param to_date: The last date to include.
+        :param per_meal: Return the totals of every meal type instead of the totals per day.
+
+        :return: Dicts with the date, meal_type (None unless per_meal), number of entries,
+            calories, protein, carbs and fat, oldest first.
+        """
+        keys = [DailyNutrition.date] + ([DailyNutrition.meal_type] if per_meal else [])
+        try:
+            async with use_async_db(self.db) as db:
+                rows = (await db.execute(
+                    select(*keys,
+                           func.sum(DailyNutrition.entries).label("entries"),
+                           *[func.sum(getattr(DailyNutrition, name)).label(name)
+                             for name in NUTRIENTS])
+                    .where(DailyNutrition.user_id == user_id,
+                           DailyNutrition.date.between(from_date, to_date))
+                    .group_by(*keys)
+                    .order_by(*keys)
+                )).all()
+        except Exception as e:
+            log.error("Failed to get daily nutrition of user '%s' from '%s' to '%s': %s",
+                      user_id, from_date, to_date, str(e))
+            raise e
+
+        return [{
+            "date": row.date,
+            "meal_type": row.meal_type if per_meal else None,
+            "entries": row.entries,
+            **{name: getattr(row, name) for name in NUTRIENTS},
+        } for row in rows]
@@ -1,17 +1,22 @@
 """Service class to manipulate food logs"""
 
 from datetime import date
-from typing import Optional
-from sqlalchemy import select
+from typing import Any, Optional
+from sqlalchemy import select, func, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from fork_backend.core.db import get_async_db
+from fork_backend.core.db import use_async_db
 from fork_backend.core.logging import get_logger
 from fork_backend.models.food_log import FoodLog
 from fork_backend.models.goals import Goals
 from fork_backend.models.food_item import FoodItem, FoodItemIngredient
 from fork_backend.models.food_entry import FoodEntry
 from fork_backend.models.meal_type import MealType
+from fork_backend.models.activity_log import ActivityLog
+from fork_backend.models.activity_entry import ActivityEntry
+from fork_backend.models.daily_nutrition import DailyNutrition
+from fork_backend.services.daily_nutrition_service import DailyNutritionService, NUTRIENTS
 
 
 logger = get_logger()
@@ -20,8 +25,12 @@ logger = get_logger()
 class LogService:
     """Service to handle log management"""
 
-    def __init__(self) -> None:
-        """"""
+    def __init__(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        :param db: Session to run all operations in, e.g. the request scoped session of
+            get_async_db_fastapi. Every operation opens its own session if not given.
+        """
+        self.db = db
 
     async def create_log(self, user_id: str, log_date: date) -> FoodLog:
         """
@@ -33,7 +42,7 @@ class LogService:
         :return: The new FoodLog object.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 # Get the user's most recent goals
                 goals_result = await db.execute(
                     select(Goals)
@@ -70,9 +79,11 @@ class LogService:
         :return: The FoodLog object if found, None otherwise.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(FoodLog)
+                    # reload objects already loaded by an earlier operation of the session
+                    .execution_options(populate_existing=True)
                     .where(FoodLog.id == log_id)
                     .options(
                         selectinload(FoodLog.food_entries).selectinload(
@@ -97,9 +108,11 @@ class LogService:
         :return: The FoodLog object if found, None otherwise.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(FoodLog)
+                    # reload objects already loaded by an earlier operation of the session
+                    .execution_options(populate_existing=True)
                     .where(FoodLog.user_id == user_id, FoodLog.date == log_date)
                     .options(
                         selectinload(FoodLog.food_entries).selectinload(
@@ -127,7 +140,7 @@ class LogService:
             (might be shorter if less entries are available)
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 stmt = select(
                     FoodLog).where(FoodLog.user_id == user_id).order_by(
                         FoodLog.date.desc()).options(
@@ -146,6 +159,191 @@ class LogService:
             logger.error("Failed to get logs for user '%s': %s", user_id, str(e))
             raise e
 
+    @staticmethod
+    def _history_filter(user_id: str, from_date: Optional[date], to_date: Optional[date],
+                        after: Optional[tuple[date, str]]) -> list:
+        """Where clause of a page of the log history, newest first"""
+        conditions = [FoodLog.user_id == user_id]
+        if from_date is not None:
+            conditions.append(FoodLog.date >= from_date)
+        if to_date is not None:
+            conditions.append(FoodLog.date <= to_date)
+        if after is not None:
+            conditions.append(tuple_(FoodLog.date, FoodLog.id) < tuple_(*after))
+        return conditions
+
+    async def get_log_history(self, user_id: str, from_date: Optional[date] = None,
+                              to_date: Optional[date] = None,
+                              after: Optional[tuple[date, str]] = None, limit: int = 30
+                              ) -> tuple[list[FoodLog], Optional[tuple[date, str]]]:
+        """
+        Get a page of the food logs of a user, newest first. Paginated by (date, id), so every
+        page takes the same time no matter how far back it is.
+
+        :param user_id: The ID of the user.
+        :param from_date: The first date to include (optional).
+        :param to_date: The last date to include (optional).
+        :param after: (date, id) of the last log of the previous page. None for the first page.
+        :param limit: Maximum number of logs of the page.
+
+        :return: The logs of the page and the (date, id) to get the next page with, None if this
+            is the last page.
+        """
+        try:
+            async with use_async_db(self.db) as db:
+                result = await db.execute(
+                    select(FoodLog)
+                    .execution_options(populate_existing=True)
+                    .where(*self._history_filter(user_id, from_date, to_date, after))
+                    .order_by(FoodLog.date.desc(), FoodLog.id.desc())
+                    .limit(limit + 1)
+                    .options(
+                        selectinload(FoodLog.food_entries).selectinload(
+                            FoodEntry.food_item).selectinload(FoodItem.ingredients).selectinload(
+                                FoodItemIngredient.ingredient),
+                        selectinload(FoodLog.goals)
+                    )
+                )
+                food_logs = list(result.scalars().all())
+        except Exception as e:
+            logger.error("Failed to get log history for user '%s': %s", user_id, str(e))
+            raise e
+
+        if len(food_logs) <= limit:
+            return food_logs, None
+        food_logs = food_logs[:limit]
+        return food_logs, (food_logs[-1].date, food_logs[-1].id)
+
+    async def get_log_history_totals(self, user_id: str, from_date: Optional[date] = None,
+                                     to_date: Optional[date] = None,
+                                     after: Optional[tuple[date, str]] = None, limit: int = 30
+                                     ) -> tuple[list[dict[str, Any]], Optional[tuple[date, str]]]:
+        """
+        Get a page of the nutrition totals per day of a user, newest first. Same pagination as
+        get_log_history, read from the daily nutrition rollups without loading the entries.
+
+        :param user_id: The ID of the user.
+        :param from_date: The first date to include (optional).
+        :param to_date: The last date to include (optional).
+        :param after: (date, id) of the last log of the previous page. None for the first page.
+        :param limit: Maximum number of days of the page.
+
+        :return: Dicts with the date, number of entries, calories, protein, carbs and fat of
+            every day and the (date, id) to get the next page with, None if this is the last page.
+        """
+        try:
+            async with use_async_db(self.db) as db:
+                range_filter = [DailyNutrition.user_id == user_id]
+                if from_date is not None:
+                    range_filter.append(DailyNutrition.date >= from_date)
+                if to_date is not None:
+                    range_filter.append(DailyNutrition.date <= to_date)
+                if after is not None:
+                    range_filter.append(DailyNutrition.date <= after[0])
+                totals = (
+                    select(DailyNutrition.date,
+                           func.sum(DailyNutrition.entries).label("entries"),
+                           *[func.sum(getattr(DailyNutrition, name)).label(name)
+                             for name in NUTRIENTS])
+                    .where(*range_filter)
+                    .group_by(DailyNutrition.date)
+                    .subquery())
+
+                rows = (await db.execute(
+                    select(FoodLog.id, FoodLog.date, totals.c.entries,
+                           *[totals.c[name] for name in NUTRIENTS])
+                    .outerjoin(totals, totals.c.date == FoodLog.date)
+                    .where(*self._history_filter(user_id, from_date, to_date, after))
+                    .order_by(FoodLog.date.desc(), FoodLog.id.desc())
+                    .limit(limit + 1)
+                )).all()
+        except Exception as e:
+            logger.error("Failed to get log history totals for user '%s': %s", user_id, str(e))
+            raise e
+
+        next_key = (rows[limit - 1].date, rows[limit - 1].id) if len(rows) > limit else None
+        return [{
+            "date": row.date,
+            "entries": row.entries or 0,
+            **{name: getattr(row, name) or 0 for name in NUTRIENTS},
+        } for row in rows[:limit]], next_key
+
+    async def get_day_summary(self, user_id: str, log_date: date) -> Optional[dict[str, Any]]:
+        """
+        Get the nutrition totals of a day per meal type and overall, the calories burned by
+        activities and the goals of the day. Read in one query from the daily nutrition rollups,
+        without loading the entries. Does not create a log for the day.
+
+        :param user_id: The ID of the user.
+        :param log_date: The date of the day.
+
+        :return: Dict with date, meals, total, calories_burned and goals. None if the user has
+            no goals.
+        """
+        try:
+            async with use_async_db(self.db) as db:
+                meals = (
+                    select(DailyNutrition.meal_type, DailyNutrition.entries,
+                           *[getattr(DailyNutrition, name) for name in NUTRIENTS])
+                    .where(DailyNutrition.user_id == user_id, DailyNutrition.date == log_date)
+                    .subquery())
+
+                calories_burned = (
+                    select(func.coalesce(func.sum(ActivityEntry.calories_burned), 0))
+                    .join(ActivityLog, ActivityLog.id == ActivityEntry.log_id)
+                    .where(ActivityLog.user_id == user_id, ActivityLog.date == log_date)
+                    .scalar_subquery())
+
+                # The goals of the day are those of its logs, or the current goals without logs
+                goals_id = func.coalesce(
+                    select(FoodLog.goals_id)
+                    .where(FoodLog.user_id == user_id, FoodLog.date == log_date)
+                    .limit(1).scalar_subquery(),
+                    select(ActivityLog.goals_id)
+                    .where(ActivityLog.user_id == user_id, ActivityLog.date == log_date)
+                    .limit(1).scalar_subquery(),
+                    select(Goals.id).where(Goals.user_id == user_id)
+                    .order_by(Goals.created_at.desc()).limit(1).scalar_subquery(),
+                )
+
+                # One row per meal type with entries, or a single row without meal for empty days
+                rows = (await db.execute(
+                    select(
+                        Goals.daily_calorie_target, Goals.daily_protein_target,
+                        Goals.daily_carbs_target, Goals.daily_fat_target,
+                        Goals.daily_calorie_burn_target,
+                        calories_burned.label("calories_burned"),
+                        meals.c.meal_type, meals.c.entries, meals.c.calories, meals.c.protein,
+                        meals.c.carbs, meals.c.fat,
+                    )
+                    .outerjoin(meals, true())
+                    .where(Goals.id == goals_id)
+                )).all()
+        except Exception as e:
+            logger.error("Failed to get summary for user '%s' and date '%s': %s", user_id,
+                         log_date, str(e))
+            raise e
+
+        if not rows:
+            return None
+
+        nutrients = ("entries", "calories", "protein", "carbs", "fat")
+        meal_totals = {meal_type: dict.fromkeys(nutrients, 0) for meal_type in MealType}
+        for row in rows:
+            if row.meal_type is not None:
+                meal_totals[row.meal_type] = {name: getattr(row, name) for name in nutrients}
+
+        return {
+            "date": log_date,
+            "meals": meal_totals,
+            "total": {name: sum(meal[name] for meal in meal_totals.values())
+                      for name in nutrients},
+            "calories_burned": rows[0].calories_burned,
+            "goals": {name: getattr(rows[0], name) for name in (
+                "daily_calorie_target", "daily_protein_target", "daily_carbs_target",
+                "daily_fat_target", "daily_calorie_burn_target")},
+        }
+
     async def add_food_entry(self, user_id: str, log_date: date, food_entry: FoodEntry
                              ) -> FoodEntry:
         """
@@ -158,7 +356,7 @@ class LogService:
         :return: The FoodEntry object with eagerly loaded food_item.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 # Get or create the log for the specified date
                 food_log = await self.get_log_by_date(user_id, log_date)
                 if not food_log:
@@ -167,6 +365,7 @@ class LogService:
                 food_entry.log_id = food_log.id
 
                 db.add(food_entry)
+                await DailyNutritionService(db).refresh_day(user_id, log_date)
                 await db.commit()
                 await db.refresh(food_entry)
 
@@ -196,7 +395,7 @@ class LogService:
         :return: True if the food entry was successfully removed, False otherwise.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 food_log = await self.get_log_by_date(user_id, log_date)
                 if not food_log:
                     raise ValueError(
@@ -213,6 +412,7 @@ class LogService:
                         f"Food entry {food_entry_id} not found in log for date {log_date}")
 
                 await db.delete(food_entry)
+                await DailyNutritionService(db).refresh_day(user_id, log_date)
                 await db.commit()
 
             logger.debug("Food entry '%s' removed from log '%s'.",
@@ -238,7 +438,7 @@ class LogService:
         :return: The updated FoodEntry object with eagerly loaded food_item.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 food_log = await self.get_log_by_date(user_id, log_date)
                 if not food_log:
                     raise ValueError(
@@ -259,6 +459,7 @@ class LogService:
                 if quantity is not None:
                     food_entry.quantity = quantity
 
+                await DailyNutritionService(db).refresh_day(user_id, log_date)
                 await db.commit()
                 await db.refresh(food_entry)
 
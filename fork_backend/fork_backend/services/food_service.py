@@ -1,60 +1,186 @@
 """Service class to manipulate food items"""
 
 from typing import Optional, Dict, Any
+from os import environ
 import asyncio
+import re
 from concurrent.futures import ThreadPoolExecutor  # pylint: disable=no-name-in-module
+from concurrent.futures.process import BrokenProcessPool
 
-from sqlalchemy import select, and_, or_, desc, func
+from sqlalchemy import select, update, and_, or_, desc, func, literal, String
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sentence_transformers import SentenceTransformer
-import openfoodfacts
 
-from fork_backend.core.constants import OPENFOODFACTS_USER_AGENT, FOOD_ID_PLACEHOLDER
-from fork_backend.core.db import get_async_db
+from fork_backend.core.cache import SizedTTLCache, SingleFlight
+from fork_backend.core.constants import FOOD_ID_PLACEHOLDER
+from fork_backend.core.db import release_connection, use_async_db
+from fork_backend.core.embeddings.batching import BatchingEncoder
+from fork_backend.core.embeddings.cache import EmbeddingCache, normalize_query
+from fork_backend.core.embeddings.model import LazyEmbeddingModel
+from fork_backend.core.embeddings.worker_pool import ProcessEmbeddingModel
 from fork_backend.core.logging import get_logger
+from fork_backend.core.ranking import reciprocal_rank_fusion, set_word_similarity_threshold
 from fork_backend.models.food_item import FoodItem, FoodItemIngredient
 from fork_backend.models.food_sources import Sources
 from fork_backend.models.food_log import FoodLog
 from fork_backend.models.food_entry import FoodEntry
+from fork_backend.services.barcode_cache_service import BarcodeCacheService
+from fork_backend.services.daily_nutrition_service import DailyNutritionService
 from fork_backend.services.image_service import ImageService
+from fork_backend.services.tandoor_recipe_service import (
+    TandoorRecipeService, TANDOOR_SYNC_INTERVAL_S)
 
 # Tandoor integration
-from fork_backend.infrastructure.api_clients.tandoor_api_client import TandoorAPIClient
+from fork_backend.infrastructure.api_clients.tandoor_api_client import get_tandoor_client
+from fork_backend.infrastructure.api_clients.open_food_facts_api_client import (
+    get_open_food_facts_client)
 from fork_backend.infrastructure.repositories.tandoor_repository import TandoorRepository
 
 log = get_logger()
 
-print("Loading embedding model...")
-EMBEDDING_MODEL = SentenceTransformer('intfloat/multilingual-e5-small')
-print("Model loaded")
-
-# Thread pool for CPU-bound encoding operations
-ENCODER_POOL = ThreadPoolExecutor(max_workers=4)
+EMBEDDING_MODEL_NAME = environ.get("FORK_EMBEDDING_MODEL",
+                                   default="intfloat/multilingual-e5-small")
+EMBEDDING_BACKEND = environ.get("FORK_EMBEDDING_BACKEND", default="torch")
+EMBEDDING_ONNX_FILE = environ.get("FORK_EMBEDDING_ONNX_FILE", default=None)
+
+# "thread": encode in a thread pool of this process, sharing the GIL with the event loop.
+# "process": encode in dedicated worker processes, each holding one copy of the model.
+EMBEDDING_WORKERS = environ.get("FORK_EMBEDDING_WORKERS", default="thread")
+ENCODER_POOL_WORKERS = int(environ.get("FORK_EMBEDDING_POOL_SIZE", default="4"))
+
+# Pool for CPU-bound encoding operations. The model is loaded on first use or in the background
+# at startup, see api.router
+if EMBEDDING_WORKERS == "process":
+    EMBEDDING_MODEL = ProcessEmbeddingModel(
+        model_name=EMBEDDING_MODEL_NAME,
+        backend=EMBEDDING_BACKEND,
+        onnx_file=EMBEDDING_ONNX_FILE,
+        n_workers=ENCODER_POOL_WORKERS,
+        threads_per_worker=int(environ.get("FORK_EMBEDDING_WORKER_THREADS", default="1")),
+    )
+    ENCODER_POOL = EMBEDDING_MODEL.executor
+else:
+    EMBEDDING_MODEL = LazyEmbeddingModel(
+        model_name=EMBEDDING_MODEL_NAME,
+        backend=EMBEDDING_BACKEND,
+        onnx_file=EMBEDDING_ONNX_FILE,
+    )
+    ENCODER_POOL = ThreadPoolExecutor(max_workers=ENCODER_POOL_WORKERS)
+
+# Micro-batching of concurrent encoding requests
+EMBEDDING_MAX_BATCH_SIZE = int(environ.get("FORK_EMBEDDING_MAX_BATCH_SIZE", default="32"))
+EMBEDDING_MAX_WAIT_MS = float(environ.get("FORK_EMBEDDING_MAX_WAIT_MS", default="5"))
+
+# Cache of the embeddings of search queries
+QUERY_EMBEDDING_CACHE = EmbeddingCache(
+    max_size=int(environ.get("FORK_EMBEDDING_CACHE_SIZE", default="1024")),
+    persistent=environ.get("FORK_EMBEDDING_CACHE_PERSISTENT", default="false").lower() == "true",
+    model=EMBEDDING_MODEL_NAME,
+    backend=(f"{EMBEDDING_BACKEND}:{EMBEDDING_ONNX_FILE}" if EMBEDDING_ONNX_FILE
+             else EMBEDDING_BACKEND),
+)
+
+# Default size of the candidate list of the HNSW index during searches.
+HNSW_EF_SEARCH = int(environ.get("FORK_HNSW_EF_SEARCH", default="40"))
+# Largest hnsw.ef_search pgvector accepts
+HNSW_EF_SEARCH_MAX = 1000
+
+# Hybrid search: k of the reciprocal rank fusion and how many candidates per result each
+# ranking contributes
+SEARCH_RRF_K = int(environ.get("FORK_SEARCH_RRF_K", default="60"))
+HYBRID_CANDIDATE_FACTOR = 3
+
+# EAN-8, UPC-A, EAN-13 and GTIN-14
+BARCODE_PATTERN = re.compile(r"^\d{8,14}$")
+
+
+# Macros of a food item. Computed from the ingredients for composite food items
+MACRO_COLUMNS = ("calories_per_100", "protein_per_100", "carbs_per_100", "fat_per_100")
+# Maximum number of ingredient levels a macro change is propagated through
+MAX_INGREDIENT_DEPTH = 16
+
+# Results of OpenFoodFacts text searches, as FoodItem fields, keyed on the normalized query and
+# the limit. Bounded in memory, as the results of a search can be large.
+OPEN_FOOD_FACTS_SEARCH_CACHE = SizedTTLCache(
+    max_size=int(environ.get("FORK_OPENFOODFACTS_SEARCH_CACHE_SIZE", default="1024")),
+    max_bytes=int(environ.get("FORK_OPENFOODFACTS_SEARCH_CACHE_MB", default="32")) * 1024 * 1024,
+    ttl_s=float(environ.get("FORK_OPENFOODFACTS_SEARCH_CACHE_TTL_S", default="3600")),
+)
+OPEN_FOOD_FACTS_SEARCHES = SingleFlight()
+
+
+def _to_float(value: Any) -> float:
+    """A number of an OpenFoodFacts product, which are sometimes strings. 0 if it is no number"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
 
 
 class FoodService:
     """Service class for management of Food"""
 
-    def __init__(self) -> None:
-        """"""
+    def __init__(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        :param db: Session to run all operations in, e.g. the request scoped session of
+            get_async_db_fastapi. Every operation opens its own session if not given.
+        """
+        self.db = db
 
     @staticmethod
-    def _encode_sync(text: str) -> list:
-        """Synchronous encoding function to run in thread pool"""
-        return EMBEDDING_MODEL.encode(text).tolist()
+    async def _encode_async(text: str, use_cache: bool = True) -> list:
+        """
+        Async wrapper for encoding using the encoder pool.
+        Prevents blocking the event loop. Concurrent calls are encoded together in batches.
+
+        :param text: The text to encode.
+        :param use_cache: Whether to use the query embedding cache. Should only be used for
+            search queries, as these tend to repeat.
+        """
+        try:
+            if use_cache:
+                return await QUERY_EMBEDDING_CACHE.get_or_encode(text, EMBEDDING_ENCODER.encode)
+            return await EMBEDDING_ENCODER.encode(text)
+        except BrokenProcessPool as e:
+            # Only raised by the worker processes of a ProcessEmbeddingModel
+            EMBEDDING_MODEL.handle_broken_pool(e)
+            raise e
 
     @staticmethod
-    async def _encode_async(text: str) -> list:
+    async def encode_batch_async(texts: list[str]) -> list[list]:
         """
-        Async wrapper for encoding using thread pool.
-        Prevents blocking the event loop.
+        Async wrapper for encoding an entire batch of texts at once using the encoder pool.
+        Bypasses the micro-batching, as the texts already form a batch. Used for bulk imports.
         """
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            ENCODER_POOL,
-            FoodService._encode_sync,
-            text
-        )
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                ENCODER_POOL,
+                EMBEDDING_MODEL.encode,
+                texts
+            )
+        except BrokenProcessPool as e:
+            # Only raised by the worker processes of a ProcessEmbeddingModel
+            EMBEDDING_MODEL.handle_broken_pool(e)
+            raise e
+
+    @staticmethod
+    async def _encode_query(query: str) -> Optional[list]:
+        """
+        Encode a search query, unless the embedding model is not ready or its workers just
+        broke. Starts loading the model in the background in that case.
+
+        :return: The embedding of the query, None if searches have to use the lexical search.
+        """
+        if not EMBEDDING_MODEL.is_ready:
+            log.info("Embedding model not ready, using lexical search for query '%s'", query)
+            EMBEDDING_MODEL.ensure_loading(ENCODER_POOL)
+            return None
+        try:
+            return await FoodService._encode_async(query)
+        except BrokenProcessPool:
+            log.warning("Embedding workers broken, using lexical search for query '%s'", query)
+            return None
 
     @staticmethod
     async def _generate_embeddings(food_item: FoodItem) -> list:
@@ -64,13 +190,14 @@ class FoodService:
         :return: name_embedding
         """
 
-        name_emb = await FoodService._encode_async(food_item.name)
+        name_emb = await FoodService._encode_async(food_item.name, use_cache=False)
 
         return name_emb
 
     async def add_food_item(self, food_item: FoodItem) -> FoodItem:
         """
-        Adds a new food item to the database with embeddings.
+        Adds a new food item to the database with embeddings. The macros of food items with
+        ingredients are computed from the ingredients.
 
         :param food_item: The new item to add.
         :return: The created FoodItem with embeddings.
@@ -80,7 +207,7 @@ class FoodService:
             name_emb = await self._generate_embeddings(food_item)
             food_item.embedding = name_emb
 
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
 
                 db.add(food_item)
 
@@ -91,6 +218,9 @@ class FoodService:
                     log.debug("added ingredients for food item: %s",
                               food_item.name)
 
+                    await db.flush()
+                    await self._apply_composite_macros(db, food_item)
+
                 await db.commit()
                 log.debug("New food item added with embeddings: %s",
                           food_item.name)
@@ -104,13 +234,15 @@ class FoodService:
     async def update_food_item(self, food_item: FoodItem) -> FoodItem | None:
         """
         Update an existing food item's information.
-        Regenerates embeddings if searchable fields changed.
+        Regenerates embeddings if searchable fields changed. The macros of food items with
+        ingredients are computed from the ingredients and changes are propagated to all food
+        items containing the food item.
 
         :param food_item: The food item to update.
         :return: The updated FoodItem.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 # Get original to check if searchable fields changed
                 result = await db.execute(
                     select(FoodItem).filter(FoodItem.id == food_item.id).options(
@@ -129,6 +261,14 @@ class FoodService:
                     original.name != food_item.name
                 )
 
+                original_macros = {name: getattr(original, name) for name in MACRO_COLUMNS}
+
+                new_ingredient_ids = {item.ingredient_id for item in food_item.ingredients}
+                if new_ingredient_ids and new_ingredient_ids & (
+                        {food_item.id} | await self._ancestor_ids(db, food_item.id)):
+                    raise ValueError(
+                        f"Food item '{food_item.id}' can not be an ingredient of itself")
+
                 if needs_reembedding:
                     name_emb = await self._generate_embeddings(food_item)
                     food_item.embedding = name_emb
@@ -153,7 +293,16 @@ class FoodService:
                     log.debug(
                         "Ingredients unchanged for food item: %s", food_item.name)
 
+                # Attributes not set on food_item, like an unchanged embedding, are kept as is
                 updated_food_item = await db.merge(food_item)
+                await db.flush()
+                await self._apply_composite_macros(db, updated_food_item)
+
+                # Logged days and parents of the food item depend on its macros
+                if any(getattr(updated_food_item, name) != value
+                       for name, value in original_macros.items()):
+                    await DailyNutritionService(db).refresh_food_item(food_item.id)
+                    await self._propagate_macros(db, food_item.id)
                 await db.commit()
 
                 log.debug("Updated FoodItem with id '%s'", food_item.id)
@@ -164,6 +313,111 @@ class FoodService:
                       food_item.id, e)
             raise e
 
+    @staticmethod
+    async def _composite_macros(db: AsyncSession, parent_ids: list[str]
+                                ) -> dict[str, dict[str, float]]:
+        """
+        Compute the per 100 macros of composite food items from the stored macros of their
+        direct ingredients. Nested ingredients are included, as the stored macros of composite
+        ingredients are computed from their own ingredients.
+
+        :param db: The session to read the ingredients with.
+        :param parent_ids: The IDs of the composite food items.
+        :return: Macros by food item ID. Food items without ingredients or total weight are
+            left out.
+        """
+        result = await db.execute(
+            select(FoodItemIngredient.parent_id,
+                   func.sum(FoodItemIngredient.quantity).label("weight"),
+                   *[func.sum(getattr(FoodItem, name) * FoodItemIngredient.quantity).label(name)
+                     for name in MACRO_COLUMNS])
+            .join(FoodItem, FoodItem.id == FoodItemIngredient.ingredient_id)
+            .where(FoodItemIngredient.parent_id.in_(parent_ids))
+            .group_by(FoodItemIngredient.parent_id)
+        )
+        return {
+            row.parent_id: {name: round(getattr(row, name) / row.weight, 2)
+                            for name in MACRO_COLUMNS}
+            for row in result if row.weight > 0
+        }
+
+    async def _apply_composite_macros(self, db: AsyncSession, food_item: FoodItem) -> None:
+        """
+        Set the macros of a food item with flushed ingredients to those computed from the
+        ingredients. Keeps the given macros of food items without ingredients.
+        """
+        macros = (await self._composite_macros(db, [food_item.id])).get(food_item.id)
+        if macros:
+            for name, value in macros.items():
+                setattr(food_item, name, value)
+
+    @staticmethod
+    async def _ancestor_ids(db: AsyncSession, food_item_id: str) -> set[str]:
+        """
+        Get the IDs of all food items containing a food item, directly or nested.
+
+        :param db: The session to read the ingredients with.
+        :param food_item_id: The ID of the food item.
+        :return: The IDs of the parents, their parents and so on.
+        """
+        ancestors: set[str] = set()
+        frontier = {food_item_id}
+        for _ in range(MAX_INGREDIENT_DEPTH):
+            parent_ids = set((await db.execute(
+                select(FoodItemIngredient.parent_id)
+                .where(FoodItemIngredient.ingredient_id.in_(frontier))
+            )).scalars()) - ancestors
+            if not parent_ids:
+                break
+            ancestors |= parent_ids
+            frontier = parent_ids
+        return ancestors
+
+    async def _propagate_macros(self, db: AsyncSession, food_item_id: str,
+                                parent_ids: Optional[list[str]] = None) -> None:
+        """
+        Recompute the macros of all food items containing a food item with changed macros,
+        level by level through the ingredient_id index, and the daily nutrition rollups of
+        every changed food item. Parents on several levels are recomputed once per level, so
+        they end up with the macros of their final ingredients.
+
+        :param db: The session of the change, which commits it.
+        :param food_item_id: The ID of the food item with changed macros.
+        :param parent_ids: The IDs of the direct parents of the food item. Looked up if not
+            given, pass them if they can no longer be, e.g. after deleting the food item.
+        """
+        rollups = DailyNutritionService(db)
+        changed = [food_item_id]
+        for _ in range(MAX_INGREDIENT_DEPTH):
+            if parent_ids is None:
+                parent_ids = list((await db.execute(
+                    select(FoodItemIngredient.parent_id)
+                    .where(FoodItemIngredient.ingredient_id.in_(changed))
+                    .distinct()
+                )).scalars())
+            if not parent_ids:
+                return
+
+            current = {row.id: row for row in await db.execute(
+                select(FoodItem.id, *[getattr(FoodItem, name) for name in MACRO_COLUMNS])
+                .where(FoodItem.id.in_(parent_ids)))}
+            changed = []
+            for parent_id, macros in (await self._composite_macros(db, parent_ids)).items():
+                if all(getattr(current[parent_id], name) == value
+                       for name, value in macros.items()):
+                    continue
+                await db.execute(update(FoodItem).where(FoodItem.id == parent_id).values(macros))
+                await rollups.refresh_food_item(parent_id)
+                changed.append(parent_id)
+            parent_ids = None
+            log.debug("Propagated macros of food item '%s' to %d parents", food_item_id,
+                      len(changed))
+
+        if changed:
+            log.warning("Stopped propagating macros of food item '%s' after %d levels of "
+                        "ingredients, the ingredients might contain a cycle", food_item_id,
+                        MAX_INGREDIENT_DEPTH)
+
     @staticmethod
     def _have_ingredients_changed(original_ingredients: list[FoodItemIngredient],
                                   new_ingredients: list[FoodItemIngredient]) -> bool:
@@ -196,12 +450,14 @@ class FoodService:
         :return: An instance of the FoodItem.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(FoodItem).filter(FoodItem.id == food_item_id).options(
                         selectinload(FoodItem.ingredients),
                         selectinload(FoodItem.ingredients).selectinload(
                             FoodItemIngredient.ingredient))
+                    # reload objects already loaded by an earlier operation of the session
+                    .execution_options(populate_existing=True)
                 )
                 food_item = result.scalar_one_or_none()
                 return food_item
@@ -219,6 +475,7 @@ class FoodService:
         source: Sources = Sources.LOCAL,
         limit: int = 20,
         min_similarity: float = 0.3,
+        ef_search: Optional[int] = None,
     ) -> list[FoodItem]:
         """
         Search for food items based on query text, barcode, or both, with various filtering options.
@@ -236,14 +493,20 @@ class FoodService:
         :param min_similarity: Minimum similarity threshold for semantic search (0.0 to 1.0).
                               Only applies to local semantic searches. Defaults to 0.3.
         :type min_similarity: float, optional
+        :param ef_search: Size of the HNSW candidate list for local semantic searches.
+                          Defaults to HNSW_EF_SEARCH.
+        :type ef_search: Optional[int]
         :return: List of FoodItem objects matching the search criteria.
         :rtype: list[FoodItem]
         :raises ValueError: If both 'query' and 'code' parameters are provided.
         :raises Exception: If there's an error during the search process.
 
         **Search Behavior:**
-        - If 'query' is provided, performs semantic search in the specified source
+        - If 'query' is provided, performs a hybrid lexical and semantic search for local
+          sources, a barcode-like query is looked up as barcode first. Other sources are
+          searched with their own text search
         - If 'code' is provided, performs exact barcode match (first in local DB, then OpenFoodFacts)
+          Codes that are no EAN-8, UPC-A, EAN-13 or GTIN-14 barcode find nothing
         - If neither 'query' nor 'code' is provided, returns empty list
         - Cannot use both 'query' and 'code' simultaneously
 
@@ -263,12 +526,13 @@ class FoodService:
             raise ValueError(err_msg)
 
         if (source == Sources.LOCAL or source == Sources.PERSONAL) and query:
-            return await self.semantic_search_food_items_local(
+            return await self.hybrid_search_food_items_local(
                 query=query,
                 user_id=user_id,
                 limit=limit,
                 private_only=True if source == Sources.PERSONAL else False,
-                min_similarity=min_similarity)
+                min_similarity=min_similarity,
+                ef_search=ef_search)
         if source == Sources.OPENFOODFACTS and query:
             return await self.semantic_search_food_items_open_food_facts(
                 query=query,
@@ -282,11 +546,17 @@ class FoodService:
                 limit=limit,
             )
         if code:
+            if not BARCODE_PATTERN.fullmatch(code):
+                # Keeps arbitrary strings out of the OpenFoodFacts url and the barcode cache
+                log.info("Not searching for '%s', it is no barcode", code)
+                return []
             ret_val = await self.code_search_food_items_local(
                 code=code,
                 user_id=user_id,
             )
             if len(ret_val) == 0:
+                # The lookup can wait for OpenFoodFacts for seconds
+                await release_connection(self.db)
                 ret_val = await self.code_search_food_items_open_food_facts(
                     code=code,
                     user_id=user_id,
@@ -303,7 +573,7 @@ class FoodService:
         Search for food items in the local db using barcode.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
 
                 # pylint: disable=singleton-comparison
                 if include_private:
@@ -349,20 +619,21 @@ class FoodService:
         user_id: str,
     ) -> list[FoodItem]:
         """
-        Search for food items in OpenFoodFacts using barcode.
+        Search for food items in OpenFoodFacts using barcode. Lookups are cached in the db,
+        see BarcodeCacheService.
         """
-        try:
-            api = openfoodfacts.API(
-                user_agent=OPENFOODFACTS_USER_AGENT, timeout=30)
-            response = api.product.get(code=code)
+        async def fetch(product_code: str) -> Optional[Dict[str, Any]]:
+            response = await get_open_food_facts_client().get_product(code=product_code)
             if not response:
+                return None
+            return self._open_food_facts_fields(response)
+
+        try:
+            fields = await BarcodeCacheService(self.db).get_or_fetch(code, fetch)
+            if fields is None:
                 return []
 
-            new_food_item = await self._food_item_from_open_food_facts_response(
-                response=response,
-                user_id=user_id
-            )
-            return [new_food_item]
+            return [self._food_item_from_open_food_facts_fields(fields=fields, user_id=user_id)]
 
         except Exception as e:
             log.error(
@@ -377,24 +648,28 @@ class FoodService:
         limit: int = 20,
     ) -> list[FoodItem]:
         """
-        Search for food items in OpenFoodFacts using barcode.
+        Search for food items in OpenFoodFacts using text. Results are cached in memory and
+        concurrent identical searches share one request, see OPEN_FOOD_FACTS_SEARCH_CACHE.
         """
-        try:
-            api = openfoodfacts.API(
-                user_agent=OPENFOODFACTS_USER_AGENT, timeout=30)
-            response = api.product.text_search(
-                query=query,
+        key = (normalize_query(query), limit)
+
+        async def fetch() -> list[Dict[str, Any]]:
+            response = await get_open_food_facts_client().text_search(
+                query=key[0],
                 page=1,
                 page_size=limit)
-            if not response:
-                return []
+            results = [self._open_food_facts_fields(response_item)
+                       for response_item in (response or {}).get('products', [])]
+            OPEN_FOOD_FACTS_SEARCH_CACHE.set(key, results)
+            return results
 
-            new_food_items = [await self._food_item_from_open_food_facts_response(
-                response=response_item,
-                user_id=user_id
-            ) for response_item in response.get('products', [])
-            ]
-            return new_food_items
+        try:
+            results = OPEN_FOOD_FACTS_SEARCH_CACHE.get(key)
+            if results is None:
+                results = await OPEN_FOOD_FACTS_SEARCHES.run(key, fetch)
+
+            return [self._food_item_from_open_food_facts_fields(fields=fields, user_id=user_id)
+                    for fields in results]
 
         except Exception as e:
             log.error(
@@ -402,90 +677,282 @@ class FoodService:
             raise e
         return []
 
-    async def _food_item_from_open_food_facts_response(self, response: Dict[str, Any], user_id: str
-                                                       ) -> FoodItem:
+    @staticmethod
+    def _open_food_facts_fields(response: Dict[str, Any]) -> Dict[str, Any]:
+        """The fields of a FoodItem in an OpenFoodFacts product, as cached by barcode"""
+        nutriments = response.get("nutriments", {})
+        return {
+            "name": str(response.get("product_name", "")),
+            "brand": str(response.get("brands", "")),
+            "description": ", ".join([ing.get("text", "")
+                                      for ing in response.get("ingredients", [])]),
+            "barcode": response.get("code", "0"),
+            "serving_size": _to_float(response.get("serving_quantity", 0)),
+            "calories_per_100": _to_float(nutriments.get("energy-kcal_100g", 0)),
+            "protein_per_100": _to_float(nutriments.get("proteins_100g", 0)),
+            "carbs_per_100": _to_float(nutriments.get("carbohydrates_100g", 0)),
+            "fat_per_100": _to_float(nutriments.get("fat_100g", 0)),
+            "external_image_url": response.get("image_small_url", None),
+        }
+
+    @staticmethod
+    def _food_item_from_open_food_facts_fields(fields: Dict[str, Any], user_id: str
+                                               ) -> FoodItem:
+        """A transient FoodItem of the fields of an OpenFoodFacts product"""
         new_food_item = FoodItem(
             id=FOOD_ID_PLACEHOLDER,
             user_id=user_id,
             private=False,
             hidden=False,
-            name=str(response.get("product_name", "")),
-            brand=str(response.get("brands", "")),
-            description=", ".join([ing.get("text", "")
-                                  for ing in response.get("ingredients", [])]),
-            barcode=response.get("code", "0"),
-            serving_size=response.get("serving_quantity", 0),
             serving_unit="serving",
-            calories_per_100=response.get(
-                "nutriments", {}).get("energy-kcal_100g", 0),
-            protein_per_100=response.get(
-                "nutriments", {}).get("proteins_100g", 0),
-            carbs_per_100=response.get("nutriments", {}).get(
-                "carbohydrates_100g", 0),
-            fat_per_100=response.get("nutriments", {}).get("fat_100g", 0),
+            **{name: value for name, value in fields.items() if name != "external_image_url"},
         )
-        new_food_item.external_image_url = response.get(
-            "image_small_url", None)
+        new_food_item.external_image_url = fields.get("external_image_url")
         return new_food_item
 
-    async def semantic_search_food_items_local(
+    async def hybrid_search_food_items_local(
         self,
         query: str,
         user_id: str,
         limit: int = 20,
         private_only: bool = False,
         min_similarity: float = 0.3,
+        ef_search: Optional[int] = None,
     ) -> list[FoodItem]:
         """
-        Semantic search for food items in the local db.
+        Hybrid search for food items in the local db. Combines the trigram ranking of name and
+        brand with the semantic ranking of the embedding using reciprocal rank fusion, so exact
+        names and brands rank first while related items are still found. Queries that look like
+        a barcode are resolved by an exact barcode lookup first.
+
+        Uses only the trigram ranking while the embedding model is not loaded yet or its
+        workers are restarted.
+
+        :param ef_search: Size of the HNSW candidate list for this search. Defaults to
+            HNSW_EF_SEARCH.
         """
+        n_candidates = limit * HYBRID_CANDIDATE_FACTOR
         try:
-            # Generate query embedding asynchronously
-            query_embedding = await self._encode_async(query)
+            if BARCODE_PATTERN.match(query.strip()):
+                async with use_async_db(self.db) as db:
+                    # Since barcodes are unique, there should only be one result
+                    result = await db.execute(
+                        select(FoodItem.id).where(
+                            self._search_visibility(user_id, private_only),
+                            FoodItem.barcode == query.strip()
+                        ).limit(1))
+                    food_items = await self._get_food_items_by_ids(
+                        db, list(result.scalars().all()))
+                if food_items:
+                    return food_items
+
+            query_embedding = await self._encode_query(query)
+
+            async with use_async_db(self.db) as db:
+                rankings = [await self._lexical_candidates(
+                    db, query, user_id, n_candidates, private_only)]
+                if query_embedding is not None:
+                    rankings.append(await self._semantic_candidates(
+                        db, query_embedding, user_id, n_candidates, private_only,
+                        min_similarity, ef_search))
+
+                food_item_ids = reciprocal_rank_fusion(rankings, k=SEARCH_RRF_K)[:limit]
+                food_items = await self._get_food_items_by_ids(db, food_item_ids)
+
+                log.debug("Hybrid search for '%s' returned %d results",
+                          query, len(food_items))
+                return food_items
 
-            async with get_async_db() as db:
-                similarity = 1 - \
-                    FoodItem.embedding.cosine_distance(query_embedding)
+        except Exception as e:
+            log.error(
+                "Failed to search food items for query '%s' in local db: %s", query, e)
+            raise e
 
-                # pylint: disable=singleton-comparison
-                stmt = select(FoodItem, similarity.label('similarity')).where(
-                    FoodItem.hidden == False).options(
-                        selectinload(FoodItem.ingredients).selectinload(
-                            FoodItemIngredient.ingredient))
+    async def semantic_search_food_items_local(
+        self,
+        query: str,
+        user_id: str,
+        limit: int = 20,
+        private_only: bool = False,
+        min_similarity: float = 0.3,
+        ef_search: Optional[int] = None,
+    ) -> list[FoodItem]:
+        """
+        Semantic search for food items in the local db.
 
-                # pylint: disable=singleton-comparison
-                if private_only:
-                    stmt = stmt.where(
-                        and_(
-                            FoodItem.user_id == user_id,
-                            similarity >= min_similarity
-                        )
-                    )
-                else:
-                    stmt = stmt.where(
-                        and_(
-                            or_(
-                                FoodItem.private == False,
-                                FoodItem.user_id == user_id
-                            ),
-                            similarity >= min_similarity
-                        )
-                    )
+        Public searches use the approximate HNSW index on the embedding, searches limited to the
+        personal items of a user use an exact search instead. Falls back to a lexical search
+        while the embedding model is not loaded yet or its workers are restarted.
 
-                stmt = stmt.order_by(similarity.desc()).limit(limit)
+        :param ef_search: Size of the HNSW candidate list for this search. Higher values increase
+            recall at the cost of latency. Defaults to HNSW_EF_SEARCH.
+        """
+        # Generate query embedding asynchronously
+        query_embedding = await self._encode_query(query)
+        if query_embedding is None:
+            return await self.lexical_search_food_items_local(
+                query=query,
+                user_id=user_id,
+                limit=limit,
+                private_only=private_only)
 
-                result = await db.execute(stmt)
-                rows = result.all()
+        try:
+            async with use_async_db(self.db) as db:
+                food_item_ids = await self._semantic_candidates(
+                    db, query_embedding, user_id, limit, private_only, min_similarity, ef_search)
+                food_items = await self._get_food_items_by_ids(db, food_item_ids)
 
                 log.debug("Search for '%s' returned %d results",
-                          query, len(rows))
-                return [row.FoodItem for row in rows]
+                          query, len(food_items))
+                return food_items
 
         except Exception as e:
             log.error(
                 "Failed to search food items for query '%s' in local db: %s", query, e)
             raise e
 
+    async def lexical_search_food_items_local(
+        self,
+        query: str,
+        user_id: str,
+        limit: int = 20,
+        private_only: bool = False,
+    ) -> list[FoodItem]:
+        """
+        Search for food items in the local db whose name or brand contain the query or a word
+        similar to it. Ranked by trigram word similarity, then items whose name starts with the
+        query, then shorter names.
+        """
+        try:
+            async with use_async_db(self.db) as db:
+                food_item_ids = await self._lexical_candidates(
+                    db, query, user_id, limit, private_only)
+                food_items = await self._get_food_items_by_ids(db, food_item_ids)
+
+                log.debug("Lexical search for '%s' returned %d results",
+                          query, len(food_items))
+                return food_items
+
+        except Exception as e:
+            log.error(
+                "Failed to lexically search food items for query '%s' in local db: %s", query, e)
+            raise e
+
+    @staticmethod
+    def _search_visibility(user_id: str, private_only: bool):
+        """
+        Filter for the food items a user may find in a search.
+
+        :param private_only: Only the items of the user instead of all public items and the
+            items of the user.
+        """
+        # pylint: disable=singleton-comparison
+        if private_only:
+            return and_(FoodItem.hidden == False, FoodItem.user_id == user_id)
+        return and_(
+            FoodItem.hidden == False,
+            or_(
+                FoodItem.private == False,
+                FoodItem.user_id == user_id
+            )
+        )
+
+    async def _semantic_candidates(
+        self,
+        db: AsyncSession,
+        query_embedding: list,
+        user_id: str,
+        limit: int,
+        private_only: bool,
+        min_similarity: float,
+        ef_search: Optional[int],
+    ) -> list[str]:
+        """
+        Get the ids of the food items most similar to the query embedding, best first.
+        """
+        distance = FoodItem.embedding.cosine_distance(query_embedding)
+        max_distance = 1 - min_similarity
+
+        stmt = select(FoodItem.id).where(
+            self._search_visibility(user_id, private_only),
+            distance <= max_distance
+        )
+
+        if private_only:
+            # The index can only serve "ORDER BY embedding <=> query ASC" and filters the users
+            # items only after the approximate scan, which would drop most of them. Ordering by
+            # similarity instead forces an exact scan over the few personal items.
+            similarity = 1 - distance
+            stmt = stmt.order_by(similarity.desc())
+        else:
+            # ef_search has to be at least as large as limit to be able to return limit
+            # results. Only valid for the current transaction.
+            ef_search = min(max(ef_search or HNSW_EF_SEARCH, limit), HNSW_EF_SEARCH_MAX)
+            await db.execute(
+                select(func.set_config("hnsw.ef_search", str(ef_search), True)))
+            stmt = stmt.order_by(distance)
+
+        result = await db.execute(stmt.limit(limit))
+        return list(result.scalars().all())
+
+    async def _lexical_candidates(
+        self,
+        db: AsyncSession,
+        query: str,
+        user_id: str,
+        limit: int,
+        private_only: bool,
+    ) -> list[str]:
+        """
+        Get the ids of the food items whose name or brand match the query best, best first.
+        Both conditions are served by the trigram indexes on name and brand.
+        """
+        pattern = f"%{query}%"
+        query_literal = literal(query, String)
+
+        await set_word_similarity_threshold(db)
+
+        # greatest ignores the NULL similarity of items without a brand
+        score = func.greatest(
+            func.word_similarity(query, FoodItem.name),
+            func.word_similarity(query, FoodItem.brand),
+        )
+
+        stmt = select(FoodItem.id).where(
+            self._search_visibility(user_id, private_only),
+            or_(
+                FoodItem.name.ilike(pattern),
+                FoodItem.brand.ilike(pattern),
+                query_literal.op("<%")(FoodItem.name),
+                query_literal.op("<%")(FoodItem.brand),
+            )
+        ).order_by(
+            score.desc(),
+            FoodItem.name.ilike(f"{query}%").desc(),
+            func.length(FoodItem.name)
+        ).limit(limit)
+
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def _get_food_items_by_ids(db: AsyncSession, food_item_ids: list[str]
+                                     ) -> list[FoodItem]:
+        """
+        Load food items with their ingredients, in the order of the given ids.
+        """
+        if not food_item_ids:
+            return []
+
+        result = await db.execute(
+            select(FoodItem).where(FoodItem.id.in_(food_item_ids)).options(
+                selectinload(FoodItem.ingredients).selectinload(
+                    FoodItemIngredient.ingredient))
+        )
+        food_items = {food_item.id: food_item for food_item in result.scalars().all()}
+        return [food_items[food_item_id] for food_item_id in food_item_ids
+                if food_item_id in food_items]
+
     async def search_by_barcode(
         self,
         barcode: str,
@@ -499,7 +966,7 @@ class FoodService:
         :return: FoodItem if found, None otherwise.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(FoodItem).where(
                         and_(
@@ -534,7 +1001,7 @@ class FoodService:
         :return: True if deletion was successful, False if item was not found.
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(FoodItem).filter(FoodItem.id == food_item_id)
                 )
@@ -545,11 +1012,23 @@ class FoodService:
                         "Unable to find food item with id '%s' for deletion", food_item_id)
                     return False
 
+                # Their ingredient rows are deleted by the cascade, so look them up before
+                parent_ids = list((await db.execute(
+                    select(FoodItemIngredient.parent_id)
+                    .where(FoodItemIngredient.ingredient_id == food_item_id)
+                    .distinct()
+                )).scalars())
+
                 if food_item.img_name:
                     image_service = ImageService()
                     await image_service.delete(food_item.img_name)
 
                 await db.delete(food_item)
+                await db.flush()
+                if parent_ids:
+                    # The parents lost an ingredient, recompute them and the items containing
+                    # them in the same transaction
+                    await self._propagate_macros(db, food_item_id, parent_ids=parent_ids)
                 await db.commit()
                 log.debug("Deleted FoodItem with id '%s'", food_item_id)
                 return True
@@ -566,7 +1045,9 @@ class FoodService:
         limit: int = 20,
     ) -> list[FoodItem]:
         """
-        Search for food items in Tandoor.
+        Search for food items in Tandoor. Searches the local copy of the recipes once a sync of
+        all recipes completed, Tandoor itself otherwise. The nutrition of recipes found in
+        Tandoor is cached until they change.
 
         :param query: Text query for search
         :param user_id: ID of the user performing the search
@@ -574,16 +1055,23 @@ class FoodService:
         :return: List of FoodItem objects from Tandoor
         """
         try:
-            tandoor_api_client = TandoorAPIClient()
-            tandoor_repo = TandoorRepository(tandoor_api_client)
-
-            # Search for foods in Tandoor
-            food_items = await tandoor_repo.search_recipes(query, user_id, limit)
+            recipe_service = TandoorRecipeService(self.db)
+            if TANDOOR_SYNC_INTERVAL_S > 0 and await recipe_service.is_synced():
+                query_embedding = await self._encode_query(query)
+                return await recipe_service.search(
+                    query=query,
+                    query_embedding=query_embedding,
+                    user_id=user_id,
+                    limit=limit,
+                    n_candidates=limit * HYBRID_CANDIDATE_FACTOR,
+                    rrf_k=SEARCH_RRF_K)
 
-            # Close the connection
-            await tandoor_repo.close()
+            # The search waits for Tandoor
+            await release_connection(self.db)
+            tandoor_repo = TandoorRepository(get_tandoor_client(), recipe_cache=recipe_service)
 
-            return food_items
+            # Search for foods in Tandoor
+            return await tandoor_repo.search_recipes(query, user_id, limit)
         except Exception as e:
             log.error(
                 "Failed to search food items with query '%s' in Tandoor: %s", query, e)
@@ -602,7 +1090,7 @@ class FoodService:
         """
 
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
 
                 last_eaten_subquery = (
                     select(
@@ -635,3 +1123,12 @@ class FoodService:
             raise e
 
         return []
+
+
+EMBEDDING_ENCODER = BatchingEncoder(
+    encode_batch=EMBEDDING_MODEL.encode,
+    executor=ENCODER_POOL,
+    max_batch_size=EMBEDDING_MAX_BATCH_SIZE,
+    max_wait_ms=EMBEDDING_MAX_WAIT_MS,
+    max_concurrent_batches=ENCODER_POOL_WORKERS,
+)
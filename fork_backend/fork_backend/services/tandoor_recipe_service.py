@@ -0,0 +1,271 @@
+"""Service class to keep a local copy of the Tandoor recipes and to search it"""
+
+import asyncio
+from datetime import datetime
+from os import environ
+from typing import Any, Awaitable, Callable, Optional
+from sqlalchemy import select, delete, update, func, or_, literal, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fork_backend.core.db import get_async_db, release_connection, use_async_db
+from fork_backend.core.logging import get_logger
+from fork_backend.core.ranking import reciprocal_rank_fusion, set_word_similarity_threshold
+from fork_backend.infrastructure.api_clients.tandoor_api_client import get_tandoor_client
+from fork_backend.infrastructure.repositories.tandoor_repository import TandoorRepository
+from fork_backend.models.food_item import FoodItem
+from fork_backend.models.system import System
+from fork_backend.models.tandoor_recipe import TandoorRecipe
+
+log = get_logger()
+
+# Seconds between two syncs of all recipes, 0 disables the sync and the local search
+TANDOOR_SYNC_INTERVAL_S = int(environ.get("FORK_TANDOOR_SYNC_INTERVAL_S", default="3600"))
+# Changed recipes fetched, encoded and committed together by the sync
+SYNC_BATCH_SIZE = 50
+
+NUTRITION_FIELDS = ("serving_size", "calories_per_100", "protein_per_100", "carbs_per_100",
+                    "fat_per_100")
+RECIPE_FIELDS = ("name", "description", "serving_unit", "external_image_url", *NUTRITION_FIELDS)
+
+
+class TandoorRecipeService:
+    """
+    Service to maintain the tandoor_recipes table. Caches the nutrition computed from the
+    details of a recipe until the recipe changes in Tandoor, and keeps a complete copy of all
+    recipes with embeddings when synced, so searches do not need Tandoor.
+    """
+
+    def __init__(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        :param db: Session to read and sync the recipes with. Every operation opens its own
+            session if not given. store always uses its own session.
+        """
+        self.db = db
+
+    async def get_nutrition(self, recipes: list[dict[str, Any]]
+                            ) -> dict[int, dict[str, float]]:
+        """
+        Get the cached nutrition of recipes that did not change since they were cached. Used as
+        recipe cache of TandoorRepository.
+
+        :param recipes: Recipe dicts of TandoorRepository.recipe_from_tandoor_response.
+        :return: Dict of the Tandoor id to the NUTRITION_FIELDS, for the cached recipes only.
+        """
+        updated_at = {recipe["id"]: recipe["updated_at"] for recipe in recipes}
+        if not updated_at:
+            return {}
+
+        try:
+            async with use_async_db(self.db) as db:
+                rows = (await db.execute(
+                    select(TandoorRecipe.id, TandoorRecipe.updated_at,
+                           *[getattr(TandoorRecipe, name) for name in NUTRITION_FIELDS])
+                    .where(TandoorRecipe.id.in_(updated_at.keys()))
+                )).all()
+            # The missing recipes are fetched from Tandoor next
+            await release_connection(self.db)
+        except Exception as e:
+            # The nutrition is fetched from Tandoor instead
+            log.error("Failed to load cached Tandoor recipes: %s", str(e))
+            return {}
+
+        return {row.id: {name: getattr(row, name) for name in NUTRITION_FIELDS}
+                for row in rows
+                if row.updated_at is not None and row.updated_at == updated_at[row.id]}
+
+    @staticmethod
+    async def store(recipes: list[dict[str, Any]]) -> None:
+        """
+        Insert or replace recipes with their nutrition. Failures are logged, but not raised.
+        Used as recipe cache of TandoorRepository.
+
+        :param recipes: Recipe dicts of TandoorRepository.recipe_from_tandoor_response, updated
+            with the dicts of TandoorRepository.get_recipe_nutrition.
+        """
+        try:
+            async with get_async_db() as db:
+                await TandoorRecipeService._upsert(db, recipes)
+                await db.commit()
+        except Exception as e:
+            log.error("Failed to cache Tandoor recipes: %s", str(e))
+
+    @staticmethod
+    async def _upsert(db: AsyncSession, recipes: list[dict[str, Any]],
+                      embeddings: Optional[list[list]] = None) -> None:
+        """Insert or replace recipes. Without embeddings, the embeddings are reset to null."""
+        synced_at = datetime.utcnow()
+        values = [{
+            "id": recipe["id"],
+            "updated_at": recipe["updated_at"],
+            "synced_at": synced_at,
+            **{name: recipe[name] for name in RECIPE_FIELDS},
+            # The name could have changed, the sync computes the missing embeddings
+            "embedding": embeddings[i] if embeddings is not None else None,
+        } for i, recipe in enumerate(recipes)]
+
+        stmt = insert(TandoorRecipe).values(values)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[TandoorRecipe.id],
+            set_={name: stmt.excluded[name] for name in values[0] if name != "id"}))
+
+    async def sync(self, repository: TandoorRepository,
+                   encode_batch: Callable[[list[str]], Awaitable[list[list]]]) -> int:
+        """
+        Bring the local copy of the recipes up to date with Tandoor. Fetches the details of the
+        recipes that changed or have no embedding yet, computes their nutrition and embeddings
+        and deletes the recipes that are gone from Tandoor. Each batch is fetched and encoded
+        before it is written in a short transaction, so no connection waits for Tandoor or the
+        model. Marks the copy as synced in System once all batches are done.
+
+        :param repository: Repository of the Tandoor instance.
+        :param encode_batch: Coroutine function computing the embeddings of a list of names.
+        :return: The number of recipes added or updated.
+        """
+        try:
+            recipes = await repository.list_recipes()
+
+            async with use_async_db(self.db) as db:
+                known = {row.id: row for row in (await db.execute(
+                    select(TandoorRecipe.id, TandoorRecipe.updated_at,
+                           TandoorRecipe.embedding.is_not(None).label("embedded"))
+                )).all()}
+            # Not kept in a transaction while Tandoor and the model are waited for
+            await release_connection(self.db)
+
+            changed = [recipe for recipe in recipes
+                       if recipe["id"] not in known
+                       or recipe["updated_at"] is None
+                       or known[recipe["id"]].updated_at != recipe["updated_at"]
+                       or not known[recipe["id"]].embedded]
+
+            n_synced = 0
+            for start in range(0, len(changed), SYNC_BATCH_SIZE):
+                batch = changed[start:start + SYNC_BATCH_SIZE]
+                # Fetched concurrently, bounded by the api client
+                results = await asyncio.gather(
+                    *[repository.get_recipe_nutrition(recipe["id"]) for recipe in batch],
+                    return_exceptions=True)
+
+                synced = []
+                for recipe, nutrition in zip(batch, results):
+                    if isinstance(nutrition, Exception):
+                        # e.g. recipes without ingredients in g or ml
+                        log.warning("Skipping Tandoor recipe %d in sync: %s", recipe["id"],
+                                    str(nutrition))
+                        continue
+                    recipe.update(nutrition)
+                    synced.append(recipe)
+
+                if synced:
+                    embeddings = await encode_batch([recipe["name"] for recipe in synced])
+                    async with use_async_db(self.db) as db:
+                        await self._upsert(db, synced, embeddings)
+                        await db.commit()
+                    n_synced += len(synced)
+
+            async with use_async_db(self.db) as db:
+                await db.execute(delete(TandoorRecipe).where(
+                    TandoorRecipe.id.not_in([recipe["id"] for recipe in recipes])))
+                # Only now the local copy is complete. The rows of an interrupted sync or of
+                # remote searches are only a part of the recipes.
+                await db.execute(update(System).values(
+                    tandoor_recipes_synced_at=datetime.utcnow()))
+                await db.commit()
+
+            log.info("Synced %d of %d Tandoor recipes", n_synced, len(recipes))
+            return n_synced
+
+        except Exception as e:
+            log.error("Failed to sync Tandoor recipes: %s", str(e))
+            raise e
+
+    async def is_synced(self) -> bool:
+        """Whether the local copy of the recipes was completely synced at least once"""
+        try:
+            async with use_async_db(self.db) as db:
+                result = await db.execute(select(System.tandoor_recipes_synced_at).limit(1))
+                return result.scalar_one_or_none() is not None
+        except Exception as e:
+            log.error("Failed to check for synced Tandoor recipes: %s", str(e))
+            raise e
+
+    async def search(self, query: str, query_embedding: Optional[list], user_id: str,
+                     limit: int = 20, n_candidates: int = 60, min_similarity: float = 0.3,
+                     rrf_k: int = 60) -> list[FoodItem]:
+        """
+        Hybrid search of the local copy of the recipes, like the hybrid search of the local food
+        items: the trigram ranking of the name and the semantic ranking of the embedding are
+        combined by reciprocal rank fusion.
+
+        :param query: Text query for search
+        :param query_embedding: Embedding of the query. Only the trigram ranking is used if None.
+        :param user_id: ID of the user performing the search
+        :param limit: Maximum number of results to return
+        :param n_candidates: Number of candidates of each ranking
+        :param min_similarity: Minimum cosine similarity of the semantic candidates
+        :param rrf_k: k of the reciprocal rank fusion
+        :return: List of FoodItem objects representing recipes, best first
+        """
+        try:
+            async with use_async_db(self.db) as db:
+                await set_word_similarity_threshold(db)
+                lexical = (
+                    select(TandoorRecipe.id)
+                    .where(or_(TandoorRecipe.name.ilike(f"%{query}%"),
+                               literal(query, String).op("<%")(TandoorRecipe.name)))
+                    .order_by(func.word_similarity(query, TandoorRecipe.name).desc(),
+                              TandoorRecipe.name.ilike(f"{query}%").desc(),
+                              func.length(TandoorRecipe.name))
+                    .limit(n_candidates))
+                rankings = [list((await db.execute(lexical)).scalars())]
+
+                if query_embedding is not None:
+                    distance = TandoorRecipe.embedding.cosine_distance(query_embedding)
+                    semantic = (
+                        select(TandoorRecipe.id)
+                        .where(TandoorRecipe.embedding.is_not(None),
+                               distance <= 1 - min_similarity)
+                        .order_by(distance)
+                        .limit(n_candidates))
+                    rankings.append(list((await db.execute(semantic)).scalars()))
+
+                recipe_ids = reciprocal_rank_fusion(rankings, k=rrf_k)[:limit]
+                if not recipe_ids:
+                    return []
+
+                recipes = {recipe.id: recipe for recipe in (await db.execute(
+                    select(TandoorRecipe).where(TandoorRecipe.id.in_(recipe_ids))
+                )).scalars()}
+
+            return [TandoorRepository.food_item_from_recipe(
+                {name: getattr(recipes[recipe_id], name) for name in RECIPE_FIELDS}, user_id)
+                for recipe_id in recipe_ids if recipe_id in recipes]
+
+        except Exception as e:
+            log.error("Failed to search Tandoor recipes for query '%s': %s", query, str(e))
+            raise e
+
+
+async def run_tandoor_sync(encode_batch: Callable[[list[str]], Awaitable[list[list]]],
+                           interval_s: int = TANDOOR_SYNC_INTERVAL_S) -> None:
+    """
+    Sync the Tandoor recipes every interval_s seconds, until cancelled. Returns right away if
+    Tandoor is not configured.
+
+    :param encode_batch: Coroutine function computing the embeddings of a list of names.
+    :param interval_s: Seconds between two syncs.
+    """
+    try:
+        repository = TandoorRepository(get_tandoor_client())
+    except ValueError as e:
+        log.info("Not syncing Tandoor recipes: %s", str(e))
+        return
+
+    while True:
+        try:
+            await TandoorRecipeService().sync(repository, encode_batch)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Logged by sync, the next sync tries again
+            pass
+        await asyncio.sleep(interval_s)
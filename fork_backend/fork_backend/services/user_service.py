@@ -1,12 +1,15 @@
 """Service class to manipulate users"""
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from datetime import date
+from os import environ
 from sqlalchemy import update, select, inspect, desc
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from fork_backend.core.db import get_async_db
-from fork_backend.core.auth import hash_password
+from fork_backend.core.db import use_async_db
+from fork_backend.core.auth import hash_password_async, AuthenticatedUser
+from fork_backend.core.cache import TTLCache
 from fork_backend.core.logging import get_logger
 from fork_backend.models.user import User, WeigthHistory
 from fork_backend.models.food_log import FoodLog
@@ -16,12 +19,22 @@ from fork_backend.models.activity_log import ActivityLog
 
 log = get_logger()
 
+# Users resolved from access tokens. Short lived, so changes of other processes show up soon.
+PRINCIPAL_CACHE = TTLCache(
+    max_size=int(environ.get("FORK_USER_CACHE_SIZE", default="1024")),
+    ttl_s=float(environ.get("FORK_USER_CACHE_TTL_S", default="60")),
+)
+
 
 class UserService:
     """Service to handle user management"""
 
-    def __init__(self) -> None:
-        """"""
+    def __init__(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        :param db: Session to run all operations in, e.g. the request scoped session of
+            get_async_db_fastapi. Every operation opens its own session if not given.
+        """
+        self.db = db
 
     async def create_user(
         self,
@@ -42,10 +55,10 @@ class UserService:
             new_user = User(
                 username=username,
                 email=email,
-                hashed_password=hash_password(password),
+                hashed_password=await hash_password_async(password),
             )
 
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 db.add(new_user)
                 await db.commit()
             log.debug("New user '%s' created.", username)
@@ -65,7 +78,7 @@ class UserService:
         :return: The new goals object
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 db.add(goals)
                 await db.commit()
             log.debug("New goals '%s' created for user '%ss'.",
@@ -81,7 +94,7 @@ class UserService:
         :param user_id: The ID of the user whose food log goals to update
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(FoodLog)
                     .where(FoodLog.user_id == user_id)
@@ -119,7 +132,7 @@ class UserService:
         :param user_id: The ID of the user whose activity log goals to update
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
                     select(ActivityLog)
                     .where(ActivityLog.user_id == user_id)
@@ -161,6 +174,7 @@ class UserService:
         :param user_id: The ID of the user whose goals to update
         :param new_goals: The new goal values to set
         """
+        PRINCIPAL_CACHE.invalidate(user_id)
         user = await self.get_user_by_id(user_id)
 
         if not user.goals:
@@ -220,7 +234,7 @@ class UserService:
                                 v in values_to_update.items() if k != "weight"}
 
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 mapper = inspect(User)
                 valid_columns = mapper.attrs.keys()
 
@@ -230,25 +244,84 @@ class UserService:
 
                 # Update password
                 if "password" in values_to_update.keys() and values_to_update["password"] is not None:
-                    filtered_updates["hashed_password"] = hash_password(
+                    filtered_updates["hashed_password"] = await hash_password_async(
                         values_to_update["password"])
 
                 if not filtered_updates:
                     return await self.get_user_by_id(user_id)
 
                 stmt = update(User).where(User.id == user_id).values(filtered_updates).returning(
-                    User).options(selectinload(User.goals), selectinload(User.weight_history))
+                    User).options(selectinload(User.goals), selectinload(User.weight_history)
+                    ).execution_options(populate_existing=True)
 
                 result = await db.execute(stmt)
                 await db.commit()
 
                 user = result.scalar_one()
+            # after the commit, so no concurrent request caches the old values again
+            PRINCIPAL_CACHE.invalidate(user_id)
             log.debug("User %s updated.", user_id)
         except Exception as e:
             log.error("Failed to update user: %s", str(e))
             raise e
         return user
 
+    async def rehash_password(self, user_id: str, plain_text_password: str,
+                              current_hash: str) -> bool:
+        """
+        Replace the password hash of a user with one of the configured bcrypt cost factor.
+        The plain text password must have been verified against current_hash.
+
+        :param user_id: The ID of the user.
+        :param plain_text_password: The verified password of the user.
+        :param current_hash: The hash the password was verified against. The hash is not
+            replaced if the password was changed in the meantime.
+
+        :return: True if the hash was replaced.
+        """
+        new_hash = await hash_password_async(plain_text_password)
+        try:
+            async with use_async_db(self.db) as db:
+                result = await db.execute(
+                    update(User)
+                    .where(User.id == user_id, User.hashed_password == current_hash)
+                    .values(hashed_password=new_hash))
+                await db.commit()
+        except Exception as e:
+            log.error("Failed to rehash password of user '%s': %s", user_id, str(e))
+            raise e
+        return result.rowcount == 1
+
+    async def get_principal(self, user_id: str) -> AuthenticatedUser:
+        """Get the lightweight principal of a user, e.g. to authorize a request.
+        Cached for FORK_USER_CACHE_TTL_S seconds, unlike get_user_by_id it loads neither goals
+        nor weight history.
+
+        :param user_id: the id of the user to get.
+
+        :return: The AuthenticatedUser
+        """
+        principal = PRINCIPAL_CACHE.get(user_id)
+        if principal is not None:
+            return principal
+
+        try:
+            async with use_async_db(self.db) as db:
+                result = await db.execute(
+                    select(User.id, User.username).where(User.id == user_id))
+                row = result.one_or_none()
+        except Exception as e:
+            log.error("Failed to get principal of user with id '%s': %s", user_id, str(e))
+            raise e
+
+        if row is None:
+            log.error("Could not find user with id '%s'", user_id)
+            raise ValueError(f"Could not find user with id '{user_id}'")
+
+        principal = AuthenticatedUser(id=row.id, username=row.username)
+        PRINCIPAL_CACHE.set(user_id, principal)
+        return principal
+
     async def get_user_by_id(self, user_id: str) -> User:
         """Get a user by id.
 
@@ -257,10 +330,12 @@ class UserService:
         :return: The User object
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
-                    select(User).filter(User.id == user_id).options(selectinload(User.goals),
-                                                                    selectinload(User.weight_history)))
+                    select(User).filter(User.id == user_id)
+                    # reload objects already loaded by an earlier operation of the session
+                    .execution_options(populate_existing=True)
+                    .options(selectinload(User.goals), selectinload(User.weight_history)))
                 user = result.scalar_one_or_none()
 
                 if user:
@@ -283,10 +358,12 @@ class UserService:
         :return: The User object
         """
         try:
-            async with get_async_db() as db:
+            async with use_async_db(self.db) as db:
                 result = await db.execute(
-                    select(User).filter(User.username == username).options(selectinload(User.goals),
-                                                                           selectinload(User.weight_history)))
+                    select(User).filter(User.username == username)
+                    # reload objects already loaded by an earlier operation of the session
+                    .execution_options(populate_existing=True)
+                    .options(selectinload(User.goals), selectinload(User.weight_history)))
                 user = result.scalar_one_or_none()
 
                 if user:
@@ -307,10 +384,11 @@ class UserService:
 
     async def update_weight_history(self, weight_history_entry: WeigthHistory) -> list[WeigthHistory]:
         """Update the weight history with either an entirely new entry or a changed existing entry"""
+        PRINCIPAL_CACHE.invalidate(weight_history_entry.user_id)
         user = await self.get_user_by_id(user_id=weight_history_entry.user_id)
         weight_history = user.weight_history
 
-        async with get_async_db() as db:
+        async with use_async_db(self.db) as db:
             for existing_history_entry in weight_history:
                 if existing_history_entry.id == weight_history_entry.id:
                     stmt = update(WeigthHistory).where(WeigthHistory.id == weight_history_entry.id).values(
@@ -342,19 +420,21 @@ class UserService:
         :param weight_history_list: The history items to update with
         :return: The updated list, sorted with newest dates first
         """
+        PRINCIPAL_CACHE.invalidate(user_id)
         user = await self.get_user_by_id(user_id=user_id)
         existing_weight_history = user.weight_history
 
         incoming_ids = {entry.id for entry in weight_history_list if entry.id}
 
         # Delete entries that exist in the database but not in the incoming list
-        async with get_async_db() as db:
-            for existing_entry in existing_weight_history:
+        async with use_async_db(self.db) as db:
+            for existing_entry in list(existing_weight_history):
                 if existing_entry.id not in incoming_ids:
-                    # Remove missing entries
+                    # Remove missing entries. Removed from the collection first, the user is
+                    # still attached to a shared session and would flush the removal later.
+                    existing_weight_history.remove(existing_entry)
                     await db.delete(existing_entry)
                     await db.commit()
-                    existing_weight_history.remove(existing_entry)
 
             for entry in weight_history_list:
                 if entry.id: